@@ -58,7 +58,9 @@ type BulkAddFormData = {
 
 const AdminBooks = () => {
   const [books, setBooks] = useState<Book[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [addDialogOpen, setAddDialogOpen] = useState(false);
   const [bulkAddDialogOpen, setBulkAddDialogOpen] = useState(false);
   const [editDialogOpen, setEditDialogOpen] = useState(false);
@@ -106,8 +108,9 @@ const AdminBooks = () => {
   const fetchBooks = async () => {
     try {
       setIsLoading(true);
-      const data = await bookService.getAdminBooks();
-      setBooks(data);
+      const page = await bookService.getAdminBooksPage();
+      setBooks(page.results);
+      setNextPage(page.next);
     } catch (error) {
       showError("Failed to fetch books");
       console.error(error);
@@ -116,11 +119,36 @@ const AdminBooks = () => {
     }
   };
 
+  // Append the next page of books to the ones already shown
+  const loadMore = async () => {
+    if (!nextPage) return;
+
+    try {
+      setLoadingMore(true);
+      const page = await bookService.getAdminBooksPage(nextPage);
+      setBooks((prev) => [...prev, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      showError("Failed to fetch more books");
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // New books sort last, so they belong on screen only once the last page is
+  // loaded; otherwise "Load more" brings them in
+  const showAddedBooks = (newBooks: Book[]) => {
+    if (!nextPage) {
+      setBooks((prev) => [...prev, ...newBooks]);
+    }
+  };
+
   const onAddBook = async (data: BookFormData) => {
     try {
       setActionLoading(true);
       const newBooks = await bookService.addBook(data);
-      setBooks((prev) => [...prev, ...newBooks]);
+      showAddedBooks(newBooks);
       showSuccess("Book added successfully");
       setAddDialogOpen(false);
       resetAdd();
@@ -136,7 +164,7 @@ const AdminBooks = () => {
     try {
       setActionLoading(true);
       const newBooks = await bookService.addBook(data.books);
-      setBooks((prev) => [...prev, ...newBooks]);
+      showAddedBooks(newBooks);
       showSuccess(`${newBooks.length} books added successfully`);
       setBulkAddDialogOpen(false);
       resetBulk();
@@ -295,6 +323,20 @@ const AdminBooks = () => {
                 No books found. Add some books to get started.
               </div>
             )}
+            {nextPage && !isLoading && (
+              <div className="flex justify-center pt-4">
+                <Button
+                  variant="outline"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                >
+                  {loadingMore && (
+                    <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+                  )}
+                  Load more
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
 
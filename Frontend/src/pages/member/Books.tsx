@@ -22,7 +22,9 @@ const MemberBooks = () => {
   const { user } = useSelector((state: RootState) => state.auth);
   const [books, setBooks] = useState<Book[]>([]);
   const [borrowedBooks, setBorrowedBooks] = useState<Borrow[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState("");
   const [actionLoading, setActionLoading] = useState<number | null>(null);
   const { showSuccess, showError } = useAppToast();
@@ -34,18 +36,13 @@ const MemberBooks = () => {
   const fetchData = async () => {
     try {
       setLoading(true);
-      const [booksData, historyData] = await Promise.all([
-        bookService.getBooks(),
-        bookService.getBorrowHistory(),
+      const [booksPage] = await Promise.all([
+        bookService.getBooksPage(),
+        fetchBorrowedBooks(),
       ]);
 
-      setBooks(booksData);
-
-      // Ensure historyData is always an array
-      const borrowHistory = Array.isArray(historyData) ? historyData : [];
-
-      // Filter only currently borrowed books (not returned)
-      setBorrowedBooks(borrowHistory.filter((borrow) => !borrow.returned_at));
+      setBooks(booksPage.results);
+      setNextPage(booksPage.next);
     } catch (error) {
       showError("Failed to fetch books data");
       console.error(error);
@@ -54,6 +51,50 @@ const MemberBooks = () => {
     }
   };
 
+  const fetchBorrowedBooks = async () => {
+    const historyData = await bookService.getBorrowHistory();
+
+    // Ensure historyData is always an array
+    const borrowHistory = Array.isArray(historyData) ? historyData : [];
+
+    // Filter only currently borrowed books (not returned)
+    setBorrowedBooks(borrowHistory.filter((borrow) => !borrow.returned_at));
+  };
+
+  // Append the next page of books to the ones already shown
+  const loadMore = async () => {
+    if (!nextPage) return;
+
+    try {
+      setLoadingMore(true);
+      const page = await bookService.getBooksPage(nextPage);
+      setBooks((prev) => [...prev, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      showError("Failed to fetch more books");
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Update a loaded book in place so the pages already shown are kept
+  const adjustCopies = (bookId: number, change: number) => {
+    setBooks((prev) =>
+      prev.map((book) => {
+        if (book.id !== bookId || book.available_copies === undefined) {
+          return book;
+        }
+        const availableCopies = book.available_copies + change;
+        return {
+          ...book,
+          available_copies: availableCopies,
+          available: availableCopies > 0,
+        };
+      })
+    );
+  };
+
   const handleBorrow = async (bookId: number) => {
     try {
       setActionLoading(bookId);
@@ -61,7 +102,8 @@ const MemberBooks = () => {
       showSuccess(response.message);
 
       // Refresh data after borrow
-      fetchData();
+      adjustCopies(bookId, -1);
+      fetchBorrowedBooks();
     } catch (error: any) {
       showError(error.response?.data?.error || "Failed to borrow book");
       console.error(error);
@@ -77,7 +119,8 @@ const MemberBooks = () => {
       showSuccess(response.message);
 
       // Refresh data after return
-      fetchData();
+      adjustCopies(bookId, 1);
+      fetchBorrowedBooks();
     } catch (error: any) {
       showError(error.response?.data?.error || "Failed to return book");
       console.error(error);
@@ -209,8 +252,18 @@ const MemberBooks = () => {
           </CardContent>
           <CardFooter className="justify-between border-t px-6 py-4">
             <div className="text-sm text-muted-foreground">
-              Showing {filteredBooks.length} of {books.length} books
+              Showing {filteredBooks.length} of {books.length} loaded books
             </div>
+            {nextPage && !loading && (
+              <Button
+                size="sm"
+                variant="outline"
+                onClick={loadMore}
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </Button>
+            )}
           </CardFooter>
         </Card>
       </main>
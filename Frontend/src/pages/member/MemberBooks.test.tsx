@@ -30,7 +30,9 @@ vi.mock("../../services/bookService", () => {
 
   return {
     bookService: {
-      getBooks: vi.fn().mockResolvedValue(mockBooks),
+      getBooksPage: vi
+        .fn()
+        .mockResolvedValue({ next: null, previous: null, results: mockBooks }),
       getBorrowHistory: vi.fn().mockResolvedValue(mockBorrowHistory),
       borrowBook: vi
         .fn()
@@ -64,7 +66,7 @@ describe("MemberBooks Component", () => {
     renderComponent();
     expect(screen.getByText("Loading books...")).toBeTruthy();
     await waitFor(() => {
-      expect(bookService.getBooks).toHaveBeenCalledTimes(1);
+      expect(bookService.getBooksPage).toHaveBeenCalledTimes(1);
       expect(bookService.getBorrowHistory).toHaveBeenCalledTimes(1);
     });
   });
@@ -183,7 +185,11 @@ test("filters books based on search input", async () => {
 });
 
 test("displays a message when no books are available", async () => {
-  vi.spyOn(bookService, "getBooks").mockResolvedValue([]);
+  vi.spyOn(bookService, "getBooksPage").mockResolvedValue({
+    next: null,
+    previous: null,
+    results: [],
+  });
   renderComponent();
 
   await waitFor(() => {
@@ -208,3 +214,34 @@ test("displays a message when no books match search", async () => {
     expect(screen.getByText("No books found")).toBeTruthy();
   });
 });
+
+test("loads the next page of books on demand", async () => {
+  vi.spyOn(bookService, "getBooksPage")
+    .mockResolvedValueOnce({
+      next: "/api/books/?cursor=abc",
+      previous: null,
+      results: [{ id: 1, title: "Book A", author: "Author A", available: true }],
+    })
+    .mockResolvedValueOnce({
+      next: null,
+      previous: "/api/books/?cursor=def",
+      results: [{ id: 4, title: "Book D", author: "Author D", available: true }],
+    });
+  renderComponent();
+
+  await waitFor(() => {
+    expect(screen.getByText("Book A")).toBeTruthy();
+  });
+  expect(screen.queryByText("Book D")).toBeNull();
+
+  fireEvent.click(screen.getByText("Load more"));
+
+  await waitFor(() => {
+    expect(screen.getByText("Book D")).toBeTruthy();
+  });
+  expect(bookService.getBooksPage).toHaveBeenLastCalledWith(
+    "/api/books/?cursor=abc"
+  );
+  expect(screen.getByText("Book A")).toBeTruthy();
+  expect(screen.queryByText("Load more")).toBeNull();
+});
@@ -1,13 +1,40 @@
 import { api } from "./api";
-import { Book, Borrow } from "../types/book";
+import { Book, Borrow, CursorPage } from "../types/book";
+
+// Fetch one cursor page; pass a page's `next` link to fetch the one after it
+const fetchPage = async <T>(url: string): Promise<CursorPage<T>> => {
+  const response = await api.get<CursorPage<T>>(url);
+  return {
+    next: response.data.next ?? null,
+    previous: response.data.previous ?? null,
+    results: response.data.results ?? [],
+  };
+};
+
+const emptyPage = <T>(): CursorPage<T> => ({
+  next: null,
+  previous: null,
+  results: [],
+});
+
+// Follow the cursor `next` links until the whole list has been fetched; only
+// for the dashboard totals, lists should page with fetchPage
+const fetchAllPages = async <T>(url: string): Promise<T[]> => {
+  const items: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const response: { data: CursorPage<T> } = await api.get<CursorPage<T>>(next);
+    items.push(...(response.data.results ?? []));
+    next = response.data.next ?? null;
+  }
+  return items;
+};
 
 export const bookService = {
   // Admin Services
   getAdminBooks: async (): Promise<Book[]> => {
     try {
-      const response = await api.get<Book[]>("/api/admin/books/"); 
-      console.log("Admin Books Response:", response.data); // Debugging log
-      return response.data;
+      return await fetchAllPages<Book>("/api/admin/books/");
     } catch (error) {
       if (error instanceof Error) {
         console.error(
@@ -21,6 +48,20 @@ export const bookService = {
     }
   },
 
+  getAdminBooksPage: async (
+    url: string = "/api/admin/books/"
+  ): Promise<CursorPage<Book>> => {
+    try {
+      return await fetchPage<Book>(url);
+    } catch (error) {
+      console.error(
+        "Error fetching admin books:",
+        (error as any).response?.data || (error as any).message
+      );
+      return emptyPage<Book>();
+    }
+  },
+
   addBook: async (book: Partial<Book> | Partial<Book>[]): Promise<Book[]> => {
     const response = await api.post<{ books: Book[] }>(
       "/api/admin/books/",
@@ -57,9 +98,7 @@ export const bookService = {
   // Member Services
   getBooks: async (): Promise<Book[]> => {
     try {
-      const response = await api.get<Book[]>("/api/books/");
-      console.log("📚 User Books Response:", response.data);
-      return response.data;
+      return await fetchAllPages<Book>("/api/books/");
     } catch (error) {
       console.error(
         " Error fetching books:",
@@ -69,6 +108,20 @@ export const bookService = {
     }
   },
 
+  getBooksPage: async (
+    url: string = "/api/books/"
+  ): Promise<CursorPage<Book>> => {
+    try {
+      return await fetchPage<Book>(url);
+    } catch (error) {
+      console.error(
+        " Error fetching books:",
+        (error as any).response?.data || (error as any).message
+      );
+      return emptyPage<Book>();
+    }
+  },
+
   borrowBook: async (
     id: number
   ): Promise<{ message: string; borrow_details: Borrow }> => {
@@ -91,9 +144,7 @@ export const bookService = {
 
   getBorrowHistory: async (): Promise<Borrow[]> => {
     try {
-      const response = await api.get<Borrow[]>("/api/books/history/");
-      console.log("📜 Borrow History Response:", response.data);
-      return response.data;
+      return await fetchAllPages<Borrow>("/api/books/history/");
     } catch (error) {
       console.error(" Error fetching borrow history:", error);
 
@@ -3,6 +3,8 @@ export interface Book {
   title: string;
   author: string;
   available: boolean;
+  total_copies?: number;
+  available_copies?: number;
 }
 
 export interface Borrow {
@@ -14,3 +16,9 @@ export interface Borrow {
   borrowed_at: string;
   returned_at: string | null;
 }
+
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
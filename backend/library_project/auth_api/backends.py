@@ -0,0 +1,83 @@
+# auth_api/backends.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password, verify_password
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def _new_executor(mode):
+    workers = settings.LOGIN_HASH_WORKERS or os.cpu_count()
+    if mode == PROCESS:
+        # Forking a server process that already runs threads can copy held
+        # locks into the child, so workers start from a fresh interpreter
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def hash_executor():
+    """The shared pool password hashing runs on, or None to hash inline."""
+    mode = settings.LOGIN_HASH_POOL
+    if mode == INLINE:
+        return None
+
+    with _executor_lock:
+        if mode not in _executors:
+            _executors[mode] = _new_executor(mode)
+        return _executors[mode]
+
+
+def run_hashing(func, *args):
+    executor = hash_executor()
+    if executor is None:
+        return func(*args)
+    return executor.submit(func, *args).result()
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend that verifies passwords on a bounded worker pool.
+
+    Only ``LOGIN_HASH_WORKERS`` hashes run at once, so a burst of logins can't
+    take every CPU from the request workers serving the rest of the API.
+    Passwords stored with an outdated hasher or work factor are rehashed with
+    the current policy after a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Spend the same hashing time so unknown usernames aren't revealed
+            run_hashing(make_password, password)
+            return None
+
+        is_correct, must_update = run_hashing(verify_password, password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+
+        if must_update:
+            user.password = run_hashing(make_password, password)
+            user.save(update_fields=["password"])
+        return user
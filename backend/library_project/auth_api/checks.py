@@ -0,0 +1,49 @@
+# auth_api/checks.py
+import importlib.util
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends whose entries live in one process (or nowhere)
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def check_revocation_cache(app_configs, **kwargs):
+    alias = settings.TOKEN_REVOCATION_CACHE_ALIAS
+    if alias is None:
+        return []
+    backend = settings.CACHES[alias]["BACKEND"]
+    if backend in PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                f"The token revocation cache {alias!r} uses {backend}, which other "
+                "processes cannot see; a logout would not hold in them.",
+                hint="Use a shared cache that never evicts keys (e.g. Redis with "
+                "noeviction), or leave REVOCATION_CACHE_BACKEND unset to check "
+                "the blacklist table on every refresh.",
+                id="auth_api.E001",
+            )
+        ]
+    return []
+
+
+@register()
+def check_password_hasher(app_configs, **kwargs):
+    preferred = settings.PASSWORD_HASHERS[0]
+    if preferred.endswith("Argon2PasswordHasher") and (
+        importlib.util.find_spec("argon2") is None
+    ):
+        return [
+            Error(
+                f"PASSWORD_HASHERS starts with {preferred}, but the argon2-cffi "
+                "package is not installed; every login would fail.",
+                hint="Install argon2-cffi (see requirements.txt) or choose "
+                "PASSWORD_HASHER=pbkdf2 or scrypt.",
+                id="auth_api.E002",
+            )
+        ]
+    return []
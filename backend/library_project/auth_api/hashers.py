@@ -0,0 +1,51 @@
+# auth_api/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+# Work factors are read from settings on every use, so changing them takes
+# effect without a restart and existing hashes are upgraded on the next login.
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING["pbkdf2"]["iterations"]
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_HASHING["scrypt"]["work_factor"]
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_HASHING["scrypt"]["block_size"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHING["scrypt"]["parallelism"]
+
+    @property
+    def maxmem(self):
+        # scrypt needs 128 * n * r * p bytes; leave headroom over OpenSSL's 32 MiB default
+        return 2 * 128 * self.work_factor * self.block_size * self.parallelism
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with tunable costs; requires the ``argon2-cffi`` package."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHING["argon2"]["time_cost"]
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHING["argon2"]["memory_cost"]
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHING["argon2"]["parallelism"]
@@ -0,0 +1,30 @@
+# auth_api/management/commands/prune_tokens.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted refresh tokens in batches. "
+        "Meant to run on a schedule, e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or settings.TOKEN_PRUNE_BATCH_SIZE
+        # Fixed cutoff, so tokens expiring mid-run don't keep the loop going
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        pruned = 0
+
+        while ids := list(expired.values_list("id", flat=True)[:batch_size]):
+            # One short transaction per batch; blacklist rows cascade with them
+            with transaction.atomic():
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            pruned += len(ids)
+
+        self.stdout.write(f"Pruned {pruned} expired tokens.")
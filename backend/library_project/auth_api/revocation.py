@@ -0,0 +1,74 @@
+# auth_api/revocation.py
+"""Refresh token revocation checks.
+
+With ``TOKEN_REVOCATION_CACHE_ALIAS`` set, the blacklisted jtis are mirrored
+in that cache and refreshes are checked against it without touching the
+database; the cache must be shared by every process and never evict keys
+(``checks.py`` refuses per-process backends). Unset, each check reads the
+blacklist table, so a logout holds everywhere whatever the cache does.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+REVOKED_KEY = "token:revoked:{}"
+# Present while the cache holds every live blacklisted jti
+LOADED_KEY = "token:revoked:loaded"
+LOAD_CHUNK_SIZE = 1000
+
+
+def _cache():
+    return caches[settings.TOKEN_REVOCATION_CACHE_ALIAS]
+
+
+def _seconds_left(expires_at):
+    return int((expires_at - timezone.now()).total_seconds()) + 1
+
+
+def revoke(jti, expires_at):
+    """Add a refresh token to the revocation set until it would have expired."""
+    if settings.TOKEN_REVOCATION_CACHE_ALIAS is None:
+        return
+    timeout = _seconds_left(expires_at)
+    if timeout > 0:
+        _cache().set(REVOKED_KEY.format(jti), True, timeout)
+
+
+def load_revocations():
+    """Copy every unexpired blacklisted jti from the database into the cache."""
+    cache = _cache()
+    rows = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        .values_list("token__jti", "token__expires_at")
+        .iterator(chunk_size=LOAD_CHUNK_SIZE)
+    )
+    chunk, latest = {}, None
+    for jti, expires_at in rows:
+        chunk[REVOKED_KEY.format(jti)] = True
+        latest = max(latest or expires_at, expires_at)
+        if len(chunk) == LOAD_CHUNK_SIZE:
+            cache.set_many(chunk, _seconds_left(latest))
+            chunk, latest = {}, None
+    if chunk:
+        cache.set_many(chunk, _seconds_left(latest))
+    cache.set(LOADED_KEY, True, timeout=None)
+
+
+def is_revoked(jti):
+    """Whether the refresh token ``jti`` is blacklisted.
+
+    From the revocation cache alone when one is configured: the database is
+    only read when the set itself is missing (first use, or a cache restart),
+    to reload it. Un-blacklisting a token in the admin then takes effect once
+    its entry expires or the cache is cleared.
+    """
+    if settings.TOKEN_REVOCATION_CACHE_ALIAS is None:
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    cache = _cache()
+    key = REVOKED_KEY.format(jti)
+    found = cache.get_many([key, LOADED_KEY])
+    if LOADED_KEY not in found:
+        load_revocations()
+        return cache.get(key) is not None
+    return key in found
@@ -1,7 +1,10 @@
 # auth_api/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import LibraryRefreshToken
 
 User = get_user_model()
 
@@ -51,3 +54,21 @@ class TokenSerializer(serializers.Serializer):
 
     refresh = serializers.CharField()
     access = serializers.CharField()
+
+
+class LibraryTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer checking revocation through the cached blacklist"""
+
+    token_class = LibraryRefreshToken
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Serializer to revoke a refresh token"""
+
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            return LibraryRefreshToken(value)
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc))
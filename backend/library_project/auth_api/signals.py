@@ -0,0 +1,12 @@
+# auth_api/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .revocation import revoke
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        revoke(instance.token.jti, instance.token.expires_at)
@@ -0,0 +1,27 @@
+# auth_api/tokens.py
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import is_revoked
+
+
+class LibraryRefreshToken(RefreshToken):
+    """Refresh token carrying the claims stateless authentication needs.
+
+    ``username`` and ``role`` are copied into every access token minted from
+    it, so ``request.user.role`` can be read without loading the user row.
+    Blacklist checks go to the cached revocation set instead of the database.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["username"] = user.username
+        token["role"] = user.role
+        return token
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
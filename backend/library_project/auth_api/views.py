@@ -1,19 +1,32 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import LibraryRefreshToken
 from rest_framework.permissions import AllowAny
-from .serializers import RegisterSerializer, LoginSerializer
+from rest_framework_simplejwt.views import TokenRefreshView
+from .serializers import (
+    RegisterSerializer,
+    LoginSerializer,
+    LibraryTokenRefreshSerializer,
+    LogoutSerializer,
+)
 from django.contrib.auth import get_user_model
 from django.db.utils import IntegrityError
+from library_api.throttling import (
+    ConcurrencyCapMixin,
+    LoginRateThrottle,
+    RegisterRateThrottle,
+)
 
 User = get_user_model()
 
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(ConcurrencyCapMixin, generics.CreateAPIView):
     """POST /auth/signup → Register a new user"""
 
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterRateThrottle]
+    concurrency_scope = "password_hashing"
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -54,11 +67,13 @@ class RegisterView(generics.CreateAPIView):
         )
 
 
-class LoginView(generics.GenericAPIView):
+class LoginView(ConcurrencyCapMixin, generics.GenericAPIView):
     """POST /auth/login → Login a user and return access & refresh tokens"""
 
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle]
+    concurrency_scope = "password_hashing"
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -71,7 +86,7 @@ class LoginView(generics.GenericAPIView):
         user = serializer.validated_data  
 
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = LibraryRefreshToken.for_user(user)
 
         return Response(
             {
@@ -86,3 +101,25 @@ class LoginView(generics.GenericAPIView):
         )
 
 
+class LogoutView(generics.GenericAPIView):
+    """POST /auth/logout → Revoke a refresh token"""
+
+    serializer_class = LogoutSerializer
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer.validated_data["refresh"].blacklist()
+        return Response(status=status.HTTP_205_RESET_CONTENT)
+
+
+class LibraryTokenRefreshView(TokenRefreshView):
+    """POST /auth/token/refresh → Exchange a refresh token for an access token"""
+
+    serializer_class = LibraryTokenRefreshSerializer
@@ -0,0 +1,249 @@
+# benchmarks/bench_asgi.py
+"""Compare the WSGI deployment (sync views, threaded server) with the ASGI one
+(async views under uvicorn) on the read-heavy list endpoints.
+
+Seeds a throwaway database, then for each deployment starts a single server
+process and drives it from ``--clients`` concurrent asyncio clients, reporting
+p50/p95/p99 latency and requests per second per endpoint. For ASGI it also
+holds ``--long-polls`` catalog long-polls (``?wait=``) open while probing the
+catalog, to show what concurrent waiting clients cost the worker:
+
+    python benchmarks/bench_asgi.py --books 100000 --borrows 1000000 \\
+        --clients 64 --requests 50 --long-polls 2000 --output asgi.json
+
+Requires uvicorn. Raise ``ulimit -n`` above the number of long-polls.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from common import percentiles, seed_library, setup_django
+
+parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+)
+parser.add_argument("--users", type=int, default=1_000)
+parser.add_argument("--books", type=int, default=10_000)
+parser.add_argument("--borrows", type=int, default=100_000)
+parser.add_argument("--clients", type=int, default=32, help="concurrent clients")
+parser.add_argument("--requests", type=int, default=30, help="requests per client")
+parser.add_argument("--long-polls", type=int, default=1_000)
+parser.add_argument("--wait", type=float, default=20, help="long-poll ?wait= seconds")
+parser.add_argument("--servers", default="wsgi,asgi")
+parser.add_argument("--output", help="write the results as JSON to this file")
+parser.add_argument("--serve", choices=["wsgi", "asgi"], help=argparse.SUPPRESS)
+parser.add_argument("--db", help=argparse.SUPPRESS)
+
+ENDPOINTS = {
+    "catalog": ("/api/books/", "member"),
+    "history": ("/api/books/history/", "member"),
+    "borrowed": ("/api/admin/borrowed-books/", "admin"),
+}
+
+
+def serve(kind, db_path):
+    """Child process: serve the project on a free port and print the port."""
+    if kind == "asgi":
+        os.environ["ASYNC_READ_VIEWS"] = "True"
+    setup_django(db_path)
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    print(sock.getsockname()[1], flush=True)
+
+    if kind == "asgi":
+        import uvicorn
+
+        sock.listen(4096)
+        config = uvicorn.Config(
+            "library_project.asgi:application",
+            log_level="warning",
+            access_log=False,
+            backlog=4096,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+    else:
+        from django.core.servers.basehttp import (
+            ThreadedWSGIServer,
+            WSGIRequestHandler,
+        )
+        from django.core.wsgi import get_wsgi_application
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadedWSGIServer):
+            request_queue_size = 4096
+
+        port = sock.getsockname()[1]
+        sock.close()
+        server = Server(("127.0.0.1", port), QuietHandler)
+        server.set_app(get_wsgi_application())
+        server.serve_forever()
+
+
+async def http_get(port, path, headers):
+    """One GET over a fresh connection; returns (status, headers, seconds)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"GET {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    elapsed = time.perf_counter() - start
+
+    head = response.split(b"\r\n\r\n", 1)[0].decode("latin-1").split("\r\n")
+    status = int(head[0].split()[1])
+    fields = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+    return status, {name.lower(): value for name, value in fields.items()}, elapsed
+
+
+async def throughput(port, tokens, clients, requests):
+    samples = defaultdict(list)
+    names = list(ENDPOINTS)
+
+    async def client(worker):
+        for i in range(requests):
+            name = names[(worker + i) % len(names)]
+            path, role = ENDPOINTS[name]
+            auth = {"Authorization": f"Bearer {tokens[role]}"}
+            status, _, elapsed = await http_get(port, path, auth)
+            samples[name].append((elapsed * 1000, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        name: {
+            "requests": len(rows),
+            "rps": len(rows) / elapsed,
+            "latency_ms": percentiles([latency for latency, _ in rows]),
+            "errors": sum(1 for _, status in rows if status != 200),
+        }
+        for name, rows in samples.items()
+    }
+
+
+async def long_polls(port, tokens, count, wait, probes):
+    """Hold ``count`` catalog long-polls open and time ``probes`` catalog GETs."""
+    auth = {"Authorization": f"Bearer {tokens['member']}"}
+    # The ETag covers the full URL, so take it from the long-poll URL itself
+    url = f"/api/books/?wait={wait}"
+    _, headers, _ = await http_get(port, url, auth)
+    polled = {**auth, "If-None-Match": headers["etag"]}
+
+    waiting = [asyncio.create_task(http_get(port, url, polled)) for _ in range(count)]
+    await asyncio.sleep(1)
+
+    timings = []
+    for _ in range(probes):
+        _, _, elapsed = await http_get(port, "/api/books/", auth)
+        timings.append(elapsed * 1000)
+
+    held = sum(1 for task in waiting if not task.done())
+    results = await asyncio.gather(*waiting, return_exceptions=True)
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    return {
+        "long_polls": count,
+        "held_during_probes": held,
+        "failed": failed,
+        "probe_latency_ms": percentiles(timings),
+    }
+
+
+def start_child(kind, db_path):
+    child = subprocess.Popen(
+        [sys.executable, __file__, "--serve", kind, "--db", db_path],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return child, int(child.stdout.readline())
+
+
+async def wait_until_up(port):
+    for _ in range(100):
+        try:
+            await http_get(port, "/api/books/", {})
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def main():
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.db)
+
+    db_path = setup_django()
+    print(
+        f"Seeding {args.users:,} users, {args.books:,} books, {args.borrows:,} borrows..."
+    )
+    seed_library(users=args.users, books=args.books, borrows=args.borrows)
+
+    from auth_api.tokens import LibraryRefreshToken
+    from library_api.models import User
+
+    admin = User.objects.create_user(
+        username="bench-admin", password="benchmark", role=User.RoleChoices.ADMIN
+    )
+    member = User.objects.filter(role=User.RoleChoices.MEMBER).first()
+    tokens = {
+        role: str(LibraryRefreshToken.for_user(user).access_token)
+        for role, user in (("admin", admin), ("member", member))
+    }
+
+    results = {}
+    for kind in args.servers.split(","):
+        child, port = start_child(kind, db_path)
+        try:
+            asyncio.run(wait_until_up(port))
+            results[kind] = {
+                "endpoints": asyncio.run(
+                    throughput(port, tokens, args.clients, args.requests)
+                )
+            }
+            if kind == "asgi" and args.long_polls:
+                results[kind]["long_polls"] = asyncio.run(
+                    long_polls(port, tokens, args.long_polls, args.wait, 50)
+                )
+        finally:
+            child.terminate()
+            child.wait()
+
+    print(
+        f"{'server':<7}{'endpoint':<10}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    for kind, result in results.items():
+        for name, row in result["endpoints"].items():
+            latency = row["latency_ms"]
+            print(
+                f"{kind:<7}{name:<10}{row['rps']:>9.1f}{latency['p50']:>9.2f}"
+                f"{latency['p95']:>9.2f}{latency['p99']:>9.2f}"
+            )
+        if "long_polls" in result:
+            polls = result["long_polls"]
+            latency = polls["probe_latency_ms"]
+            print(
+                f"{kind:<7}catalog p50/p95 {latency['p50']:.2f}/{latency['p95']:.2f} ms "
+                f"with {polls['held_during_probes']} of {polls['long_polls']} "
+                f"long-polls held ({polls['failed']} failed)"
+            )
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"args": vars(args), "servers": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_compression.py
+"""Bytes on the wire and CPU time per response for catalogs of 1k to 1M books.
+
+Each response is the whole catalog as one list (objects and
+``?layout=columns``), rendered by DRF's ``JSONRenderer`` and by
+``LibraryJSONRenderer``, then sent as is, gzipped (``GZIP_LEVEL``) or
+brotli-compressed (``BROTLI_QUALITY``) as ``CompressionMiddleware`` would.
+CPU is process time, the best of ``--repeat`` runs.
+
+    python benchmarks/bench_compression.py --sizes 1000,10000,100000,1000000
+"""
+import argparse
+import json
+import time
+
+from common import seed_library, setup_django
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+parser.add_argument("--repeat", type=int, default=3)
+parser.add_argument("--output", help="write the results as JSON to this file")
+
+
+def cpu_ms(func, repeat):
+    """``(result, best process time in ms)`` of calling ``func``."""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        elapsed = (time.process_time() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    setup_django()
+    seed_library(users=10, books=max(sizes), borrows=0)
+
+    from rest_framework.renderers import JSONRenderer
+
+    from library_api.middleware import ENCODERS
+    from library_api.models import Book
+    from library_api.renderers import LibraryJSONRenderer
+    from library_api.rows import row_plan
+    from library_api.serializers import BookSerializer
+
+    plan = row_plan(BookSerializer)
+    renderers = {"drf": JSONRenderer(), "library": LibraryJSONRenderer()}
+    results = []
+    print(
+        f"{'books':>8} {'layout':<8}{'bytes':>12}{'br':>11}{'gzip':>11}"
+        f"{'drf ms':>9}{'library ms':>12}{'br ms':>8}{'gzip ms':>9}"
+    )
+    for size in sizes:
+        rows = list(plan.values_list(Book.objects.order_by("id"))[:size])
+        layouts = {"objects": plan.objects(rows), "columns": plan.columnar(rows)}
+        for layout, data in layouts.items():
+            result = {"books": size, "layout": layout, "render_ms": {}}
+            bodies = set()
+            for name, renderer in renderers.items():
+                body, result["render_ms"][name] = cpu_ms(
+                    lambda: renderer.render(data), args.repeat
+                )
+                bodies.add(body)
+            assert len(bodies) == 1, "renderers disagree"
+
+            result["bytes"] = {"identity": len(body)}
+            result["encode_ms"] = {}
+            for coding, encode in ENCODERS.items():
+                encoded, result["encode_ms"][coding] = cpu_ms(
+                    lambda: encode(body), args.repeat
+                )
+                result["bytes"][coding] = len(encoded)
+            results.append(result)
+
+            sent, render_ms, encode_ms = (
+                result["bytes"],
+                result["render_ms"],
+                result["encode_ms"],
+            )
+            print(
+                f"{size:>8} {layout:<8}{sent['identity']:>12,}"
+                f"{sent.get('br', 0):>11,}{sent['gzip']:>11,}"
+                f"{render_ms['drf']:>9.1f}{render_ms['library']:>12.1f}"
+                f"{encode_ms.get('br', 0):>8.1f}{encode_ms['gzip']:>9.1f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_hashers.py
+"""Logins per second (total and per core) for each password hasher policy
+and each LOGIN_HASH_POOL mode, measured through the login authentication
+backend against a throwaway database.
+
+    python benchmarks/bench_hashers.py --clients 16 --seconds 5
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import setup_django
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--clients", type=int, default=os.cpu_count() * 2)
+parser.add_argument("--seconds", type=float, default=5.0)
+parser.add_argument("--hashers", default="pbkdf2,scrypt,argon2")
+parser.add_argument("--pools", default="inline,thread,process")
+parser.add_argument("--output", help="write the results as JSON to this file")
+
+HASHER_PATHS = {
+    "pbkdf2": "auth_api.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "auth_api.hashers.TunedScryptPasswordHasher",
+    "argon2": "auth_api.hashers.TunedArgon2PasswordHasher",
+}
+
+
+def measure_logins(username, password, clients, seconds):
+    from django.db import connection
+
+    from auth_api.backends import PooledModelBackend
+
+    backend = PooledModelBackend()
+    deadline = time.perf_counter() + seconds
+    counts = []
+    lock = threading.Lock()
+
+    def client():
+        logins = 0
+        try:
+            while time.perf_counter() < deadline:
+                assert backend.authenticate(None, username=username, password=password)
+                logins += 1
+        finally:
+            connection.close()
+        with lock:
+            counts.append(logins)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    args = parser.parse_args()
+    setup_django()
+
+    import auth_api.backends as backends
+    from django.contrib.auth.hashers import get_hasher
+    from django.test.utils import override_settings
+
+    from library_api.models import User
+
+    cores = os.cpu_count()
+    password = "Benchmark-Passw0rd!"
+    results = []
+
+    for name in args.hashers.split(","):
+        others = [path for key, path in HASHER_PATHS.items() if key != name]
+        with override_settings(PASSWORD_HASHERS=[HASHER_PATHS[name], *others]):
+            try:
+                get_hasher().encode(password, get_hasher().salt())
+            except ValueError as exc:
+                print(f"{name}: skipped ({exc})")
+                continue
+
+            username = f"bench-{name}"
+            User.objects.create_user(
+                username=username, email=f"{username}@example.com", password=password
+            )
+
+            for pool in args.pools.split(","):
+                with override_settings(LOGIN_HASH_POOL=pool):
+                    backends._executor = None
+                    rate = measure_logins(
+                        username, password, args.clients, args.seconds
+                    )
+                    if backends._executor is not None:
+                        backends._executor.shutdown()
+                    backends._executor = None
+
+                # Inline hashing runs on the client threads; pools on their workers
+                workers = args.clients if pool == "inline" else cores
+                per_core = rate / min(workers, cores)
+                results.append(
+                    {
+                        "hasher": name,
+                        "pool": pool,
+                        "logins_per_s": rate,
+                        "logins_per_s_per_core": per_core,
+                    }
+                )
+                print(
+                    f"{name:<8}{pool:<9}{rate:>9.1f} logins/s"
+                    f"{per_core:>9.1f} per core"
+                )
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {"args": vars(args), "cores": cores, "results": results}, fh, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_indexes.py
+"""EXPLAIN plans and latencies of the hot Borrow queries with and without
+the indexes declared on ``Borrow.Meta.indexes``. The partial unique index on
+active borrows is a constraint and stays in place for both runs.
+
+    python benchmarks/bench_indexes.py --borrows 1000000
+"""
+import argparse
+import json
+import random
+
+from common import measure, seed_library, setup_django
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--users", type=int, default=10_000)
+parser.add_argument("--books", type=int, default=100_000)
+parser.add_argument("--borrows", type=int, default=1_000_000)
+parser.add_argument("--repeat", type=int, default=200)
+parser.add_argument("--output", help="write the results as JSON to this file")
+
+
+def hot_queries(rng, page_size):
+    from django.db.models import Max, Min
+
+    from library_api.models import Borrow
+    from library_api.views import borrow_list_queryset
+
+    bounds = Borrow.objects.aggregate(
+        min_user=Min("user_id"),
+        max_user=Max("user_id"),
+        min_book=Min("book_id"),
+        max_book=Max("book_id"),
+    )
+
+    def user_id():
+        return rng.randint(bounds["min_user"], bounds["max_user"])
+
+    def book_id():
+        return rng.randint(bounds["min_book"], bounds["max_book"])
+
+    return {
+        "active_borrow_lookup": lambda: Borrow.objects.filter(
+            book_id=book_id(), user_id=user_id(), returned_at=None
+        ),
+        "user_history_page": lambda: borrow_list_queryset(user_id=user_id()).order_by(
+            "-borrowed_at"
+        )[:page_size],
+        "admin_active_page": lambda: borrow_list_queryset(returned_at=None)[:page_size],
+    }
+
+
+def run(queries, repeat):
+    results = {}
+    for name, make_queryset in queries.items():
+        results[name] = {
+            "plan": make_queryset().explain(),
+            "latency_ms": measure(lambda: list(make_queryset()), repeat),
+        }
+    return results
+
+
+def main():
+    args = parser.parse_args()
+    setup_django()
+
+    from django.conf import settings
+    from django.db import connection
+
+    from library_api.models import Borrow
+
+    print(f"Seeding {args.borrows:,} borrows...")
+    seed_library(users=args.users, books=args.books, borrows=args.borrows)
+    queries = hot_queries(random.Random(1), settings.PAGE_SIZE)
+    indexes = Borrow._meta.indexes
+
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.remove_index(Borrow, index)
+    connection.cursor().execute("ANALYZE")
+    before = run(queries, args.repeat)
+
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.add_index(Borrow, index)
+    connection.cursor().execute("ANALYZE")
+    after = run(queries, args.repeat)
+
+    for name in queries:
+        print(f"\n== {name}")
+        for label, result in (("before", before[name]), ("after", after[name])):
+            latency = result["latency_ms"]
+            print(
+                f"{label:>6}: p50 {latency['p50']:.3f} ms  p95 {latency['p95']:.3f} ms"
+                f"  p99 {latency['p99']:.3f} ms"
+            )
+            print("        " + result["plan"].replace("\n", "\n        "))
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {"args": vars(args), "before": before, "after": after}, fh, indent=2
+            )
+
+
+if __name__ == "__main__":
+    main()
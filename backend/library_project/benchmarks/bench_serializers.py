@@ -0,0 +1,92 @@
+# benchmarks/bench_serializers.py
+"""Rows per second for the catalog and borrow list pages, from query to JSON
+bytes: model instances through the DRF serializers and ``JSONRenderer``
+(before), against ``values_list()`` rows through ``rows.RowPlan`` and
+``LibraryJSONRenderer`` (after, ``FAST_LIST_SERIALIZATION``).
+
+    python benchmarks/bench_serializers.py --page-sizes 50,500,5000
+"""
+import argparse
+import json
+import time
+
+from common import seed_library, setup_django
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--books", type=int, default=20_000)
+parser.add_argument("--borrows", type=int, default=50_000)
+parser.add_argument("--page-sizes", default="50,500,5000")
+parser.add_argument("--seconds", type=float, default=2.0)
+parser.add_argument("--output", help="write the results as JSON to this file")
+
+
+def rows_per_second(func, rows, seconds):
+    func()  # warm up
+    runs = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        func()
+        runs += 1
+    return runs * rows / elapsed
+
+
+def paths(serializer_class, queryset, page_size):
+    from rest_framework.renderers import JSONRenderer
+
+    from library_api.renderers import LibraryJSONRenderer
+    from library_api.rows import RowListSerializer, row_plan
+
+    plan = row_plan(serializer_class)
+
+    def before():
+        rows = list(queryset[:page_size])
+        return JSONRenderer().render(serializer_class(rows, many=True).data)
+
+    def after():
+        rows = list(plan.values_list(queryset)[:page_size])
+        return LibraryJSONRenderer().render(RowListSerializer(plan, rows).data)
+
+    assert before() == after(), "fast path output differs"
+    return {"before": before, "after": after}
+
+
+def main():
+    args = parser.parse_args()
+    setup_django()
+    seed_library(users=1_000, books=args.books, borrows=args.borrows)
+
+    from library_api.models import Book
+    from library_api.serializers import BookSerializer, BorrowSerializer
+    from library_api.views import borrow_list_queryset
+
+    lists = {
+        "catalog": (BookSerializer, Book.objects.order_by("id")),
+        # Newest id first rather than a member's history, so the page is a
+        # primary key scan and the time is the serialization's
+        "borrows": (BorrowSerializer, borrow_list_queryset().order_by("-id")),
+    }
+    results = []
+    print(f"{'list':<9}{'rows':>6}{'before':>14}{'after':>14}{'speedup':>9}")
+    for name, (serializer_class, queryset) in lists.items():
+        for page_size in map(int, args.page_sizes.split(",")):
+            funcs = paths(serializer_class, queryset, page_size)
+            rates = {
+                path: rows_per_second(func, page_size, args.seconds)
+                for path, func in funcs.items()
+            }
+            speedup = rates["after"] / rates["before"]
+            results.append(
+                {"list": name, "page_size": page_size, **rates, "speedup": speedup}
+            )
+            print(
+                f"{name:<9}{page_size:>6}{rates['before']:>12.0f}/s"
+                f"{rates['after']:>12.0f}/s{speedup:>8.1f}x"
+            )
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"args": vars(args), "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts.
+
+Each benchmark runs against its own throwaway SQLite database so it never
+touches the development data. Generate migrations first, as in the README:
+
+    python manage.py makemigrations library_api
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None):
+    """Configure Django against ``db_path`` (a temp file by default) and migrate."""
+    if db_path is None:
+        db_path = os.path.join(
+            tempfile.mkdtemp(prefix="library-bench-"), "bench.sqlite3"
+        )
+
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_project.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("JWT_SIGNING_KEY", "benchmark-jwt-signing-key-0123456789")
+    os.environ["DB_ENGINE"] = "django.db.backends.sqlite3"
+    os.environ["DB_NAME"] = str(db_path)
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return db_path
+
+
+def seed_library(users=1_000, books=10_000, borrows=100_000, active_ratio=0.01, seed=0):
+    """Bulk-load users, books and borrows with raw ``executemany`` batches.
+
+    Roughly ``active_ratio`` of the borrows are left open, each on a distinct
+    book so the one-active-borrow-per-member constraint holds. The stats
+    counters are then recounted from the loaded borrows.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from library_api.stats import rebuild_counters
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    adapt = connection.ops.adapt_datetimefield_value
+    password = make_password("benchmark")
+    batch = 50_000
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO custom_user (password, is_superuser, username, first_name,"
+            " last_name, email, is_staff, is_active, date_joined, role, borrow_count)"
+            " VALUES (%s, 0, %s, '', '', %s, 0, 1, %s, 'member', 0)",
+            [
+                (password, f"user{i}", f"user{i}@example.com", adapt(now))
+                for i in range(users)
+            ],
+        )
+        cursor.execute("SELECT MIN(id) FROM custom_user WHERE username = 'user0'")
+        first_user = cursor.fetchone()[0]
+
+        for start in range(0, books, batch):
+            cursor.executemany(
+                "INSERT INTO book (title, author, total_copies, available_copies,"
+                " borrow_count) VALUES (%s, %s, 1, 1, 0)",
+                [
+                    (f"Title {i}", f"Author {i % 5_000}")
+                    for i in range(start, min(start + batch, books))
+                ],
+            )
+        cursor.execute("SELECT MIN(id) FROM book")
+        first_book = cursor.fetchone()[0]
+
+        active = min(int(borrows * active_ratio), books)
+        active_books = rng.sample(range(books), active)
+        for start in range(0, borrows, batch):
+            rows = []
+            for i in range(start, min(start + batch, borrows)):
+                borrowed_at = now - timedelta(minutes=borrows - i)
+                if i < active:
+                    book, returned_at = active_books[i], None
+                else:
+                    book = rng.randrange(books)
+                    returned_at = borrowed_at + timedelta(days=rng.randint(1, 30))
+                rows.append(
+                    (
+                        first_user + rng.randrange(users),
+                        first_book + book,
+                        adapt(borrowed_at),
+                        adapt(returned_at),
+                        adapt(returned_at or borrowed_at),
+                    )
+                )
+            cursor.executemany(
+                "INSERT INTO borrow (user_id, book_id, borrowed_at, returned_at,"
+                " updated_at) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        if active:
+            cursor.execute(
+                "UPDATE book SET available_copies = 0 WHERE id IN"
+                " (SELECT book_id FROM borrow WHERE returned_at IS NULL)"
+            )
+        rebuild_counters()
+        cursor.execute("ANALYZE")
+
+
+def measure(func, repeat):
+    """Run ``func`` ``repeat`` times and return latency percentiles in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentiles(timings)
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    if len(timings) < 2:
+        value = timings[0] if timings else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
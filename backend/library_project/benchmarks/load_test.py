@@ -0,0 +1,306 @@
+# benchmarks/load_test.py
+"""Concurrent load test of the REST API.
+
+Seeds a throwaway database, serves the project from an in-process threaded
+WSGI server and drives the signup → login → catalog → borrow → history →
+return flow from ``--clients`` concurrent workers. Reports p50/p95/p99
+latency, requests per second and DB queries per request for each endpoint:
+
+    python benchmarks/load_test.py --books 100000 --borrows 1000000 \\
+        --clients 16 --iterations 50 --output results/$(git rev-parse --short HEAD).json
+
+Pass ``--url`` to drive an already running server instead (queries per request
+are then not available), and ``--compare`` to print the change against an
+earlier results file.
+
+The in-process server runs with the signup, login and borrow throttles and the
+password hashing cap raised out of the way (``LOAD_TEST_SETTINGS``). A server
+given with ``--url`` keeps its own: requests refused with 429 are retried after
+their ``Retry-After``, and a signup or login that still fails stops the run.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from common import PROJECT_DIR, percentiles, seed_library, setup_django
+
+parser = argparse.ArgumentParser(
+    description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+)
+parser.add_argument("--users", type=int, default=1_000)
+parser.add_argument("--books", type=int, default=10_000)
+parser.add_argument("--borrows", type=int, default=100_000)
+parser.add_argument("--clients", type=int, default=8, help="concurrent workers")
+parser.add_argument("--iterations", type=int, default=20, help="flows per worker")
+parser.add_argument("--url", help="target a running server instead of starting one")
+parser.add_argument("--output", help="write the results as JSON to this file")
+parser.add_argument("--compare", help="earlier results JSON to compare against")
+parser.add_argument(
+    "--max-retries", type=int, default=10, help="retries of a request refused with 429"
+)
+
+# Environment for the in-process server: throttles and caps would otherwise
+# refuse most of the load this generates from one IP
+LOAD_TEST_SETTINGS = {
+    "THROTTLE_LOGIN_RATE": "1000000/s",
+    "THROTTLE_REGISTER_RATE": "1000000/s",
+    "THROTTLE_BORROW_RATE": "1000000/s",
+    "PASSWORD_HASHING_CONCURRENCY": "10000",
+}
+
+
+class FlowError(Exception):
+    """A step the rest of the flow depends on did not succeed."""
+
+
+class QueryCounter:
+    """WSGI wrapper recording DB queries per request, keyed by URL name."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.counts = defaultdict(list)
+
+    def __call__(self, environ, start_response):
+        from django.db import connection
+        from django.urls import Resolver404, resolve
+
+        try:
+            name = resolve(environ["PATH_INFO"]).url_name
+        except Resolver404:
+            name = None
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = self.app(environ, start_response)
+            try:
+                body = b"".join(response)
+            finally:
+                # Fires request_finished, as the real server would
+                response.close()
+        with self.lock:
+            self.counts[name].append(queries)
+        return [body]
+
+
+def start_server():
+    """Serve the project on a free local port from a background thread."""
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    app = QueryCounter(get_wsgi_application())
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+    server.set_app(app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", app
+
+
+class Client:
+    """Minimal JSON client that times every request under an endpoint name."""
+
+    def __init__(self, base_url, record, max_retries=0):
+        self.base_url = base_url.rstrip("/")
+        self.record = record
+        self.max_retries = max_retries
+        self.token = None
+
+    def call(self, endpoint, method, path, payload=None):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers=headers, method=method
+        )
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    status, body = response.status, response.read()
+                    retry_after = None
+            except urllib.error.HTTPError as exc:
+                status, body = exc.code, exc.read()
+                retry_after = exc.headers.get("Retry-After")
+            self.record(endpoint, (time.perf_counter() - start) * 1000, status)
+            if status != 429 or attempt == self.max_retries:
+                break
+            time.sleep(float(retry_after or 1))
+
+        try:
+            return status, json.loads(body) if body else None
+        except ValueError:
+            return status, None
+
+
+def run_flow(client, worker, iterations, book_ids, rng):
+    username = f"load{worker}-{rng.getrandbits(32):x}"
+    password = "Load-test-Passw0rd!"
+    status, body = client.call(
+        "signup",
+        "POST",
+        "/auth/signup/",
+        {
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+        },
+    )
+    if not 200 <= status < 300:
+        raise FlowError(f"signup of {username} failed with {status}: {body}")
+    status, login = client.call(
+        "login", "POST", "/auth/login/", {"username": username, "password": password}
+    )
+    if not 200 <= status < 300:
+        raise FlowError(f"login of {username} failed with {status}: {login}")
+    client.token = login["access"]
+
+    for _ in range(iterations):
+        client.call("catalog", "GET", "/api/books/")
+        book_id = rng.choice(book_ids)
+        status, _ = client.call("borrow", "POST", f"/api/books/{book_id}/borrow/")
+        client.call("history", "GET", "/api/books/history/")
+        if status == 201:
+            client.call("return", "POST", f"/api/books/{book_id}/return/")
+
+
+def summarize(samples, elapsed, query_counts):
+    # Endpoint names used by the flow → URL names counted on the server
+    url_names = {
+        "signup": "auth-signup",
+        "login": "auth-login",
+        "catalog": "user-book-list",
+        "borrow": "user-book-borrow",
+        "history": "user-borrow-history",
+        "return": "user-book-return",
+    }
+    results = {}
+    for endpoint, rows in samples.items():
+        timings = [latency for latency, _ in rows]
+        statuses = defaultdict(int)
+        for _, status in rows:
+            statuses[str(status)] += 1
+        queries = query_counts.get(url_names[endpoint]) if query_counts else None
+        results[endpoint] = {
+            "requests": len(rows),
+            "rps": len(rows) / elapsed,
+            "latency_ms": percentiles(timings),
+            "statuses": dict(statuses),
+            "queries_per_request": sum(queries) / len(queries) if queries else None,
+        }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(
+        f"{'endpoint':<10}{'reqs':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'queries':>9}"
+    )
+    for endpoint, row in results.items():
+        latency = row["latency_ms"]
+        queries = row["queries_per_request"]
+        line = (
+            f"{endpoint:<10}{row['requests']:>7}{row['rps']:>9.1f}"
+            f"{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}"
+            f"{queries if queries is None else round(queries, 1)!s:>9}"
+        )
+        if baseline and endpoint in baseline:
+            before = baseline[endpoint]["latency_ms"]["p95"]
+            line += f"   p95 {((latency['p95'] - before) / before * 100):+.1f}%"
+        print(line)
+
+
+def main():
+    args = parser.parse_args()
+    base_url, app = args.url, None
+
+    if base_url is None:
+        os.environ.update(LOAD_TEST_SETTINGS)
+        setup_django()
+        print(
+            f"Seeding {args.users:,} users, {args.books:,} books, {args.borrows:,} borrows..."
+        )
+        seed_library(users=args.users, books=args.books, borrows=args.borrows)
+        base_url, app = start_server()
+
+        from library_api.models import Book
+
+        book_ids = list(
+            Book.objects.filter(available_copies__gt=0).values_list("id", flat=True)
+        )
+    else:
+        book_ids = list(range(1, args.books + 1))
+
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    def record(endpoint, latency, status):
+        with lock:
+            samples[endpoint].append((latency, status))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        futures = [
+            pool.submit(
+                run_flow,
+                Client(base_url, record, args.max_retries),
+                worker,
+                args.iterations,
+                book_ids,
+                random.Random(worker),
+            )
+            for worker in range(args.clients)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    results = summarize(samples, elapsed, app.counts if app else None)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)["endpoints"]
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {
+                    "revision": git_revision(),
+                    "args": vars(args),
+                    "elapsed_s": elapsed,
+                    "endpoints": results,
+                },
+                fh,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class LibraryApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "library_api"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .metrics import install_query_recorder
+        from .search import install_search_index
+
+        post_migrate.connect(install_search_index, sender=self)
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,42 @@
+# library_api/archive.py
+from django.conf import settings
+from django.db import transaction
+
+from .models import ArchivedBorrow, Borrow
+
+ARCHIVED_FIELDS = (
+    "id",
+    "user_id",
+    "book_id",
+    "borrowed_at",
+    "returned_at",
+    "updated_at",
+)
+
+
+def archive_borrows(returned_before, batch_size=None):
+    """Move borrows returned before ``returned_before`` into ``borrow_archive``.
+
+    Each batch is copied and deleted in its own short transaction, earliest
+    returns first, so the job can be stopped and rerun at any point. Batches
+    are read in the order of the partial ``borrow_returned_idx`` index, so
+    each one reads only its own rows. Returns the number of borrows moved.
+    """
+    batch_size = batch_size or settings.BORROW_ARCHIVE_BATCH_SIZE
+    returned = Borrow.objects.filter(returned_at__lt=returned_before).order_by(
+        "returned_at", "pk"
+    )
+    moved = 0
+
+    while True:
+        with transaction.atomic():
+            # Locked so a concurrent book delete can't detach a row mid-copy
+            rows = list(
+                returned.select_for_update().values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ArchivedBorrow.objects.bulk_create(ArchivedBorrow(**row) for row in rows)
+            Borrow.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        moved += len(rows)
+    return moved
@@ -0,0 +1,200 @@
+# library_api/async_views.py
+"""Async versions of the read-only list views, routed instead of the sync ones
+when ``ASYNC_READ_VIEWS`` is on (the default under ``asgi.py``).
+
+They answer with the same data, headers, cursors and cached pages as their
+sync counterparts in ``views.py``, but never block the event loop: tokens are
+validated inline, and every query goes through the async ORM.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .authentication import LibraryJWTAuthentication
+from .caching import (
+    aborrows_version,
+    acatalog_version,
+    aget_catalog_page,
+    anames_version,
+    aset_catalog_page,
+)
+from .conditional import (
+    AsyncConditionalGetMixin,
+    aqueryset_validators,
+    atiered_validators,
+    make_etag,
+    timestamp_from_ns,
+)
+from .fieldsets import ListRequest
+from .models import Book, Borrow
+from .pagination import BookCursorPagination, TieredCursorPagination
+from .permissions import IsAdmin
+from .serializers import BookSerializer, BorrowSerializer
+from .views import (
+    borrow_history_querysets,
+    borrow_history_tiers,
+    borrow_list_queryset,
+)
+
+
+class AsyncLibraryListView(APIView):
+    """Async counterpart of ``LibraryListAPIView``.
+
+    Dispatches like DRF's ``APIView``: content negotiation, permissions,
+    throttles, exception handling and response finalizing are its own, so
+    errors, headers and renderers match the sync views exactly. Only the
+    token check and the list fetch are awaited instead.
+    """
+
+    authentication_classes = [LibraryJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = None
+    pagination_class = None
+    empty_message = None
+    required_columns = ()
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """``APIView.initial``, with the authentication awaited."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        if self.throttle_classes:
+            # A shared bucket store is a cache round-trip; keep it off the loop
+            await sync_to_async(self.check_throttles, thread_sensitive=False)(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = result
+                return
+        request._authenticator = None
+        request.user = api_settings.UNAUTHENTICATED_USER()
+        request.auth = None
+
+    async def get(self, request, *args, **kwargs):
+        return await self.respond(request)
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    async def respond(self, request):
+        return Response(await self.list(request))
+
+    async def list(self, request):
+        shape = ListRequest(request, self.serializer_class, self.required_columns)
+        queryset = shape.queryset(self.get_queryset(request))
+        paginator = self.pagination_class() if self.pagination_class else None
+        if paginator is not None:
+            rows = await paginator.apaginate_queryset(queryset, request, self)
+        else:
+            rows = [row async for row in queryset]
+
+        first_page = paginator is None or paginator.get_previous_link() is None
+        if not rows and self.empty_message and first_page:
+            return {"message": self.empty_message}
+
+        context = {"request": request, "view": self}
+        data = shape.serializer(rows, context).data
+        if paginator is not None:
+            return paginator.get_paginated_response(data).data
+        return data
+
+
+class AsyncAdminBorrowedBooks(AsyncConditionalGetMixin, AsyncLibraryListView):
+    serializer_class = BorrowSerializer
+    empty_message = "No books are currently borrowed"
+    permission_classes = [IsAdmin]
+
+    def get_queryset(self, request):
+        return borrow_list_queryset(returned_at=None)
+
+    async def aget_validators(self, request):
+        return await aqueryset_validators(
+            request, Borrow.objects.filter(returned_at=None), await anames_version()
+        )
+
+    async def achange_token(self, request):
+        return await aborrows_version(), await anames_version()
+
+
+class AsyncUserBookList(AsyncConditionalGetMixin, AsyncLibraryListView):
+    serializer_class = BookSerializer
+    empty_message = "No books available in the library"
+    pagination_class = BookCursorPagination
+
+    def get_queryset(self, request):
+        return Book.objects.all()
+
+    async def aget_validators(self, request):
+        version = await acatalog_version()
+        return make_etag(request, version), timestamp_from_ns(version)
+
+    async def achange_token(self, request):
+        return await acatalog_version()
+
+    async def list(self, request):
+        # Shares cached pages with the sync UserBookList
+        version = await acatalog_version()
+        data = await aget_catalog_page(request, version)
+        if data is None:
+            data = await aset_catalog_page(
+                request, version, await super().list(request)
+            )
+        return data
+
+
+class AsyncUserBorrowHistory(AsyncConditionalGetMixin, AsyncLibraryListView):
+    serializer_class = BorrowSerializer
+    empty_message = "No borrowing history found"
+    pagination_class = TieredCursorPagination
+    required_columns = (TieredCursorPagination.ordering_field,)
+
+    def get_queryset(self, request):
+        return borrow_history_querysets(request.user.pk)
+
+    async def aget_validators(self, request):
+        return await atiered_validators(
+            request,
+            borrow_history_tiers(request.user.pk),
+            request.user.pk,
+            version=await anames_version(),
+        )
+
+    async def achange_token(self, request):
+        return await aborrows_version(), await anames_version()
@@ -0,0 +1,131 @@
+# library_api/authentication.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+STATELESS = "stateless"
+CACHED = "cached"
+DATABASE = "database"
+
+
+class UserCache:
+    """Small thread-safe LRU of user rows with a per-entry time to live."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (
+                time.monotonic() + settings.JWT_USER_CACHE_TIMEOUT,
+                user,
+            )
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.JWT_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class LibraryJWTAuthentication(JWTAuthentication):
+    """JWT authentication whose user lookup is picked by ``JWT_AUTH_MODE``.
+
+    ``stateless`` (default): ``request.user`` is a ``TokenUser`` built from the
+    token's ``user_id``, ``username`` and ``role`` claims, with no query. Role
+    changes and deactivation take effect when the access token expires.
+    ``cached``: the ``User`` row is loaded through a short-TTL in-process cache.
+    ``database``: the row is loaded on every request.
+    """
+
+    def get_user(self, validated_token):
+        mode = settings.JWT_AUTH_MODE
+        if mode == STATELESS:
+            return JWTStatelessUserAuthentication.get_user(self, validated_token)
+
+        if mode == CACHED:
+            user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+            user = user_cache.get(user_id)
+            if user is None:
+                user = super().get_user(validated_token)
+                user_cache.set(user_id, user)
+            return user
+
+        return super().get_user(validated_token)
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views.
+
+        Token validation is pure CPU work; only a user lookup in ``cached`` or
+        ``database`` mode awaits the (async) ORM.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        mode = settings.JWT_AUTH_MODE
+        if mode == STATELESS:
+            return self.get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id) if mode == CACHED else None
+        if user is None:
+            try:
+                user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            if not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+            if mode == CACHED:
+                user_cache.set(user_id, user)
+        return user
+
+
+def user_reference(user):
+    """A ``User`` usable as a foreign key value, without loading the row."""
+    if isinstance(user, User):
+        return user
+    return User(pk=user.pk, username=user.username, role=user.role)
@@ -0,0 +1,77 @@
+# library_api/bulk.py
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import invalidate_borrows, invalidate_catalog, invalidate_names
+from .models import ArchivedBorrow, Book, Borrow
+from .serializers import copies_update
+
+
+def chunked_ids(queryset, chunk_size):
+    """Yield the primary keys of ``queryset`` in ascending chunks.
+
+    Each chunk is read after the previous one has been written, keyed on the
+    last id seen, so rows that stop matching the filter are never skipped.
+    """
+    last_id = 0
+    while ids := list(
+        queryset.filter(pk__gt=last_id)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:chunk_size]
+    ):
+        yield ids
+        last_id = ids[-1]
+
+
+def bulk_update_books(queryset, changes, chunk_size=None):
+    """Apply ``changes`` to every book in ``queryset``, one ``UPDATE`` per chunk.
+
+    Returns ``(updated, skipped)``. A new ``total_copies`` shifts
+    ``available_copies`` by the same amount; books with more copies on loan
+    than the new total are skipped.
+    """
+    chunk_size = chunk_size or settings.BOOK_BULK_CHUNK_SIZE
+    fits = Q()
+    if "total_copies" in changes:
+        total_copies = changes["total_copies"]
+        changes = {**changes, **copies_update(total_copies)}
+        # On loan (total - available) must not exceed the new total
+        fits = Q(available_copies__gte=F("total_copies") - total_copies)
+
+    updated = skipped = 0
+    for ids in chunked_ids(queryset, chunk_size):
+        with transaction.atomic():
+            count = Book.objects.filter(fits, pk__in=ids).update(**changes)
+            # update() sends no post_save signals
+            invalidate_catalog()
+            if "title" in changes:
+                invalidate_names()
+        updated += count
+        skipped += len(ids) - count
+    return updated, skipped
+
+
+def bulk_delete_books(queryset, chunk_size=None):
+    """Delete every book in ``queryset``, a chunk of ids per transaction.
+
+    ``Borrow.book`` is ``SET_NULL``: the borrow rows (live and archived) are
+    detached with one ``UPDATE`` each first, so the deletion collector finds
+    nothing to cascade and only reads the chunk's books to send their
+    post_delete signals.
+    """
+    chunk_size = chunk_size or settings.BOOK_BULK_CHUNK_SIZE
+    deleted = 0
+    for ids in chunked_ids(queryset, chunk_size):
+        with transaction.atomic():
+            # Bump updated_at so conditional GETs of the borrow lists see it
+            now = timezone.now()
+            for model in (Borrow, ArchivedBorrow):
+                model.objects.filter(book_id__in=ids).update(book=None, updated_at=now)
+            invalidate_borrows()
+            # post_delete invalidates the catalog
+            deleted += (
+                Book.objects.filter(pk__in=ids).delete()[1].get(Book._meta.label, 0)
+            )
+    return deleted
@@ -0,0 +1,109 @@
+# library_api/caching.py
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "catalog:version"
+# Moved by every borrow and return; long polls of the borrow lists wait on it
+# instead of re-running their COUNT/MAX query every LONG_POLL_INTERVAL
+BORROWS_VERSION_KEY = "borrows:version"
+# Moved when a book or member may have been renamed; the borrow lists show
+# titles and usernames their own rows don't carry
+NAMES_VERSION_KEY = "names:version"
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _version(key):
+    """Time of the last change in nanoseconds, used as a version.
+
+    A version lost to eviction is reseeded from the clock, so it never reuses
+    the keys (or ETags) of pages cached before.
+    """
+    return _cache().get_or_set(key, time.time_ns, timeout=None)
+
+
+async def _aversion(key):
+    return await _cache().aget_or_set(key, time.time_ns, timeout=None)
+
+
+def _bump_version(key):
+    cache = _cache()
+    version = max(time.time_ns(), (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+
+
+def _invalidate(key):
+    """Bump ``key`` now, and again once the surrounding transaction commits so
+    a reader racing the write doesn't keep what it read before the commit."""
+    _bump_version(key)
+    transaction.on_commit(lambda: _bump_version(key))
+
+
+def catalog_version():
+    """Time of the last catalog change in nanoseconds, used as its version."""
+    return _version(CATALOG_VERSION_KEY)
+
+
+async def acatalog_version():
+    return await _aversion(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog():
+    """Drop every cached catalog page."""
+    _invalidate(CATALOG_VERSION_KEY)
+
+
+async def aborrows_version():
+    """Time of the last borrow, return or detach, from the cache alone."""
+    return await _aversion(BORROWS_VERSION_KEY)
+
+
+def invalidate_borrows():
+    """Wake the long polls of the borrow lists; call wherever borrows change."""
+    _invalidate(BORROWS_VERSION_KEY)
+
+
+def names_version():
+    """Time of the last book or member rename in nanoseconds."""
+    return _version(NAMES_VERSION_KEY)
+
+
+async def anames_version():
+    return await _aversion(NAMES_VERSION_KEY)
+
+
+def invalidate_names():
+    """Move the borrow list validators; call wherever titles or usernames change."""
+    _invalidate(NAMES_VERSION_KEY)
+
+
+def _page_key(request, version):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"catalog:page:{version}:{url}"
+
+
+def get_catalog_page(request, version):
+    """Return the cached data for this catalog URL at ``version``, or None."""
+    return _cache().get(_page_key(request, version))
+
+
+def set_catalog_page(request, version, data):
+    _cache().set(_page_key(request, version), data, settings.CATALOG_CACHE_TIMEOUT)
+    return data
+
+
+async def aget_catalog_page(request, version):
+    return await _cache().aget(_page_key(request, version))
+
+
+async def aset_catalog_page(request, version, data):
+    await _cache().aset(
+        _page_key(request, version), data, settings.CATALOG_CACHE_TIMEOUT
+    )
+    return data
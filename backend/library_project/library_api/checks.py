@@ -0,0 +1,27 @@
+# library_api/checks.py
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_MEMORY_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+
+
+@register()
+def check_catalog_cache(app_configs, **kwargs):
+    # One process (runserver, a single worker) sees all of its own bumps
+    if settings.DEBUG:
+        return []
+    alias = settings.CATALOG_CACHE_ALIAS
+    backend = settings.CACHES[alias]["BACKEND"]
+    if backend == LOCAL_MEMORY_CACHE:
+        return [
+            Warning(
+                f"The catalog cache {alias!r} uses {backend}, so each process "
+                "keeps its own catalog version; a book change made in one "
+                "worker leaves the others serving stale pages and 304s.",
+                hint="Set CACHE_BACKEND/CACHE_LOCATION (or CATALOG_CACHE_ALIAS) "
+                "to a cache shared by every worker, such as Redis or Memcached, "
+                "or silence this check when running a single process.",
+                id="library_api.W001",
+            )
+        ]
+    return []
@@ -0,0 +1,127 @@
+# library_api/circulation.py
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import invalidate_borrows, invalidate_catalog
+from .models import Book, Borrow
+from .stats import record_borrows, record_returns
+
+BOOK_NOT_FOUND = "Book not found"
+ALREADY_BORROWED = "You have already borrowed this book"
+NOT_AVAILABLE = "Book is not available for borrowing"
+NO_ACTIVE_BORROW = "No active borrow record found for this book"
+
+
+class ClaimContended(Exception):
+    """Some books ran out of copies between reading and claiming them."""
+
+
+def borrow_books(user, book_ids):
+    """Borrow a copy of each of ``book_ids`` for ``user`` in a fixed number of queries.
+
+    Returns ``(borrows, errors)``: the new ``Borrow`` rows and a
+    ``{book_id: message}`` map for the books that could not be borrowed.
+    Copies are claimed with one ``UPDATE ... SET available_copies =
+    available_copies - 1 WHERE id IN (...) AND available_copies > 0`` and
+    recorded with one ``bulk_create``. If another request takes a book's last
+    copy in between, the batch is rolled back and retried book by book.
+    """
+    books = Book.objects.filter(pk__in=book_ids).only("id", "title", "available_copies")
+    books = {book.pk: book for book in books}
+    mine = set(
+        Borrow.objects.filter(
+            book_id__in=book_ids, user_id=user.pk, returned_at=None
+        ).values_list("book_id", flat=True)
+    )
+    candidates = [
+        pk
+        for pk in book_ids
+        if pk in books and pk not in mine and books[pk].available_copies > 0
+    ]
+
+    try:
+        with transaction.atomic():
+            claimed = Book.objects.filter(
+                pk__in=candidates, available_copies__gt=0
+            ).update(
+                available_copies=F("available_copies") - 1,
+                borrow_count=F("borrow_count") + 1,
+            )
+            if claimed != len(candidates):
+                raise ClaimContended
+            borrows = Borrow.objects.bulk_create(
+                Borrow(user=user, book=books[pk]) for pk in candidates
+            )
+            if borrows:
+                record_borrows(user, len(borrows))
+                invalidate_catalog()
+                invalidate_borrows()
+    except (ClaimContended, IntegrityError):
+        borrows = [
+            borrow
+            for borrow in (borrow_book(user, books[pk]) for pk in candidates)
+            if borrow is not None
+        ]
+
+    borrowed = {borrow.book_id for borrow in borrows}
+    errors = {}
+    for pk in book_ids:
+        if pk not in books:
+            errors[pk] = BOOK_NOT_FOUND
+        elif pk in mine:
+            errors[pk] = ALREADY_BORROWED
+        elif pk not in borrowed:
+            errors[pk] = NOT_AVAILABLE
+    return borrows, errors
+
+
+def borrow_book(user, book):
+    """Borrow one copy of a book, or return None if none is left."""
+    try:
+        with transaction.atomic():
+            if not Book.objects.filter(pk=book.pk, available_copies__gt=0).update(
+                available_copies=F("available_copies") - 1,
+                borrow_count=F("borrow_count") + 1,
+            ):
+                return None
+            borrow = Borrow.objects.create(user=user, book=book)
+            record_borrows(user, 1)
+            invalidate_catalog()
+            invalidate_borrows()
+            return borrow
+    except IntegrityError:
+        # The member borrowed a copy in a concurrent request
+        return None
+
+
+def return_books(user, book_ids):
+    """Return ``user``'s active borrows of ``book_ids`` in four queries.
+
+    Locks the active borrows and collects their ids, closes exactly those rows
+    with one ``UPDATE``, reads them back by id, and puts their copies back with
+    one more ``UPDATE``. Returns ``(borrows, errors)`` like ``borrow_books``.
+    """
+    returned_at = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Borrow.objects.select_for_update()
+            .filter(book_id__in=book_ids, user_id=user.pk, returned_at=None)
+            .values_list("pk", flat=True)
+        )
+        Borrow.objects.filter(pk__in=ids).update(
+            returned_at=returned_at, updated_at=returned_at
+        )
+        borrows = list(Borrow.objects.filter(pk__in=ids).select_related("book", "user"))
+        if borrows:
+            # Each member returns at most one copy of a book
+            Book.objects.filter(pk__in=[borrow.book_id for borrow in borrows]).update(
+                available_copies=F("available_copies") + 1
+            )
+            record_returns(user, len(borrows))
+            invalidate_catalog()
+            invalidate_borrows()
+
+    returned = {borrow.book_id for borrow in borrows}
+    errors = {pk: NO_ACTIVE_BORROW for pk in book_ids if pk not in returned}
+    return borrows, errors
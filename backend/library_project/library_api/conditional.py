@@ -0,0 +1,166 @@
+# library_api/conditional.py
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(request, *parts):
+    """Strong ETag over the version ``parts`` and the full request URL."""
+    token = ":".join(str(part) for part in (*parts, request.get_full_path()))
+    return quote_etag(hashlib.md5(token.encode()).hexdigest())
+
+
+def timestamp_from_ns(value):
+    return datetime.fromtimestamp(value / 1e9, tz=timezone.utc)
+
+
+def queryset_validators(request, queryset, *parts):
+    """ETag and Last-Modified for a list from one ``COUNT``/``MAX(updated_at)`` query.
+
+    The count catches rows leaving the list, which a max timestamp alone misses.
+    A filtered list gets no Last-Modified: a row updated out of it (a returned
+    borrow leaving the active ones) takes its ``updated_at`` along, so the max
+    would not move and If-Modified-Since would answer 304 for a changed list.
+    """
+    version = queryset.order_by().aggregate(count=Count("id"), last=Max("updated_at"))
+    return _queryset_validators(request, queryset, version, parts)
+
+
+async def aqueryset_validators(request, queryset, *parts):
+    version = await queryset.order_by().aaggregate(
+        count=Count("id"), last=Max("updated_at")
+    )
+    return _queryset_validators(request, queryset, version, parts)
+
+
+def _queryset_validators(request, queryset, version, parts):
+    etag = make_etag(request, *parts, version["count"], version["last"])
+    return etag, None if queryset.query.has_filters() else version["last"]
+
+
+def tiered_validators(request, querysets, *parts, version=None):
+    """``queryset_validators`` for a list read from several tables.
+
+    ``version``, a cache version in nanoseconds for data the rows show but do
+    not hold (like a joined title), moves both the ETag and Last-Modified.
+    """
+    versions = [
+        queryset.order_by().aggregate(count=Count("id"), last=Max("updated_at"))
+        for queryset in querysets
+    ]
+    return _tiered_validators(request, versions, parts, version)
+
+
+async def atiered_validators(request, querysets, *parts, version=None):
+    versions = [
+        await queryset.order_by().aaggregate(count=Count("id"), last=Max("updated_at"))
+        for queryset in querysets
+    ]
+    return _tiered_validators(request, versions, parts, version)
+
+
+def _tiered_validators(request, versions, parts, version):
+    counts = [tier["count"] for tier in versions]
+    lasts = [tier["last"] for tier in versions]
+    etag = make_etag(request, *parts, *counts, *lasts, version)
+    last_modified = max((last for last in lasts if last), default=None)
+    if last_modified and version is not None:
+        last_modified = max(last_modified, timestamp_from_ns(version))
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Return ``(headers, is_not_modified)`` for the request's conditional headers."""
+    # HTTP dates have one-second resolution
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    headers = {"ETag": etag}
+    if timestamp is not None:
+        headers["Last-Modified"] = http_date(timestamp)
+
+    return headers, bool(
+        get_conditional_response(request, etag=etag, last_modified=timestamp)
+    )
+
+
+def long_poll_wait(request):
+    """Seconds a 304 may be held open waiting for a change (``?wait=``), capped."""
+    try:
+        wait = float(request.GET.get("wait", 0))
+    except ValueError:
+        return 0
+    return min(max(wait, 0), settings.LONG_POLL_MAX_WAIT)
+
+
+class ConditionalGetMixin:
+    """Answer If-None-Match / If-Modified-Since with 304 before building the list.
+
+    Views provide ``get_validators(request)`` returning ``(etag, last_modified)``.
+    """
+
+    def get_validators(self, request):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        headers, unchanged = not_modified(request, *self.get_validators(request))
+        if unchanged:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = super().get(request, *args, **kwargs)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class AsyncConditionalGetMixin:
+    """``ConditionalGetMixin`` for async views, with optional long polling.
+
+    Views provide ``aget_validators(request)``. A request whose validators still
+    match may pass ``?wait=<seconds>``: the response is then held until the
+    list changes or the wait runs out. Every ``LONG_POLL_INTERVAL`` seconds the
+    view's ``achange_token(request)``, a cached version, is read, and the
+    validators are only recomputed once it moves. Each waiting client costs a
+    coroutine and a cache read per interval, not a worker thread or a query.
+    """
+
+    async def aget_validators(self, request):
+        raise NotImplementedError
+
+    async def achange_token(self, request):
+        """A cheap value that moves whenever the list may have changed."""
+        raise NotImplementedError
+
+    async def respond(self, request):
+        wait = long_poll_wait(request)
+        # Read before the validators, so a change in between still wakes the poll
+        token = await self.achange_token(request) if wait else None
+        headers, unchanged = not_modified(request, *await self.aget_validators(request))
+
+        if unchanged:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + wait
+            while unchanged and loop.time() < deadline:
+                await asyncio.sleep(
+                    min(settings.LONG_POLL_INTERVAL, deadline - loop.time())
+                )
+                latest = await self.achange_token(request)
+                if latest == token:
+                    continue
+                token = latest
+                headers, unchanged = not_modified(
+                    request, *await self.aget_validators(request)
+                )
+            if unchanged:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = await super().respond(request)
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -0,0 +1,128 @@
+# library_api/exporters.py
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+
+from .models import ArchivedBorrow, Book, Borrow
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+CONTENT_TYPES = {CSV: "text/csv", NDJSON: "application/x-ndjson"}
+
+# Column name → ORM lookup; names match BookSerializer / BorrowSerializer output
+BORROW_COLUMNS = {
+    "id": "id",
+    "user": "user_id",
+    "book": "book_id",
+    "book_title": "book__title",
+    "username": "user__username",
+    "borrowed_at": "borrowed_at",
+    "returned_at": "returned_at",
+}
+
+EXPORTS = {
+    "books": (
+        Book,
+        {
+            "id": "id",
+            "title": "title",
+            "author": "author",
+            "total_copies": "total_copies",
+            "available_copies": "available_copies",
+        },
+    ),
+    "borrows": (Borrow, BORROW_COLUMNS),
+    "archived_borrows": (ArchivedBorrow, BORROW_COLUMNS),
+}
+
+
+def _format_datetime(value):
+    """ISO 8601 with a ``Z`` suffix for UTC, as DRF's DateTimeField renders it."""
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return _format_datetime(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(table, chunk_size=None):
+    """Yield ``(columns, rows)`` for ``table``, read through a server-side cursor."""
+    model, columns = EXPORTS[table]
+    rows = (
+        model.objects.order_by("id")
+        .values_list(*columns.values())
+        .iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    )
+    return list(columns), rows
+
+
+def _row_encoder(columns, file_format):
+    """``(header, encode)``: the file's first line (or None) and a row encoder."""
+    if file_format == CSV:
+        writer = csv.writer(_Echo())
+
+        def encode(row):
+            return writer.writerow(
+                _format_datetime(value) if isinstance(value, datetime) else value
+                for value in row
+            )
+
+        return writer.writerow(columns), encode
+
+    encoder = json.JSONEncoder(separators=(",", ":"), default=_json_default)
+
+    def encode(row):
+        return encoder.encode(dict(zip(columns, row))) + "\n"
+
+    return None, encode
+
+
+def stream_export(table, file_format, chunk_size=None):
+    """Yield ``table`` encoded as CSV or NDJSON, one chunk of rows per string.
+
+    Rows come off the cursor ``EXPORT_CHUNK_SIZE`` at a time and are written out
+    before the next fetch, so memory stays flat however large the table is.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    columns, rows = export_rows(table, chunk_size)
+    header, encode = _row_encoder(columns, file_format)
+    if header is not None:
+        yield header
+
+    while chunk := list(islice(rows, chunk_size)):
+        yield "".join(encode(row) for row in chunk)
+
+
+async def astream_export(table, file_format, chunk_size=None):
+    """``stream_export`` as an async generator, for responses served over ASGI.
+
+    Django buffers a sync iterator completely before sending it to an ASGI
+    server, so this one fetches each chunk through the async ORM instead,
+    ``EXPORT_CHUNK_SIZE`` rows after the last id sent.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    model, lookups = EXPORTS[table]
+    header, encode = _row_encoder(list(lookups), file_format)
+    if header is not None:
+        yield header
+
+    # Every column map starts with "id", so row[0] is the keyset position
+    rows = model.objects.order_by("id").values_list(*lookups.values())
+    last_id = 0
+    while chunk := [row async for row in rows.filter(id__gt=last_id)[:chunk_size]]:
+        yield "".join(encode(row) for row in chunk)
+        last_id = chunk[-1][0]
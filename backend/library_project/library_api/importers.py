@@ -0,0 +1,125 @@
+# library_api/importers.py
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.parsers import BaseParser
+
+from .caching import invalidate_catalog
+from .models import Book
+from .serializers import BookSerializer
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+FORMAT_EXTENSIONS = {".csv": CSV, ".ndjson": NDJSON, ".jsonl": NDJSON}
+FORMAT_MEDIA_TYPES = {
+    "text/csv": CSV,
+    "application/x-ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+}
+
+# Cap on rows listed in the error report so a bad file can't grow the response
+MAX_REPORTED_ERRORS = 1000
+
+
+class BookImport:
+    """A not-yet-read upload of books in CSV or NDJSON format."""
+
+    def __init__(self, stream, format):
+        self.stream = stream
+        self.format = format
+
+    @classmethod
+    def from_upload(cls, upload):
+        """Build an import from a multipart file, or return None if its type is unknown."""
+        name = (upload.name or "").lower()
+        for extension, format in FORMAT_EXTENSIONS.items():
+            if name.endswith(extension):
+                return cls(upload, format)
+        format = FORMAT_MEDIA_TYPES.get(upload.content_type)
+        return cls(upload, format) if format else None
+
+    def rows(self):
+        """Yield ``(line_number, row)`` pairs; unparseable rows are a ValidationError."""
+        lines = codecs.iterdecode(self.stream, "utf-8-sig")
+        if self.format == CSV:
+            reader = csv.DictReader(lines)
+            for row in reader:
+                # Blank cells mean "use the model default", not an empty value
+                yield reader.line_num, {
+                    key: value for key, value in row.items() if key and value != ""
+                }
+        else:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as exc:
+                    yield line_number, serializers.ValidationError(
+                        {"non_field_errors": [f"Invalid JSON: {exc}"]}
+                    )
+
+
+class StreamingImportParser(BaseParser):
+    """Hand the raw request body to the view unread so it can be streamed."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return BookImport(stream, FORMAT_MEDIA_TYPES[self.media_type])
+
+
+class CSVImportParser(StreamingImportParser):
+    media_type = "text/csv"
+
+
+class NDJSONImportParser(StreamingImportParser):
+    media_type = "application/x-ndjson"
+
+
+def import_books(book_import, chunk_size=None):
+    """Validate and insert books from ``book_import`` one chunk at a time.
+
+    Each chunk is validated row by row and written with a single
+    ``bulk_create`` in its own transaction, so memory use depends on the chunk
+    size rather than the file size. Returns a per-row report.
+    """
+    chunk_size = chunk_size or settings.BOOK_IMPORT_CHUNK_SIZE
+    serializer = BookSerializer()
+    rows = book_import.rows()
+    report = {"created": 0, "failed": 0, "errors": []}
+
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            books = []
+            for line_number, row in chunk:
+                try:
+                    if isinstance(row, serializers.ValidationError):
+                        raise row
+                    if not isinstance(row, dict):
+                        raise serializers.ValidationError(
+                            {"non_field_errors": ["Expected an object."]}
+                        )
+                    books.append(Book(**serializer.run_validation(row)))
+                except serializers.ValidationError as exc:
+                    report["failed"] += 1
+                    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                        report["errors"].append(
+                            {"line": line_number, "errors": exc.detail}
+                        )
+
+            with transaction.atomic():
+                Book.objects.bulk_create(books, batch_size=chunk_size)
+                # bulk_create sends no post_save signals
+                invalidate_catalog()
+            report["created"] += len(books)
+    except (csv.Error, UnicodeDecodeError) as exc:
+        # The rest of the file can't be read; earlier chunks stay committed
+        report["aborted"] = f"Could not read upload: {exc}"
+
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
@@ -0,0 +1,35 @@
+# library_api/management/commands/archive_borrows.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from library_api.archive import archive_borrows
+
+
+class Command(BaseCommand):
+    help = (
+        "Move returned borrows older than --days into the borrow_archive table "
+        "in batches. Meant to run on a schedule, e.g. nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="archive borrows returned more than this many days ago "
+            "(default: BORROW_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = settings.BORROW_ARCHIVE_AFTER_DAYS
+        # Fixed cutoff, so borrows returned mid-run don't keep the loop going
+        cutoff = timezone.now() - timedelta(days=days)
+        moved = archive_borrows(cutoff, options["batch_size"])
+        self.stdout.write(
+            f"Archived {moved} borrows returned before {cutoff:%Y-%m-%d}."
+        )
@@ -0,0 +1,26 @@
+# library_api/management/commands/export_library.py
+from django.core.management.base import BaseCommand
+
+from library_api.exporters import CONTENT_TYPES, EXPORTS, NDJSON, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream the book or borrow table to a file (or stdout) as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=sorted(CONTENT_TYPES), default=NDJSON)
+        parser.add_argument("--output", help="file to write to (default: stdout)")
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        chunks = stream_export(
+            options["table"], options["format"], options["chunk_size"]
+        )
+
+        if options["output"]:
+            with open(options["output"], "w", newline="") as out:
+                out.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
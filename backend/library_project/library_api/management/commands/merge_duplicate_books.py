@@ -0,0 +1,76 @@
+# library_api/management/commands/merge_duplicate_books.py
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Sum
+from django.utils import timezone
+
+from library_api.caching import invalidate_borrows, invalidate_catalog
+from library_api.models import ArchivedBorrow, Book, Borrow
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold books sharing a title and author into one row whose copy counts "
+        "are the sum of theirs, moving their live and archived borrows onto it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="only report the duplicates"
+        )
+
+    def handle(self, *args, **options):
+        groups = (
+            Book.objects.values("title", "author")
+            .annotate(rows=Count("id"), keep=Min("id"))
+            .filter(rows__gt=1)
+            .order_by("keep")
+        )
+        merged = removed = skipped = 0
+
+        for group in groups:
+            if options["dry_run"]:
+                self.stdout.write(
+                    f"{group['title']!r} by {group['author']!r}: {group['rows']} rows"
+                )
+                continue
+            duplicates = Book.objects.filter(
+                title=group["title"], author=group["author"]
+            ).exclude(pk=group["keep"])
+            try:
+                # One transaction per title, so a failure leaves it untouched
+                with transaction.atomic():
+                    counts = duplicates.aggregate(
+                        total=Sum("total_copies"),
+                        available=Sum("available_copies"),
+                        borrows=Sum("borrow_count"),
+                    )
+                    # Live and archived history both follow the kept row
+                    now = timezone.now()
+                    for model in (Borrow, ArchivedBorrow):
+                        model.objects.filter(book__in=duplicates).update(
+                            book_id=group["keep"], updated_at=now
+                        )
+                    Book.objects.filter(pk=group["keep"]).update(
+                        total_copies=F("total_copies") + counts["total"],
+                        available_copies=F("available_copies") + counts["available"],
+                        borrow_count=F("borrow_count") + counts["borrows"],
+                    )
+                    removed += duplicates.delete()[1].get(Book._meta.label, 0)
+            except IntegrityError:
+                # A member has an active borrow on two of the rows
+                skipped += 1
+                self.stderr.write(
+                    f"Skipped {group['title']!r} by {group['author']!r}: "
+                    "a member is borrowing more than one of its copies."
+                )
+                continue
+            merged += 1
+
+        if merged:
+            invalidate_catalog()
+            invalidate_borrows()
+        self.stdout.write(
+            f"Merged {merged} titles, removed {removed} duplicate rows, "
+            f"skipped {skipped}."
+        )
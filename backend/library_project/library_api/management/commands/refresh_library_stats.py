@@ -0,0 +1,28 @@
+# library_api/management/commands/refresh_library_stats.py
+from django.core.management.base import BaseCommand
+
+from library_api.stats import rebuild_counters, refresh_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the admin stats summary (overdue borrows, titles, copies, "
+        "members). Meant to run on a schedule, e.g. every 15 minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild-counters",
+            action="store_true",
+            help="also recount the borrow counters from the borrow table",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild_counters"]:
+            rebuild_counters()
+            self.stdout.write("Rebuilt borrow counters.")
+        summary = refresh_summary()
+        self.stdout.write(
+            f"Refreshed stats: {summary.overdue_borrows} overdue borrows, "
+            f"{summary.titles} titles, {summary.members} members."
+        )
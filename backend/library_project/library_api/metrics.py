@@ -0,0 +1,299 @@
+# library_api/metrics.py
+"""Per-process request metrics, exposed in the Prometheus text format.
+
+``RequestMetricsMiddleware`` (middleware.py) opens a ``RequestStats`` for
+each request in a context variable. Database queries are timed by an execute
+wrapper installed on every connection, and serializer time by
+``TimedSerializerMixin``; both find the current request's stats through the
+context variable, which also follows queries into ``sync_to_async`` threads.
+
+Observations go into per-thread shards, so recording never takes a lock; a
+scrape sums the shards of every live thread and the values left by threads
+that have exited, which are folded into one retired shard as each thread ends.
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.serializers import ListSerializer
+
+_current = ContextVar("request_stats", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Any other method is counted as "other", so clients can't add label values
+METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_time", "serializer_time", "serializing", "sql")
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        # (seconds, sql) of each query, kept only for the slow-request log
+        self.sql = [] if capture_sql else None
+
+
+def start_request(capture_sql=False):
+    """Begin collecting stats for the current request; returns ``(stats, token)``."""
+    stats = RequestStats(capture_sql)
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper adding each query to the current request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.queries += 1
+        stats.query_time += elapsed
+        if stats.sql is not None and len(stats.sql) < settings.SLOW_REQUEST_MAX_SQL:
+            stats.sql.append((elapsed, sql))
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver: time every query on the new connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializer_timer():
+    stats = _current.get()
+    # Only the outermost serializer is timed; nested ones are part of it
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - start
+        stats.serializing = False
+
+
+class TimedSerializerMixin:
+    """Adds the time spent building ``serializer.data`` to the request's metrics.
+
+    List serializers pick it up through ``Meta.list_serializer_class =
+    TimedListSerializer``.
+    """
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
+
+
+class _ShardOwner:
+    """Kept in a thread's locals only, so it is collected when the thread exits."""
+
+
+def _add_shard(totals, shard):
+    for labels, series in shard.copy().items():
+        series = list(series)
+        if labels in totals:
+            totals[labels] = [a + b for a, b in zip(totals[labels], series)]
+        else:
+            totals[labels] = series
+
+
+class _Metric:
+    """Values kept per thread and per label tuple, summed when scraped."""
+
+    type = None
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._local = threading.local()
+        # Each live shard is written by its thread only; the lock guards the
+        # shard table and the retired totals, not recording
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._retired = {}
+
+    def _series(self, labels):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._new_shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self._new_series()
+        return series
+
+    def _new_shard(self):
+        shard = self._local.shard = {}
+        self._local.owner = owner = _ShardOwner()
+        with self._lock:
+            self._shards[id(shard)] = shard
+        weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        """Fold an exited thread's shard into the retired totals."""
+        with self._lock:
+            del self._shards[id(shard)]
+            _add_shard(self._retired, shard)
+
+    def collect(self):
+        """Return ``{labels: values}`` summed over every thread's shard."""
+        totals = {}
+        with self._lock:
+            for shard in (self._retired, *self._shards.values()):
+                _add_shard(totals, shard)
+        return totals
+
+    def _label_text(self, labels, extra=()):
+        pairs = [*zip(self.labels, labels), *extra]
+        if not pairs:
+            return ""
+        return "{%s}" % ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+    def exposition(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for labels, series in sorted(self.collect().items()):
+            lines.extend(self._sample_lines(labels, series))
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_series(self):
+        return [0]
+
+    def inc(self, labels, amount=1):
+        self._series(labels)[0] += amount
+
+    def _sample_lines(self, labels, series):
+        yield f"{self.name}{self._label_text(labels)} {_number(series[0])}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels, buckets):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def _new_series(self):
+        # One count per bucket, one for +Inf, then the sum
+        return [0] * (len(self.buckets) + 2)
+
+    def observe(self, labels, value):
+        series = self._series(labels)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _sample_lines(self, labels, series):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), series):
+            cumulative += count
+            le = bound if bound == "+Inf" else _number(bound)
+            text = self._label_text(labels, [("le", le)])
+            yield f"{self.name}_bucket{text} {cumulative}"
+        text = self._label_text(labels)
+        yield f"{self.name}_sum{text} {_number(series[-1])}"
+        yield f"{self.name}_count{text} {cumulative}"
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REQUEST_LABELS = ("view", "method")
+
+REQUESTS = Counter(
+    "library_requests_total",
+    "Requests handled, by URL name, method and status code.",
+    ("view", "method", "status"),
+)
+REQUEST_DURATION = Histogram(
+    "library_request_duration_seconds",
+    "Wall time from the first middleware to the response.",
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "library_request_db_queries",
+    "Database queries run per request.",
+    REQUEST_LABELS,
+    QUERY_BUCKETS,
+)
+DB_DURATION = Histogram(
+    "library_request_db_duration_seconds",
+    "Time spent in database queries per request.",
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+SERIALIZER_DURATION = Histogram(
+    "library_request_serializer_duration_seconds",
+    "Time spent building serializer data per request.",
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "library_response_size_bytes",
+    "Response body bytes as sent, after compression (not for streamed responses).",
+    REQUEST_LABELS,
+    SIZE_BUCKETS,
+)
+METRICS = (
+    REQUESTS,
+    REQUEST_DURATION,
+    DB_QUERIES,
+    DB_DURATION,
+    SERIALIZER_DURATION,
+    RESPONSE_SIZE,
+)
+
+
+def observe_request(view, method, status, duration, stats, size=None):
+    method = method if method in METHODS else "other"
+    labels = (view, method)
+    REQUESTS.inc((view, method, str(status)))
+    REQUEST_DURATION.observe(labels, duration)
+    DB_QUERIES.observe(labels, stats.queries)
+    DB_DURATION.observe(labels, stats.query_time)
+    SERIALIZER_DURATION.observe(labels, stats.serializer_time)
+    if size is not None:
+        RESPONSE_SIZE.observe(labels, size)
+
+
+def render_metrics():
+    """Every metric of this process in the Prometheus text format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.exposition())
+    return "\n".join(lines) + "\n"
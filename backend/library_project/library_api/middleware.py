@@ -0,0 +1,190 @@
+# library_api/middleware.py
+import gzip
+import io
+import logging
+import secrets
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .metrics import end_request, observe_request, start_request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+slow_request_logger = logging.getLogger("library_api.slow_requests")
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, queries, serializer time and response size per URL name.
+
+    Goes first in ``MIDDLEWARE`` so the wall time covers the whole stack.
+    With ``SLOW_REQUEST_THRESHOLD`` set, requests slower than it are logged
+    to ``library_api.slow_requests`` with the SQL they ran.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        stats, token = start_request(settings.SLOW_REQUEST_THRESHOLD is not None)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        stats, token = start_request(settings.SLOW_REQUEST_THRESHOLD is not None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        size = None if response.streaming else len(response.content)
+        observe_request(
+            view, request.method, response.status_code, duration, stats, size
+        )
+
+        threshold = settings.SLOW_REQUEST_THRESHOLD
+        if threshold is not None and duration >= threshold:
+            slow_request_logger.warning(
+                "Slow request: %s %s (%s) took %.1f ms, %d queries in %.1f ms, "
+                "serializer %.1f ms\n%s",
+                request.method,
+                request.get_full_path(),
+                view,
+                duration * 1000,
+                stats.queries,
+                stats.query_time * 1000,
+                stats.serializer_time * 1000,
+                "\n".join(
+                    f"[{elapsed * 1000:.1f} ms] {sql}" for elapsed, sql in stats.sql
+                ),
+            )
+
+
+def _gzip(content, max_random_bytes=None):
+    """gzip at ``GZIP_LEVEL``, padded like ``django.utils.text.compress_string``.
+
+    A random-length file name in the gzip header varies the compressed size,
+    so it can't be used to guess secrets in the body (BREACH).
+    """
+    buf = io.BytesIO()
+    filename = b"a" * secrets.randbelow(max_random_bytes) if max_random_bytes else None
+    with gzip.GzipFile(
+        filename=filename,
+        mode="wb",
+        compresslevel=settings.GZIP_LEVEL,
+        fileobj=buf,
+        mtime=0,
+    ) as zfile:
+        zfile.write(content)
+    return buf.getvalue()
+
+
+def _brotli(content, max_random_bytes=None):
+    # The brotli format has no header field to pad; see COMPRESSION_EXCLUDED_VIEWS
+    return brotli.compress(content, quality=settings.BROTLI_QUALITY)
+
+
+# In order of preference when the client accepts several equally
+ENCODERS = {"br": _brotli, "gzip": _gzip} if brotli else {"gzip": _gzip}
+
+
+def accepted_encodings(header):
+    """``Accept-Encoding`` as ``{coding: q}``."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header):
+    """The preferred coding in ``ENCODERS`` the client accepts, or None."""
+    accepted = accepted_encodings(header)
+    default = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in ENCODERS:
+        q = accepted.get(coding, default)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Django's ``GZipMiddleware`` with brotli and a size threshold.
+
+    Compresses responses of ``COMPRESSION_MIN_SIZE`` bytes or more with brotli
+    (when the ``brotli`` package is installed) or gzip, whichever the client's
+    ``Accept-Encoding`` prefers; gzip keeps Django's random header padding
+    against BREACH. Smaller bodies are sent as they are: they fit in a packet
+    or two, so compressing them costs more CPU than it saves time on the wire.
+    Streamed responses (the exports) and the views named in
+    ``COMPRESSION_EXCLUDED_VIEWS`` (the token-issuing auth endpoints) are left
+    alone. Goes right after ``RequestMetricsMiddleware``, so the response size
+    metric counts the bytes actually sent.
+    """
+
+    async def __acall__(self, request):
+        # Compression is CPU work; no need for MiddlewareMixin's thread hop
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        match = request.resolver_match
+        if (
+            response.streaming
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+            or response.has_header("Content-Encoding")
+            or (match and match.url_name in settings.COMPRESSION_EXCLUDED_VIEWS)
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        coding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if coding is None:
+            return response
+        compressed = ENCODERS[coding](response.content, self.max_random_bytes)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = coding
+        # The body is no longer byte-for-byte the one the strong ETag named
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -12,21 +12,52 @@ class User(AbstractUser):
     role = models.CharField(
         max_length=10, choices=RoleChoices.choices, default=RoleChoices.MEMBER
     )
+    # Borrows ever made, kept up to date by every borrow (see stats.py)
+    borrow_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "custom_user"
+        indexes = [
+            # Admin stats: most active members
+            models.Index(fields=["-borrow_count", "id"], name="user_borrow_count_idx"),
+        ]
 
     # def __str__(self):
     #     return self.username
 
 
 class Book(models.Model):
+    """A title on the shelves, with a count of its physical copies.
+
+    ``available_copies`` is only ever changed with ``F()`` updates (borrow
+    decrements it, return increments it), so concurrent requests never lose
+    a change; the check constraint keeps it between 0 and ``total_copies``.
+    """
+
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
-    available = models.BooleanField(default=True)
+    total_copies = models.PositiveIntegerField(default=1)
+    available_copies = models.PositiveIntegerField(default=1)
+    # Times any copy was borrowed, bumped by the same UPDATE that claims it
+    borrow_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "book"
+        indexes = [
+            # Admin stats: most borrowed books
+            models.Index(fields=["-borrow_count", "id"], name="book_borrow_count_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(available_copies__gte=0)
+                & models.Q(available_copies__lte=models.F("total_copies")),
+                name="book_available_copies_in_range",
+            ),
+        ]
+
+    @property
+    def available(self):
+        return self.available_copies > 0
 
     # def __str__(self):
     #     return f"{self.title} by {self.author}"
@@ -36,10 +67,93 @@ class Borrow(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     book = models.ForeignKey(Book, on_delete=models.SET_NULL, null=True, blank=True)
     borrowed_at = models.DateTimeField(default=timezone.now)
-    returned_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    returned_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "borrow"
+        indexes = [
+            # UserBorrowHistory: WHERE user_id = ? ORDER BY borrowed_at DESC
+            models.Index(
+                fields=["user", "-borrowed_at"], name="borrow_user_history_idx"
+            ),
+            # archive_borrows: WHERE returned_at < ? ORDER BY returned_at, id
+            models.Index(
+                fields=["returned_at", "id"],
+                condition=models.Q(returned_at__isnull=False),
+                name="borrow_returned_idx",
+            ),
+        ]
+        constraints = [
+            # A member holds at most one copy of a title at a time. This partial
+            # index also serves every "returned_at IS NULL" lookup (active borrows
+            # by book, by book and user, and the admin list of open borrows).
+            models.UniqueConstraint(
+                fields=["book", "user"],
+                condition=models.Q(returned_at__isnull=True),
+                name="unique_active_borrow_per_member",
+            ),
+        ]
 
     # def __str__(self):
     #     return f"{self.user.username} - {self.book.title}"
+
+
+class BorrowCounters(models.Model):
+    """One of ``BORROW_COUNTER_SLOTS`` rows of library-wide borrow totals.
+
+    Every borrow and return moves the row of its member's slot with ``F()``, so
+    concurrent requests by different members rarely wait on the same row; the
+    admin stats sum the rows and never count the borrow table. A slot's
+    ``active_borrows`` may go below zero when it sees returns of borrows
+    counted in another slot (e.g. by the initial count).
+    """
+
+    active_borrows = models.BigIntegerField(default=0)
+    total_borrows = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = "borrow_counters"
+
+
+class StatsSummary(models.Model):
+    """Figures too costly to keep incrementally, recomputed by
+    ``manage.py refresh_library_stats``. Holds a single row."""
+
+    overdue_borrows = models.PositiveIntegerField(default=0)
+    titles = models.PositiveIntegerField(default=0)
+    copies = models.PositiveIntegerField(default=0)
+    members = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "stats_summary"
+
+
+class ArchivedBorrow(models.Model):
+    """A returned borrow moved out of ``borrow`` by ``manage.py archive_borrows``.
+
+    Keeps the ``Borrow`` id and columns, so the hot table only holds active and
+    recently returned loans while history reads both tables.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    book = models.ForeignKey(
+        Book, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    borrowed_at = models.DateTimeField()
+    returned_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "borrow_archive"
+        indexes = [
+            # UserBorrowHistory: WHERE user_id = ? ORDER BY borrowed_at DESC
+            models.Index(
+                fields=["user", "-borrowed_at"], name="archive_user_history_idx"
+            ),
+        ]
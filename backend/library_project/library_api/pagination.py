@@ -0,0 +1,261 @@
+# library_api/pagination.py
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    _reverse_ordering,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class BookCursorPagination(CursorPagination):
+    """Keyset pagination over ``Book.id``.
+
+    Each page is a ``WHERE id > <cursor> ORDER BY id LIMIT n`` range scan on the
+    primary key, so deep pages cost the same as the first one.
+    """
+
+    ordering = "id"
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching the page with the async ORM.
+
+        Mirrors DRF's implementation step for step, so cursors and links are
+        interchangeable with the sync views.
+        """
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip("-")
+            if self.cursor.reverse != order.startswith("-"):
+                queryset = queryset.filter(**{order_attr + "__lt": current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + "__gt": current_position})
+
+        results = [row async for row in queryset[offset : offset + self.page_size + 1]]
+        self.page = results[: self.page_size]
+
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position
+            else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+        return self.page
+
+
+class SearchResultsPagination(BasePagination):
+    """Offset pagination for ranked search results.
+
+    Fetches one row past the page to decide whether there is a next page
+    instead of running a COUNT over every match.
+    """
+
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.MAX_PAGE_SIZE
+    offset_query_param = "offset"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+
+        rows = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[: self.limit]
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(limit, self.max_page_size) if limit > 0 else self.page_size
+
+    def get_offset(self, request):
+        try:
+            return max(int(request.query_params[self.offset_query_param]), 0)
+        except (KeyError, ValueError):
+            return 0
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        url = self.request.build_absolute_uri()
+        offset = self.offset - self.limit
+        if offset <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, offset)
+
+
+class TieredCursorPagination(BasePagination):
+    """Keyset pagination, newest first, over several querysets read as one list.
+
+    ``paginate_queryset`` takes a sequence of querysets over tables with the
+    same columns and ids that are unique across them (``borrow`` and
+    ``borrow_archive``). Every page reads at most ``page_size + 1`` rows from
+    each with a ``(borrowed_at, id) < cursor`` range scan and merges them, so
+    the union is never built or counted in the database.
+    """
+
+    ordering_field = "borrowed_at"
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, querysets, request, view=None):
+        self.start(request)
+        rows = []
+        for queryset in self.page_querysets(querysets):
+            rows.extend(queryset)
+        return self.finish(rows)
+
+    async def apaginate_queryset(self, querysets, request, view=None):
+        self.start(request)
+        rows = []
+        for queryset in self.page_querysets(querysets):
+            rows.extend([row async for row in queryset])
+        return self.finish(rows)
+
+    def start(self, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+
+    def page_querysets(self, querysets):
+        field = self.ordering_field
+        if self.reverse:
+            ordering, lookup = (field, "id"), "gt"
+        else:
+            ordering, lookup = (f"-{field}", "-id"), "lt"
+
+        for queryset in querysets:
+            if self.position is not None:
+                value, pk = self.position
+                queryset = queryset.filter(
+                    Q(**{f"{field}__{lookup}": value})
+                    | Q(**{field: value, f"id__{lookup}": pk})
+                )
+            yield queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def finish(self, rows):
+        rows.sort(key=self.get_position, reverse=not self.reverse)
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        return self.page
+
+    def get_position(self, row):
+        # Model instances or named values_list() rows
+        return getattr(row, self.ordering_field), row.id
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = (datetime.fromisoformat(cursor["t"]), int(cursor["i"]))
+            return position, bool(cursor.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        value, pk = self.get_position(row)
+        cursor = {"t": value.isoformat(), "i": pk}
+        if reverse:
+            cursor["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Walked past the end: start again from the newest rows
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
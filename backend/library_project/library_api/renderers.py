@@ -0,0 +1,39 @@
+# library_api/renderers.py
+"""DRF's ``JSONRenderer`` output, encoded with orjson when it is installed.
+
+orjson writes UTF-8 bytes in one pass, several times faster than ``json.dumps``
+through DRF's encoder class. Anything it does not handle natively (and every
+datetime, so their format stays DRF's) goes through DRF's encoder. Without
+orjson, or for indented (browsable) output, DRF's renderer is used as is.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+)
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+class LibraryJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        # Escaped by DRF too, for JavaScript's sake
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
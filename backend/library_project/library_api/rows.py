@@ -0,0 +1,126 @@
+# library_api/rows.py
+"""Read-only list serialization straight from ``values_list()`` rows.
+
+With ``FAST_LIST_SERIALIZATION`` on, the list views fetch named
+``values_list()`` tuples instead of model instances, and ``RowListSerializer``
+turns each one into the dict the model serializer would have built, without
+DRF's per-row field lookups. The columns and converters for a serializer and
+field selection are worked out once (``row_plan``) and reused.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .metrics import serializer_timer
+
+# Fields whose representation of a column value is the value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    PrimaryKeyRelatedField,
+)
+
+
+class RowPlan:
+    """How to read ``serializer_class``'s ``fields`` from ``values_list()`` rows.
+
+    Each field reads one column, converted by the serializer's
+    ``row_converters`` entry, by its field's ``to_representation``, or not at
+    all for plain values. Like the serializer, fields sourced across a
+    relation are left out of a row when the relation is empty.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class(fields=fields)
+        converters = getattr(serializer_class, "row_converters", {})
+        self.names = []
+        self.columns = ["id"]
+        self.steps = []
+        for field in serializer._readable_fields:
+            name = field.field_name
+            (column,) = serializer_class.columns_for([name])
+            if name in converters:
+                convert = converters[name]
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                convert = None
+            elif isinstance(field, serializers.DateTimeField):
+                convert = field.to_representation
+            else:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} has no row converter"
+                )
+            if column not in self.columns:
+                self.columns.append(column)
+            self.names.append(name)
+            self.steps.append(
+                (name, self.columns.index(column), convert, "." in field.source)
+            )
+        self.plain = not any(convert or omit for _, _, convert, omit in self.steps)
+
+    def values_list(self, queryset, required=()):
+        """``queryset`` (or a tuple of querysets) as rows of this plan's columns."""
+        if isinstance(queryset, tuple):
+            return tuple(self.values_list(tier, required) for tier in queryset)
+        extra = [column for column in required if column not in self.columns]
+        return queryset.values_list(*self.columns, *extra, named=True)
+
+    def objects(self, rows):
+        if self.plain:
+            names = self.names
+            indexes = [index for _, index, _, _ in self.steps]
+            return [dict(zip(names, [row[i] for i in indexes])) for row in rows]
+        steps = self.steps
+        objects = []
+        for row in rows:
+            data = {}
+            for name, index, convert, omit in steps:
+                value = row[index]
+                if value is None:
+                    if omit:
+                        continue
+                elif convert is not None:
+                    value = convert(value)
+                data[name] = value
+            objects.append(data)
+        return objects
+
+    def columnar(self, rows):
+        steps = self.steps
+        return {
+            "columns": list(self.names),
+            "rows": [
+                [
+                    (
+                        row[index]
+                        if convert is None or row[index] is None
+                        else convert(row[index])
+                    )
+                    for _, index, convert, _ in steps
+                ]
+                for row in rows
+            ],
+        }
+
+
+@lru_cache(maxsize=None)
+def row_plan(serializer_class, fields=None):
+    return RowPlan(serializer_class, fields)
+
+
+class RowListSerializer:
+    """Stands in for ``serializer_class(rows, many=True)`` on the fast path."""
+
+    def __init__(self, plan, rows, columnar=False):
+        self.plan = plan
+        self.rows = rows
+        self.columnar = columnar
+
+    @property
+    def data(self):
+        with serializer_timer():
+            if self.columnar:
+                return self.plan.columnar(self.rows)
+            return self.plan.objects(self.rows)
@@ -0,0 +1,129 @@
+# library_api/search.py
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Book
+
+# SQLite: external-content FTS5 table over book(title, author), kept in sync by triggers
+SQLITE_SEARCH_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+        title, author, content='book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_insert AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts(rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_delete AFTER DELETE ON book BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_update AFTER UPDATE OF title, author ON book
+    BEGIN
+        INSERT INTO book_fts(book_fts, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO book_fts(rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+)
+
+# PostgreSQL: expression GIN index; queries must use the exact same expression
+POSTGRES_DOCUMENT = "to_tsvector('english', book.title || ' ' || book.author)"
+POSTGRES_SEARCH_SQL = (
+    f"CREATE INDEX IF NOT EXISTS book_search_gin ON book USING gin (({POSTGRES_DOCUMENT}))",
+)
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def install_search_index(using="default", **kwargs):
+    """Create the full-text index for ``Book`` if the backend supports one.
+
+    Connected to ``post_migrate`` so the index exists wherever the tables do.
+    """
+    connection = connections[using]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_fts'"
+            )
+            created = cursor.fetchone() is None
+            for statement in SQLITE_SEARCH_SQL:
+                cursor.execute(statement)
+            if created:
+                # Index any books that existed before the table did
+                cursor.execute("INSERT INTO book_fts(book_fts) VALUES ('rebuild')")
+        elif connection.vendor == "postgresql":
+            for statement in POSTGRES_SEARCH_SQL:
+                cursor.execute(statement)
+
+
+def fts5_query(query):
+    """Turn free text into an FTS5 prefix query, ignoring FTS5 operators."""
+    return " ".join(f'"{word}"*' for word in WORD_RE.findall(query))
+
+
+def search_books(query, using="default"):
+    """Return a queryset of books matching ``query``, best matches first."""
+    vendor = connections[using].vendor
+    books = Book.objects.using(using)
+
+    if vendor == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return books.none()
+        # FTS5's rank is lower for better matches; the rowid lookup per match
+        # is a seek in the index
+        return (
+            books.filter(
+                pk__in=RawSQL(
+                    "SELECT rowid FROM book_fts WHERE book_fts MATCH %s", [match]
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    "SELECT rank FROM book_fts "
+                    "WHERE book_fts MATCH %s AND book_fts.rowid = book.id",
+                    [match],
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("search_rank", "id")
+        )
+
+    if vendor == "postgresql":
+        ts_query = "plainto_tsquery('english', %s)"
+        return (
+            books.filter(
+                RawSQL(
+                    f"{POSTGRES_DOCUMENT} @@ {ts_query}",
+                    [query],
+                    output_field=BooleanField(),
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"ts_rank({POSTGRES_DOCUMENT}, {ts_query})",
+                    [query],
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "id")
+        )
+
+    # No full-text support on this backend: fall back to a substring scan
+    return books.filter(
+        Q(title__icontains=query) | Q(author__icontains=query)
+    ).order_by("id")
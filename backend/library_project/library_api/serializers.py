@@ -1,7 +1,88 @@
 # library_api/serializers.py
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.utils.serializer_helpers import ReturnDict
+from .caching import invalidate_catalog
+from .metrics import TimedListSerializer, TimedSerializerMixin, serializer_timer
 from .models import User, Book, Borrow
 
+COPIES_ON_LOAN_ERROR = "Cannot have fewer copies than are on loan."
+
+
+def copies_update(total_copies):
+    """``update()`` kwargs setting ``total_copies`` and shifting ``available_copies`` to match.
+
+    The right-hand sides see the row's old values, so concurrent borrows and
+    returns are never overwritten.
+    """
+    return {
+        "total_copies": total_copies,
+        "available_copies": F("available_copies") + total_copies - F("total_copies"),
+    }
+
+
+class SparseFieldsMixin:
+    """Accepts ``fields=`` (names from ``Meta.fields``) and leaves out the rest.
+
+    ``field_columns`` maps the fields that are not a column of the model
+    itself to the columns they read, so the queryset can load only those.
+    """
+
+    field_columns = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def columns_for(cls, fields):
+        return [
+            column for name in fields for column in cls.field_columns.get(name, (name,))
+        ]
+
+
+class ColumnarListSerializer(TimedListSerializer):
+    """Renders a list as ``{"columns": [names], "rows": [[values], ...]}``.
+
+    Each row is built straight from the child's fields, in column order,
+    without an intermediate dict per object.
+    """
+
+    def to_representation(self, data):
+        fields = list(self.child._readable_fields)
+        rows = []
+        for instance in data:
+            row = []
+            for field in fields:
+                try:
+                    attribute = field.get_attribute(instance)
+                except SkipField:
+                    row.append(None)
+                    continue
+                check = (
+                    attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+                )
+                row.append(
+                    None if check is None else field.to_representation(attribute)
+                )
+            rows.append(row)
+        return {"columns": [field.field_name for field in fields], "rows": rows}
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return ReturnDict(
+                serializers.BaseSerializer.data.fget(self), serializer=self
+            )
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,16 +91,121 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
+    available = serializers.BooleanField(read_only=True)
+    field_columns = {"available": ("available_copies",)}
+    # For rows.RowPlan: same as Book.available, from the column
+    row_converters = {"available": lambda available_copies: available_copies > 0}
+
     class Meta:
         model = Book
-        fields = ("id", "title", "author", "available")
-        read_only_fields = ("id",)
+        fields = (
+            "id",
+            "title",
+            "author",
+            "available",
+            "total_copies",
+            "available_copies",
+        )
+        read_only_fields = ("id", "available_copies")
+        list_serializer_class = TimedListSerializer
+
+    def validate(self, attrs):
+        if self.instance is None and not self.partial:
+            # A new title starts with every copy on the shelf
+            attrs["available_copies"] = attrs.get("total_copies", 1)
+        return attrs
+
+    def update(self, instance, validated_data):
+        total_copies = validated_data.pop("total_copies", None)
+        try:
+            with transaction.atomic():
+                if total_copies is not None:
+                    # Shift the shelf count by the change in stock, atomically
+                    Book.objects.filter(pk=instance.pk).update(
+                        **copies_update(total_copies)
+                    )
+                    invalidate_catalog()
+                for attr, value in validated_data.items():
+                    setattr(instance, attr, value)
+                instance.save(update_fields=list(validated_data))
+        except IntegrityError:
+            raise serializers.ValidationError({"total_copies": [COPIES_ON_LOAN_ERROR]})
+        instance.refresh_from_db(fields=["total_copies", "available_copies"])
+        return instance
+
+
+class BookFilterSerializer(serializers.Serializer):
+    """Lookups an admin bulk update or delete may select books by."""
+
+    title = serializers.CharField(required=False)
+    title__icontains = serializers.CharField(required=False)
+    author = serializers.CharField(required=False)
+    author__icontains = serializers.CharField(required=False)
+    available = serializers.BooleanField(required=False)
+
+    def to_internal_value(self, data):
+        # A misspelt lookup must not silently widen a bulk update or delete
+        if isinstance(data, Mapping):
+            unknown = sorted(set(data) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError(
+                    {
+                        key: [f"Unknown filter. Choose from: {', '.join(self.fields)}."]
+                        for key in unknown
+                    }
+                )
+        attrs = super().to_internal_value(data)
+        # "available" means at least one copy is on the shelf
+        available = attrs.pop("available", None)
+        if available is True:
+            attrs["available_copies__gt"] = 0
+        elif available is False:
+            attrs["available_copies"] = 0
+        return attrs
+
+
+class BookSelectionSerializer(serializers.Serializer):
+    """Books picked by ``ids``, ``filter`` or both; never the whole table by accident."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+    filter = BookFilterSerializer(required=False)
 
+    def validate(self, attrs):
+        if not attrs.get("ids") and not attrs.get("filter"):
+            raise serializers.ValidationError(
+                "Select books with 'ids' and/or a non-empty 'filter'."
+            )
+        return attrs
 
-class BorrowSerializer(serializers.ModelSerializer):
+    def get_queryset(self):
+        queryset = Book.objects.filter(**self.validated_data.get("filter", {}))
+        if "ids" in self.validated_data:
+            queryset = queryset.filter(pk__in=self.validated_data["ids"])
+        return queryset
+
+
+class BookBulkUpdateSerializer(BookSelectionSerializer):
+    changes = serializers.DictField()
+
+    def validate_changes(self, value):
+        book = BookSerializer(data=value, partial=True)
+        book.is_valid(raise_exception=True)
+        if not book.validated_data:
+            raise serializers.ValidationError("No changes given.")
+        return book.validated_data
+
+
+class BorrowSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     book_title = serializers.CharField(source="book.title", read_only=True)
     username = serializers.CharField(source="user.username", read_only=True)
+    field_columns = {"book_title": ("book__title",), "username": ("user__username",)}
 
     class Meta:
         model = Borrow
@@ -33,3 +219,18 @@ class BorrowSerializer(serializers.ModelSerializer):
             "returned_at",
         )
         read_only_fields = ("id", "borrowed_at")
+        list_serializer_class = TimedListSerializer
+
+
+class BookIdListSerializer(serializers.Serializer):
+    """A batch of book IDs for the bulk borrow and return endpoints."""
+
+    book_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.MAX_BULK_BOOKS,
+    )
+
+    def validate_book_ids(self, value):
+        # Each book is handled once, in the order given
+        return list(dict.fromkeys(value))
@@ -0,0 +1,23 @@
+# library_api/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .caching import invalidate_catalog, invalidate_names
+from .models import Book, User
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def book_changed(sender, **kwargs):
+    invalidate_catalog()
+    invalidate_names()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    user_cache.evict(instance.pk)
+    # Logins save last_login alone, which the borrow lists don't show
+    if update_fields is None or "username" in update_fields:
+        invalidate_names()
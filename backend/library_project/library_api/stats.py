@@ -0,0 +1,176 @@
+# library_api/stats.py
+"""Borrow statistics for the admin dashboard, read without scanning ``borrow``.
+
+Three kinds of figures feed ``library_stats``:
+
+- running totals spread over ``BORROW_COUNTER_SLOTS`` ``BorrowCounters``
+  rows, one picked by member, moved with ``F()`` updates inside every borrow
+  and return transaction and summed when read;
+- per-book and per-member ``borrow_count`` columns, bumped by the same
+  borrows and read back through indexes for the top lists;
+- a ``StatsSummary`` row for figures that change with the clock (overdue
+  borrows) or are costly to count, rebuilt by ``refresh_library_stats``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    ArchivedBorrow,
+    Book,
+    Borrow,
+    BorrowCounters,
+    StatsSummary,
+    User,
+)
+
+SUMMARY_PK = 1
+
+
+def _slot(user):
+    return user.pk % settings.BORROW_COUNTER_SLOTS + 1
+
+
+def _seed_counters():
+    """Create every slot, with the counts from both tiers in the first one."""
+    counts = Borrow.objects.aggregate(
+        active=Count("pk", filter=Q(returned_at=None)), total=Count("pk")
+    )
+    # Archived borrows are all returned
+    total = counts["total"] + ArchivedBorrow.objects.count()
+    BorrowCounters.objects.bulk_create(
+        [BorrowCounters(pk=1, active_borrows=counts["active"], total_borrows=total)]
+        + [
+            BorrowCounters(pk=slot)
+            for slot in range(2, settings.BORROW_COUNTER_SLOTS + 1)
+        ]
+    )
+
+
+def get_counters():
+    """Return the totals summed over the slots, counting them from ``borrow``
+    the first time."""
+    if not BorrowCounters.objects.exists():
+        try:
+            with transaction.atomic():
+                _seed_counters()
+        except IntegrityError:
+            # Another request seeded them first
+            pass
+    return BorrowCounters.objects.aggregate(
+        active_borrows=Coalesce(Sum("active_borrows"), 0),
+        total_borrows=Coalesce(Sum("total_borrows"), 0),
+    )
+
+
+def _update_counters(slot, **changes):
+    if BorrowCounters.objects.filter(pk=slot).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            if not BorrowCounters.objects.exists():
+                # The count already includes this transaction's borrows and returns
+                _seed_counters()
+                return
+            # A slot added (BORROW_COUNTER_SLOTS raised) since the seeding
+            BorrowCounters.objects.create(pk=slot)
+    except IntegrityError:
+        # Another request created it first
+        pass
+    BorrowCounters.objects.filter(pk=slot).update(**changes)
+
+
+def record_borrows(user, count):
+    """Count ``count`` new borrows by ``user``. Call inside the borrowing
+    transaction; the books' own ``borrow_count`` is bumped by the claim."""
+    if not count:
+        return
+    User.objects.filter(pk=user.pk).update(borrow_count=F("borrow_count") + count)
+    _update_counters(
+        _slot(user),
+        active_borrows=F("active_borrows") + count,
+        total_borrows=F("total_borrows") + count,
+    )
+
+
+def record_returns(user, count):
+    """Count ``count`` returns by ``user``. Call inside the returning transaction."""
+    if count:
+        _update_counters(_slot(user), active_borrows=F("active_borrows") - count)
+
+
+def _borrows_per(field):
+    def count(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(**{field: OuterRef("pk")})
+                .values(field)
+                .annotate(borrows=Count("pk"))
+                .values("borrows")
+            ),
+            0,
+        )
+
+    return count(Borrow) + count(ArchivedBorrow)
+
+
+def rebuild_counters():
+    """Recount every counter from both borrow tiers, e.g. after a data import."""
+    with transaction.atomic():
+        BorrowCounters.objects.all().delete()
+        _seed_counters()
+        Book.objects.update(borrow_count=_borrows_per("book"))
+        User.objects.update(borrow_count=_borrows_per("user"))
+
+
+def refresh_summary(now=None):
+    """Recompute the ``StatsSummary`` row and return it."""
+    now = now or timezone.now()
+    due = now - timedelta(days=settings.LOAN_PERIOD_DAYS)
+    books = Book.objects.aggregate(
+        titles=Count("pk"), copies=Coalesce(Sum("total_copies"), 0)
+    )
+    summary, _ = StatsSummary.objects.update_or_create(
+        pk=SUMMARY_PK,
+        defaults={
+            "overdue_borrows": Borrow.objects.filter(
+                returned_at=None, borrowed_at__lt=due
+            ).count(),
+            "titles": books["titles"],
+            "copies": books["copies"],
+            "members": User.objects.filter(role=User.RoleChoices.MEMBER).count(),
+            "refreshed_at": now,
+        },
+    )
+    return summary
+
+
+def library_stats(top=None):
+    """The admin dashboard figures, in a fixed number of indexed queries."""
+    top = top or settings.STATS_TOP_N
+    counters = get_counters()
+    summary = StatsSummary.objects.filter(pk=SUMMARY_PK).first() or refresh_summary()
+    return {
+        "borrowed_now": counters["active_borrows"],
+        "total_borrows": counters["total_borrows"],
+        "overdue_borrows": summary.overdue_borrows,
+        "titles": summary.titles,
+        "copies": summary.copies,
+        "members": summary.members,
+        "loan_period_days": settings.LOAN_PERIOD_DAYS,
+        "summary_refreshed_at": summary.refreshed_at,
+        "top_books": list(
+            Book.objects.filter(borrow_count__gt=0)
+            .order_by("-borrow_count", "id")
+            .values("id", "title", "author", "borrow_count")[:top]
+        ),
+        "top_members": list(
+            User.objects.filter(borrow_count__gt=0)
+            .order_by("-borrow_count", "id")
+            .values("id", "username", "borrow_count")[:top]
+        ),
+    }
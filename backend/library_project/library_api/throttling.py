@@ -0,0 +1,189 @@
+# library_api/throttling.py
+"""Token-bucket throttles and a concurrency cap for the expensive endpoints.
+
+Rates come from ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`` as ``"N/period"``:
+a bucket holds up to N tokens, refills at N per period and each request takes
+one. Buckets live in ``THROTTLE_STORE``: ``LocalBucketStore`` (per process,
+the default) or ``CacheBucketStore`` (shared through a Django cache), or any
+class with the same ``take`` method.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"10/min"`` → ``(capacity, tokens per second)``."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory, least recently used dropped first."""
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Take a token from ``key``'s bucket; return 0, or seconds until one is free."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > settings.THROTTLE_LOCAL_MAX_KEYS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets shared by every process through ``THROTTLE_CACHE_ALIAS``.
+
+    Stores one timestamp per key (the generic cell rate algorithm's
+    theoretical arrival time), so a bucket is one cache read and one write.
+    Without compare-and-set, requests racing on the same key may both get
+    through; back it with a store that has an atomic script for exact limits.
+    """
+
+    def take(self, key, capacity, rate):
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        now = time.time()
+        interval = 1 / rate
+        arrival = max(cache.get(key, now), now) + interval
+        wait = arrival - now - capacity * interval
+        if wait > 0:
+            return wait
+        cache.set(key, arrival, timeout=math.ceil(arrival - now) + 1)
+        return 0
+
+    def clear(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+
+
+@lru_cache(maxsize=None)
+def bucket_store(path):
+    return import_string(path)()
+
+
+def throttle_store():
+    return bucket_store(settings.THROTTLE_STORE)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token bucket per client, keyed by ``get_cache_key``; set ``scope``."""
+
+    scope = None
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        capacity, tokens_per_second = parse_rate(rate)
+        self.wait_time = throttle_store().take(
+            f"throttle:{self.scope}:{key}", capacity, tokens_per_second
+        )
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per client IP (``X-Forwarded-For`` is trusted up to ``NUM_PROXIES``)."""
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per user, or per IP for anonymous requests."""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class LoginRateThrottle(IPTokenBucketThrottle):
+    scope = "login"
+
+
+class RegisterRateThrottle(IPTokenBucketThrottle):
+    scope = "register"
+
+
+class BorrowRateThrottle(UserTokenBucketThrottle):
+    scope = "borrow"
+
+
+class ConcurrencyLimit:
+    """At most ``limit`` requests in flight in this process; the rest are refused."""
+
+    def __init__(self, limit):
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def acquire(self):
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+
+@lru_cache(maxsize=None)
+def concurrency_limit(scope):
+    return ConcurrencyLimit(settings.CONCURRENCY_LIMITS[scope])
+
+
+class ConcurrencyCapMixin:
+    """Sheds requests to the view with 429 once ``concurrency_scope`` is full.
+
+    Checked after authentication and throttling, so only requests that would
+    run take a slot, and released once the response is finalized. Refused
+    requests are told to retry after ``CONCURRENCY_RETRY_AFTER`` seconds
+    rather than waiting in a queue.
+    """
+
+    concurrency_scope = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        limit = concurrency_limit(self.concurrency_scope)
+        if not limit.acquire():
+            raise Throttled(
+                wait=settings.CONCURRENCY_RETRY_AFTER,
+                detail="Server busy, please retry shortly.",
+            )
+        self.concurrency_slot = limit
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        slot = getattr(self, "concurrency_slot", None)
+        if slot is not None:
+            self.concurrency_slot = None
+            slot.release()
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,15 +1,28 @@
 # library_api/urls.py
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from .views import (
     AdminBookListCreateView,
     AdminBookDetail,
     AdminBorrowedBooks,
+    AdminExport,
+    AdminStats,
     UserBookList,
+    UserBookSearch,
     UserBookBorrow,
     UserBookReturn,
     UserBorrowHistory,
+    UserBulkBorrow,
+    UserBulkReturn,
 )
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncAdminBorrowedBooks as AdminBorrowedBooks,
+        AsyncUserBookList as UserBookList,
+        AsyncUserBorrowHistory as UserBorrowHistory,
+    )
+
 urlpatterns = [
     # Admin Routes
     path(
@@ -23,13 +36,22 @@ urlpatterns = [
         AdminBorrowedBooks.as_view(),
         name="admin-borrowed-books",
     ),  # GET
+    re_path(
+        r"^admin/export/(?P<table>books|borrows|archived_borrows)\.(?P<file_format>ndjson|csv)$",
+        AdminExport.as_view(),
+        name="admin-export",
+    ),  # GET
+    path("admin/stats/", AdminStats.as_view(), name="admin-stats"),  # GET
     # User Routes
     path("books/", UserBookList.as_view(), name="user-book-list"),  # GET
+    path("books/search/", UserBookSearch.as_view(), name="user-book-search"),  # GET
     path(
         "books/<int:pk>/borrow/", UserBookBorrow.as_view(), name="user-book-borrow"
     ),  # POST
     path(
         "books/<int:pk>/return/", UserBookReturn.as_view(), name="user-book-return"
     ),  # POST
+    path("books/borrow/", UserBulkBorrow.as_view(), name="user-bulk-borrow"),  # POST
+    path("books/return/", UserBulkReturn.as_view(), name="user-bulk-return"),  # POST
     path("books/history/", UserBorrowHistory.as_view(), name="user-borrow-history"),
 ]
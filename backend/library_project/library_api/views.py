@@ -1,25 +1,154 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
 from django.utils import timezone
-from .models import Book, Borrow
-from .serializers import BookSerializer, BorrowSerializer
+from .models import ArchivedBorrow, Book, Borrow
+from .serializers import (
+    BookBulkUpdateSerializer,
+    BookIdListSerializer,
+    BookSelectionSerializer,
+    BookSerializer,
+    BorrowSerializer,
+)
+from .bulk import bulk_delete_books, bulk_update_books
 from .permissions import IsAdmin
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import LibraryJWTAuthentication, user_reference
+from .circulation import borrow_books, return_books
+from .caching import (
+    catalog_version,
+    get_catalog_page,
+    invalidate_borrows,
+    invalidate_catalog,
+    names_version,
+    set_catalog_page,
+)
+from .conditional import (
+    ConditionalGetMixin,
+    make_etag,
+    queryset_validators,
+    tiered_validators,
+    timestamp_from_ns,
+)
+from .exporters import CONTENT_TYPES, astream_export, stream_export
+from .fieldsets import ListRequest
+from .importers import BookImport, CSVImportParser, NDJSONImportParser, import_books
+from .metrics import render_metrics
+from .pagination import (
+    BookCursorPagination,
+    SearchResultsPagination,
+    TieredCursorPagination,
+)
+from .search import search_books
+from .stats import library_stats, record_borrows, record_returns
+from .throttling import BorrowRateThrottle
+
+
+# Columns read by BorrowSerializer; joined in one query instead of 2N lookups
+BORROW_LIST_FIELDS = (
+    "id",
+    "user",
+    "book",
+    "borrowed_at",
+    "returned_at",
+    "book__title",
+    "user__username",
+)
+
+
+def borrow_list_queryset(model=Borrow, **filters):
+    return (
+        model.objects.filter(**filters)
+        .select_related("book", "user")
+        .only(*BORROW_LIST_FIELDS)
+    )
+
+
+def borrow_history_querysets(user_id):
+    """A member's borrows in both tiers, for ``TieredCursorPagination`` to merge."""
+    return tuple(
+        borrow_list_queryset(model, user_id=user_id)
+        for model in (Borrow, ArchivedBorrow)
+    )
+
+
+def borrow_history_tiers(user_id):
+    return tuple(
+        model.objects.filter(user_id=user_id) for model in (Borrow, ArchivedBorrow)
+    )
+
+
+class LibraryListMixin:
+    """List action that runs the list query once, over only the columns it needs.
+
+    An empty first page is answered with ``empty_message`` from the rows already
+    fetched, instead of a separate ``exists()`` round-trip before the list.
+    ``?fields=``, ``?layout=columns`` and the fast row path are handled by
+    ``fieldsets.ListRequest``; ``required_columns`` are always loaded for the
+    paginator's ordering.
+    """
+
+    empty_message = None
+    required_columns = ()
+
+    def list(self, request, *args, **kwargs):
+        shape = ListRequest(request, self.get_serializer_class(), self.required_columns)
+        queryset = shape.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        if not rows and self.empty_message and self.is_first_page(page):
+            return Response({"message": self.empty_message}, status=status.HTTP_200_OK)
+
+        serializer = shape.serializer(rows, self.get_serializer_context())
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def is_first_page(self, page):
+        return page is None or self.paginator.get_previous_link() is None
+
+
+class LibraryListAPIView(LibraryListMixin, generics.ListAPIView):
+    pass
 
 
 # Admin Views
-class AdminBookListCreateView(generics.ListCreateAPIView):
-    """GET /admin/books → View all books, POST /admin/books → Add multiple books"""
+class AdminBookListCreateView(LibraryListMixin, generics.ListCreateAPIView):
+    """GET /admin/books → View all books, POST /admin/books → Add multiple books,
+    PATCH /admin/books → Bulk update, DELETE /admin/books → Bulk delete"""
 
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    pagination_class = BookCursorPagination
     permission_classes = [IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
+    parser_classes = [
+        *api_settings.DEFAULT_PARSER_CLASSES,
+        CSVImportParser,
+        NDJSONImportParser,
+    ]
 
     def create(self, request, *args, **kwargs):
         data = request.data
 
+        # Streaming import: raw CSV/NDJSON body or a multipart "file" upload
+        if "file" in request.FILES:
+            data = BookImport.from_upload(request.FILES["file"])
+            if data is None:
+                return Response(
+                    {"error": "Unsupported file type. Upload a .csv or .ndjson file."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        if isinstance(data, BookImport):
+            return self.import_books(data)
+
         if isinstance(data, dict):
             data = [data]
 
@@ -39,12 +168,61 @@ class AdminBookListCreateView(generics.ListCreateAPIView):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    def patch(self, request, *args, **kwargs):
+        serializer = BookBulkUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Invalid data", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        updated, skipped = bulk_update_books(
+            serializer.get_queryset(), serializer.validated_data["changes"]
+        )
+        return Response(
+            {
+                "message": f"{updated} books updated successfully",
+                "updated": updated,
+                # Books left alone because more copies are on loan than requested
+                "skipped": skipped,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def delete(self, request, *args, **kwargs):
+        serializer = BookSelectionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": "Invalid data", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        deleted = bulk_delete_books(serializer.get_queryset())
+        return Response(
+            {"message": f"{deleted} books deleted successfully", "deleted": deleted},
+            status=status.HTTP_200_OK,
+        )
+
+    def import_books(self, book_import):
+        report = import_books(book_import)
+        nothing_imported = not report["created"] and (
+            report["failed"] or "aborted" in report
+        )
+        return Response(
+            {"message": f"{report['created']} books successfully added", **report},
+            status=(
+                status.HTTP_400_BAD_REQUEST
+                if nothing_imported
+                else status.HTTP_201_CREATED
+            ),
+        )
+
 
 class AdminBookDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -68,37 +246,91 @@ class AdminBookDetail(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
-class AdminBorrowedBooks(generics.ListAPIView):
+class AdminBorrowedBooks(ConditionalGetMixin, LibraryListAPIView):
     serializer_class = BorrowSerializer
+    empty_message = "No books are currently borrowed"
     permission_classes = [IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
 
     def get_queryset(self):
-        return Borrow.objects.filter(returned_at=None)
+        return borrow_list_queryset(returned_at=None)
+
+    def get_validators(self, request):
+        return queryset_validators(
+            request, Borrow.objects.filter(returned_at=None), names_version()
+        )
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        if not queryset.exists():
-            return Response(
-                {"message": "No books are currently borrowed"},
-                status=status.HTTP_200_OK,
-            )
-        return super().list(request, *args, **kwargs)
+
+class AdminExport(generics.GenericAPIView):
+    """GET /admin/export/{books|borrows}.{ndjson|csv} → Stream a full table dump"""
+
+    permission_classes = [IsAdmin]
+    authentication_classes = [LibraryJWTAuthentication]
+
+    def get(self, request, table, file_format):
+        # An ASGI server only streams async iterators; sync ones are buffered
+        stream = (
+            astream_export
+            if isinstance(request._request, ASGIRequest)
+            else stream_export
+        )
+        response = StreamingHttpResponse(
+            stream(table, file_format), content_type=CONTENT_TYPES[file_format]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{table}.{file_format}"'
+        )
+        return response
+
+
+class AdminStats(generics.GenericAPIView):
+    """GET /admin/stats/ → Borrowing figures for the admin dashboard"""
+
+    permission_classes = [IsAdmin]
+    authentication_classes = [LibraryJWTAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        return Response(library_stats(), status=status.HTTP_200_OK)
 
 
 # User Views
-class UserBookList(generics.ListAPIView):
+class UserBookList(ConditionalGetMixin, LibraryListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    empty_message = "No books available in the library"
+    pagination_class = BookCursorPagination
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
+
+    def get_validators(self, request):
+        version = catalog_version()
+        return make_etag(request, version), timestamp_from_ns(version)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        if not queryset.exists():
+        # The catalog is the same for every member, so pages are shared in the cache
+        version = catalog_version()
+        data = get_catalog_page(request, version)
+        if data is None:
+            data = set_catalog_page(request, version, super().list(request).data)
+        return Response(data)
+
+
+class UserBookSearch(LibraryListAPIView):
+    """GET /books/search/?q= → Full-text search over title and author"""
+
+    serializer_class = BookSerializer
+    pagination_class = SearchResultsPagination
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [LibraryJWTAuthentication]
+
+    def get_queryset(self):
+        return search_books(self.request.query_params.get("q", "").strip())
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get("q", "").strip():
             return Response(
-                {"message": "No books available in the library"},
-                status=status.HTTP_200_OK,
+                {"error": "Search query 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
         return super().list(request, *args, **kwargs)
 
@@ -107,62 +339,93 @@ class UserBookBorrow(generics.CreateAPIView):
     """POST /books/{id}/borrow → Borrow a book"""
 
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
+    throttle_classes = [BorrowRateThrottle]
 
     def post(self, request, *args, **kwargs):
         try:
-            book = Book.objects.get(pk=kwargs["pk"])
-
-            # ✅ First, check if the user already borrowed this book
-            if Borrow.objects.filter(
-                book=book, user=request.user, returned_at=None
-            ).exists():
-                return Response(
-                    {"error": "You have already borrowed this book"},
-                    status=status.HTTP_400_BAD_REQUEST,
+            with transaction.atomic():
+                # Take a copy off the shelf with a conditional decrement, so
+                # concurrent borrows can never hand out more copies than exist
+                claimed = Book.objects.filter(
+                    pk=kwargs["pk"], available_copies__gt=0
+                ).update(
+                    available_copies=F("available_copies") - 1,
+                    borrow_count=F("borrow_count") + 1,
                 )
+                if claimed:
+                    book = Book.objects.get(pk=kwargs["pk"])
+                    borrow = Borrow.objects.create(
+                        user=user_reference(request.user), book=book
+                    )
+                    record_borrows(request.user, 1)
+                    invalidate_catalog()
+                    invalidate_borrows()
+        except IntegrityError:
+            # The member already has a copy of this book
+            claimed = False
+
+        if not claimed:
+            return self.borrow_refused(request, kwargs["pk"])
 
-            # ✅ Then, check if the book is available
-            if not book.available:
-                return Response(
-                    {"error": "Book is not available for borrowing"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            borrow = Borrow.objects.create(user=request.user, book=book)
-            book.available = False
-            book.save()
+        return Response(
+            {
+                "message": f"You have successfully borrowed '{book.title}'",
+                "borrow_details": BorrowSerializer(borrow).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
 
+    def borrow_refused(self, request, pk):
+        if not Book.objects.filter(pk=pk).exists():
             return Response(
-                {
-                    "message": f"You have successfully borrowed '{book.title}'",
-                    "borrow_details": BorrowSerializer(borrow).data,
-                },
-                status=status.HTTP_201_CREATED,
+                {"error": "Book not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        except Book.DoesNotExist:
+        if Borrow.objects.filter(
+            book_id=pk, user_id=request.user.pk, returned_at=None
+        ).exists():
             return Response(
-                {"error": "Book not found"}, status=status.HTTP_404_NOT_FOUND
+                {"error": "You have already borrowed this book"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        return Response(
+            {"error": "Book is not available for borrowing"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
 
 class UserBookReturn(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
 
     def post(self, request, *args, **kwargs):
         try:
-            borrow = Borrow.objects.get(
-                book_id=kwargs["pk"], user=request.user, returned_at=None
-            )
-
-            borrow.returned_at = timezone.now()
-            borrow.save()
+            with transaction.atomic():
+                borrow = (
+                    Borrow.objects.select_for_update()
+                    .select_related("book")
+                    .get(
+                        book_id=kwargs["pk"], user_id=request.user.pk, returned_at=None
+                    )
+                )
 
-            book = borrow.book
-            book.available = True
-            book.save()
+                # Close the borrow only if no concurrent return got there first
+                returned_at = timezone.now()
+                if not Borrow.objects.filter(pk=borrow.pk, returned_at=None).update(
+                    returned_at=returned_at, updated_at=returned_at
+                ):
+                    raise Borrow.DoesNotExist
+                borrow.returned_at = borrow.updated_at = returned_at
+
+                book = borrow.book
+                Book.objects.filter(pk=book.pk).update(
+                    available_copies=F("available_copies") + 1
+                )
+                record_returns(request.user, 1)
+                invalidate_catalog()
+                invalidate_borrows()
 
             return Response(
                 {
@@ -179,18 +442,109 @@ class UserBookReturn(generics.CreateAPIView):
             )
 
 
-class UserBorrowHistory(generics.ListAPIView):
-    serializer_class = BorrowSerializer
+class BulkCirculationView(generics.GenericAPIView):
+    """Borrow or return a batch of books in a fixed number of queries.
+
+    Takes ``{"book_ids": [...]}`` and answers with one result per book, in
+    request order: ``details`` for the books handled, ``error`` for the rest.
+    """
+
+    serializer_class = BookIdListSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [LibraryJWTAuthentication]
+    action = None
+    success_status = status.HTTP_200_OK
 
-    def get_queryset(self):
-        return Borrow.objects.filter(user=self.request.user)
+    def handle(self, user, book_ids):
+        raise NotImplementedError
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        if not queryset.exists():
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
             return Response(
-                {"message": "No borrowing history found"}, status=status.HTTP_200_OK
+                {"error": "Invalid data", "details": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        return super().list(request, *args, **kwargs)
+
+        book_ids = serializer.validated_data["book_ids"]
+        borrows, errors = self.handle(user_reference(request.user), book_ids)
+        details = {
+            borrow.book_id: data
+            for borrow, data in zip(borrows, BorrowSerializer(borrows, many=True).data)
+        }
+        results = [
+            (
+                {"book": pk, "details": details[pk]}
+                if pk in details
+                else {"book": pk, "error": errors[pk]}
+            )
+            for pk in book_ids
+        ]
+
+        return Response(
+            {
+                "message": f"You have successfully {self.action} "
+                f"{len(borrows)} of {len(book_ids)} books",
+                self.action: len(borrows),
+                "failed": len(errors),
+                "results": results,
+            },
+            status=(self.success_status if borrows else status.HTTP_400_BAD_REQUEST),
+        )
+
+
+class UserBulkBorrow(BulkCirculationView):
+    """POST /books/borrow → Borrow several books at once"""
+
+    action = "borrowed"
+    success_status = status.HTTP_201_CREATED
+    throttle_classes = [BorrowRateThrottle]
+
+    def handle(self, user, book_ids):
+        return borrow_books(user, book_ids)
+
+
+class UserBulkReturn(BulkCirculationView):
+    """POST /books/return → Return several books at once"""
+
+    action = "returned"
+
+    def handle(self, user, book_ids):
+        return return_books(user, book_ids)
+
+
+class UserBorrowHistory(ConditionalGetMixin, LibraryListAPIView):
+    serializer_class = BorrowSerializer
+    empty_message = "No borrowing history found"
+    pagination_class = TieredCursorPagination
+    required_columns = (TieredCursorPagination.ordering_field,)
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [LibraryJWTAuthentication]
+
+    def get_queryset(self):
+        # Recent borrows and archived ones, merged page by page
+        return borrow_history_querysets(self.request.user.pk)
+
+    def get_validators(self, request):
+        return tiered_validators(
+            request,
+            borrow_history_tiers(request.user.pk),
+            request.user.pk,
+            version=names_version(),
+        )
+
+
+def metrics(request):
+    """GET /metrics → This process's request metrics for Prometheus"""
+    token = settings.METRICS_AUTH_TOKEN
+    if token:
+        if not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    elif not settings.METRICS_PUBLIC:
+        # Closed unless a token is configured or the endpoint is made public
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
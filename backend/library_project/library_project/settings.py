@@ -31,11 +31,107 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "library_api.authentication.LibraryJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # Same output as DRF's JSONRenderer, encoded with orjson when installed
+    "DEFAULT_RENDERER_CLASSES": (
+        "library_api.renderers.LibraryJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # Token buckets (library_api/throttling.py): "N/period" allows bursts of N
+    # and refills N per period. Login/register are per IP, borrow per user
+    "DEFAULT_THROTTLE_RATES": {
+        "login": os.getenv("THROTTLE_LOGIN_RATE", "20/min"),
+        "register": os.getenv("THROTTLE_REGISTER_RATE", "10/hour"),
+        "borrow": os.getenv("THROTTLE_BORROW_RATE", "60/min"),
+    },
+    # Trusted reverse proxies in front of the app, for X-Forwarded-For
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES")) if os.getenv("NUM_PROXIES") else None,
+}
+
+# Where throttle buckets live: LocalBucketStore (per process, LRU-bounded to
+# THROTTLE_LOCAL_MAX_KEYS clients) or CacheBucketStore (THROTTLE_CACHE_ALIAS,
+# shared by every process)
+THROTTLE_STORE = os.getenv("THROTTLE_STORE", "library_api.throttling.LocalBucketStore")
+THROTTLE_CACHE_ALIAS = os.getenv("THROTTLE_CACHE_ALIAS", "default")
+THROTTLE_LOCAL_MAX_KEYS = int(os.getenv("THROTTLE_LOCAL_MAX_KEYS", 100000))
+
+# Default page size for paginated endpoints and the upper bound for ``?page_size=``
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+# Most books one bulk borrow / return request may name
+MAX_BULK_BOOKS = int(os.getenv("MAX_BULK_BOOKS", 100))
+
+# Books updated or deleted per statement by the admin bulk PATCH / DELETE
+BOOK_BULK_CHUNK_SIZE = int(os.getenv("BOOK_BULK_CHUNK_SIZE", 1000))
+
+# Rows validated and inserted per transaction by the streaming book import
+BOOK_IMPORT_CHUNK_SIZE = int(os.getenv("BOOK_IMPORT_CHUNK_SIZE", 1000))
+
+# Rows fetched per cursor round-trip by the streaming NDJSON/CSV exports
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Admin stats: days a borrow may stay out before it counts as overdue, and
+# how many books / members the top lists show
+LOAN_PERIOD_DAYS = int(os.getenv("LOAN_PERIOD_DAYS", 14))
+STATS_TOP_N = int(os.getenv("STATS_TOP_N", 10))
+# Rows the running borrow totals are spread over, so borrows and returns by
+# different members rarely update the same row
+BORROW_COUNTER_SLOTS = int(os.getenv("BORROW_COUNTER_SLOTS", 16))
+
+# Returned borrows older than this many days are moved to borrow_archive by
+# manage.py archive_borrows, this many rows per transaction
+BORROW_ARCHIVE_AFTER_DAYS = int(os.getenv("BORROW_ARCHIVE_AFTER_DAYS", 90))
+BORROW_ARCHIVE_BATCH_SIZE = int(os.getenv("BORROW_ARCHIVE_BATCH_SIZE", 5000))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "library-cache"),
+    }
 }
 
+# Route the async read views (catalog, history, borrowed books) instead of the
+# sync ones; asgi.py turns this on. LONG_POLL_* bound ?wait= on those lists
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False") == "True"
+LONG_POLL_MAX_WAIT = float(os.getenv("LONG_POLL_MAX_WAIT", 30))
+LONG_POLL_INTERVAL = float(os.getenv("LONG_POLL_INTERVAL", 1))
+
+# Build the list endpoints' rows from values_list() tuples instead of running
+# each row through the model serializer (library_api/rows.py). Same output
+FAST_LIST_SERIALIZATION = os.getenv("FAST_LIST_SERIALIZATION", "False") == "True"
+
+# Responses of at least COMPRESSION_MIN_SIZE bytes are compressed with brotli
+# (quality BROTLI_QUALITY, if installed) or gzip (GZIP_LEVEL), as negotiated
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+# URL names whose responses are never compressed: they carry tokens next to
+# request data, which is what BREACH-style length attacks need
+COMPRESSION_EXCLUDED_VIEWS = ("auth-login", "auth-token-refresh")
+
+# Request metrics served at /metrics (Prometheus text format), behind a bearer
+# token if METRICS_AUTH_TOKEN is set; without one the endpoint answers 403 unless
+# METRICS_PUBLIC is True. Requests slower than SLOW_REQUEST_THRESHOLD
+# seconds are logged to library_api.slow_requests with up to SLOW_REQUEST_MAX_SQL
+# of their queries; unset (the default) turns the slow-request log off
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN") or None
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "False") == "True"
+SLOW_REQUEST_THRESHOLD = (
+    float(os.getenv("SLOW_REQUEST_THRESHOLD"))
+    if os.getenv("SLOW_REQUEST_THRESHOLD")
+    else None
+)
+SLOW_REQUEST_MAX_SQL = int(os.getenv("SLOW_REQUEST_MAX_SQL", 200))
+
+# Cache alias and lifetime (seconds) for rendered catalog pages
+CATALOG_CACHE_ALIAS = os.getenv("CATALOG_CACHE_ALIAS", "default")
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 300))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=int(os.getenv("ACCESS_TOKEN_LIFETIME", 60))),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=int(os.getenv("REFRESH_TOKEN_LIFETIME", 1))),
@@ -46,9 +142,31 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# How authenticated requests get request.user: "stateless" (from token claims,
+# no query), "cached" (user row through an in-process TTL cache) or "database"
+JWT_AUTH_MODE = os.getenv("JWT_AUTH_MODE", "stateless")
+JWT_USER_CACHE_TIMEOUT = int(os.getenv("JWT_USER_CACHE_TIMEOUT", 30))
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", 10000))
+
+# Cache alias mirroring the blacklisted refresh token ids, so refreshes skip the
+# database. It must be shared by all processes and must not evict entries (e.g.
+# Redis with noeviction): set REVOCATION_CACHE_BACKEND/REVOCATION_CACHE_LOCATION
+# to define it. Unset, every refresh checks the blacklist table instead
+if os.getenv("REVOCATION_CACHE_BACKEND"):
+    CACHES["revocation"] = {
+        "BACKEND": os.getenv("REVOCATION_CACHE_BACKEND"),
+        "LOCATION": os.getenv("REVOCATION_CACHE_LOCATION", ""),
+        "TIMEOUT": None,
+    }
+TOKEN_REVOCATION_CACHE_ALIAS = "revocation" if "revocation" in CACHES else None
+# Expired tokens deleted per transaction by the prune_tokens command
+TOKEN_PRUNE_BATCH_SIZE = int(os.getenv("TOKEN_PRUNE_BATCH_SIZE", 5000))
+
 AUTH_USER_MODEL = "library_api.User"
 
 MIDDLEWARE = [
+    "library_api.middleware.RequestMetricsMiddleware",
+    "library_api.middleware.CompressionMiddleware",
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -87,6 +205,50 @@ DATABASES = {
     }
 }
 
+# Password hashing policy. PASSWORD_HASHER picks the hasher new hashes use; the
+# others stay installed so existing hashes verify and get upgraded on login.
+PASSWORD_HASHING = {
+    "pbkdf2": {"iterations": int(os.getenv("PBKDF2_ITERATIONS", 720000))},
+    "scrypt": {
+        "work_factor": int(os.getenv("SCRYPT_WORK_FACTOR", 2**14)),
+        "block_size": int(os.getenv("SCRYPT_BLOCK_SIZE", 8)),
+        "parallelism": int(os.getenv("SCRYPT_PARALLELISM", 1)),
+    },
+    "argon2": {
+        "time_cost": int(os.getenv("ARGON2_TIME_COST", 2)),
+        "memory_cost": int(os.getenv("ARGON2_MEMORY_COST", 102400)),
+        "parallelism": int(os.getenv("ARGON2_PARALLELISM", 8)),
+    },
+}
+_PASSWORD_HASHERS = {
+    "pbkdf2": "auth_api.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "auth_api.hashers.TunedScryptPasswordHasher",
+    "argon2": "auth_api.hashers.TunedArgon2PasswordHasher",
+}
+_preferred_hasher = os.getenv("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[_preferred_hasher]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != _preferred_hasher
+]
+
+# Where login password checks run: "inline" on the request worker, or a bounded
+# "thread" / "process" pool of LOGIN_HASH_WORKERS (default: one per CPU)
+AUTHENTICATION_BACKENDS = ["auth_api.backends.PooledModelBackend"]
+LOGIN_HASH_POOL = os.getenv("LOGIN_HASH_POOL", "thread")
+LOGIN_HASH_WORKERS = int(os.getenv("LOGIN_HASH_WORKERS", 0))
+
+# Requests allowed in flight per process on each concurrency-capped endpoint
+# group; the rest get 429 with Retry-After: CONCURRENCY_RETRY_AFTER seconds.
+# Signup and login share the password hashing cap (default: two per hash worker)
+CONCURRENCY_LIMITS = {
+    "password_hashing": int(
+        os.getenv(
+            "PASSWORD_HASHING_CONCURRENCY",
+            2 * (LOGIN_HASH_WORKERS or os.cpu_count()),
+        )
+    ),
+}
+CONCURRENCY_RETRY_AFTER = int(os.getenv("CONCURRENCY_RETRY_AFTER", 1))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -2,9 +2,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from library_api.views import metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("library_api.urls")),
     path("auth/", include("auth_api.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -1,10 +1,14 @@
+import importlib
 import os
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.core.management import call_command
+from django.urls import clear_url_caches
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
+from auth_api.tokens import LibraryRefreshToken
+from library_api.throttling import throttle_store
 
 User = get_user_model()
 
@@ -18,6 +22,43 @@ def django_setup():
     django.setup()
 
 
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """Use an on-disk SQLite test database so threaded tests wait on locks.
+
+    The default in-memory shared-cache database fails concurrent writers with
+    "table is locked" instead of honouring the busy timeout like a real file.
+    """
+    db = settings.DATABASES["default"]
+    test_settings = db.setdefault("TEST", {})
+    if db["ENGINE"] == "django.db.backends.sqlite3" and not test_settings.get("NAME"):
+        test_settings["NAME"] = os.path.join(settings.BASE_DIR, "test_db.sqlite3")
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache so cached pages don't leak across tests."""
+    cache.clear()
+    throttle_store().clear()
+
+
+@pytest.fixture(params=["sync", "async"])
+def read_views(request, settings):
+    """Run a test against both the sync and the async (ASGI) list views."""
+    import library_api.urls
+
+    def route(async_views):
+        settings.ASYNC_READ_VIEWS = async_views
+        importlib.reload(library_api.urls)
+        # The root URLconf holds resolvers built from the old module
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    route(request.param == "async")
+    yield request.param
+    route(False)
+
+
 @pytest.fixture
 def api_client():
     """Fixture for Django API test client."""
@@ -51,12 +92,12 @@ def create_member_user(db):
 @pytest.fixture
 def admin_token(create_admin_user):
     """Fixture to generate an admin JWT token."""
-    refresh = RefreshToken.for_user(create_admin_user)
+    refresh = LibraryRefreshToken.for_user(create_admin_user)
     return {"refresh": str(refresh), "access": str(refresh.access_token)}
 
 
 @pytest.fixture
 def member_token(create_member_user):
     """Fixture to generate a member JWT token."""
-    refresh = RefreshToken.for_user(create_member_user)
+    refresh = LibraryRefreshToken.for_user(create_member_user)
     return {"refresh": str(refresh), "access": str(refresh.access_token)}
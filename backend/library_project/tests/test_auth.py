@@ -1,6 +1,22 @@
+import copy
+import importlib.util
+from datetime import timedelta
+
 import pytest
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.utils import timezone
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+from auth_api.backends import hash_executor
+from auth_api.checks import check_password_hasher, check_revocation_cache
+from auth_api.tokens import LibraryRefreshToken
+from library_api.throttling import concurrency_limit
 
 User = get_user_model()
 
@@ -170,6 +186,10 @@ def test_login_member(api_client):
     assert "access" in response.json()
     assert response.json()["role"] == "member"
 
+    access = AccessToken(response.json()["access"])
+    assert access["username"] == "member1"
+    assert access["role"] == "member"
+
 
 @pytest.mark.django_db
 def test_login_admin(api_client):
@@ -215,3 +235,267 @@ def test_login_invalid_user(api_client):
         response_data["error"]["non_field_errors"][0]
         == "Invalid credentials, please try again."
     ), f"Unexpected message: {response_data['error']['non_field_errors']}"
+
+
+def _hashing_policy(settings, **overrides):
+    policy = copy.deepcopy(settings.PASSWORD_HASHING)
+    for name, params in overrides.items():
+        policy[name].update(params)
+    settings.PASSWORD_HASHING = policy
+
+
+def _login(api_client, username, password):
+    return api_client.post(
+        "/auth/login/",
+        data={"username": username, "password": password},
+        format="json",
+    )
+
+
+@pytest.mark.django_db
+def test_login_rehashes_after_work_factor_change(api_client, settings):
+    """Test a stored hash is upgraded on login when the work factor changes"""
+    _hashing_policy(settings, pbkdf2={"iterations": 1000})
+    user = User.objects.create_user(
+        username="rehash", email="rehash@example.com", password="SecurePass123!"
+    )
+    assert "$1000$" in user.password
+
+    _hashing_policy(settings, pbkdf2={"iterations": 2000})
+    response = _login(api_client, "rehash", "SecurePass123!")
+
+    assert response.status_code == status.HTTP_200_OK
+    user.refresh_from_db()
+    assert "$2000$" in user.password
+
+
+@pytest.mark.django_db
+def test_login_migrates_to_preferred_hasher(api_client, settings):
+    """Test switching PASSWORD_HASHER moves users to it as they log in"""
+    _hashing_policy(
+        settings, pbkdf2={"iterations": 1000}, scrypt={"work_factor": 2**10}
+    )
+    user = User.objects.create_user(
+        username="migrate", email="migrate@example.com", password="SecurePass123!"
+    )
+    assert user.password.startswith("pbkdf2_sha256$")
+
+    settings.PASSWORD_HASHERS = [
+        "auth_api.hashers.TunedScryptPasswordHasher",
+        "auth_api.hashers.TunedPBKDF2PasswordHasher",
+    ]
+    response = _login(api_client, "migrate", "SecurePass123!")
+
+    assert response.status_code == status.HTTP_200_OK
+    user.refresh_from_db()
+    assert user.password.startswith("scrypt$")
+    assert _login(api_client, "migrate", "SecurePass123!").status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("pool", ["inline", "thread", "process"])
+def test_login_hash_pool_modes(api_client, settings, pool):
+    """Test login works and rejects bad passwords whichever pool runs the hashing"""
+    settings.LOGIN_HASH_POOL = pool
+    settings.LOGIN_HASH_WORKERS = 1
+    User.objects.create_user(
+        username="pooled", email="pooled@example.com", password="SecurePass123!"
+    )
+
+    assert _login(api_client, "pooled", "SecurePass123!").status_code == 200
+    assert _login(api_client, "pooled", "WrongPass123!").status_code == 400
+    assert _login(api_client, "nobody", "SecurePass123!").status_code == 400
+
+
+def _refresh(api_client, refresh):
+    return api_client.post(
+        "/auth/token/refresh/", data={"refresh": refresh}, format="json"
+    )
+
+
+@pytest.fixture
+def revocation_cache(settings):
+    """A dedicated revocation cache, as a shared one would be configured."""
+    settings.CACHES = {
+        **settings.CACHES,
+        "revocation": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test-revocation",
+        },
+    }
+    settings.TOKEN_REVOCATION_CACHE_ALIAS = "revocation"
+    caches["revocation"].clear()
+    yield caches["revocation"]
+    caches["revocation"].clear()
+
+
+@pytest.mark.django_db
+def test_logout_revokes_refresh_token(
+    api_client, create_member_user, django_assert_num_queries, revocation_cache
+):
+    """Test a logged-out refresh token is refused, checked without DB queries"""
+    refresh = str(LibraryRefreshToken.for_user(create_member_user))
+    other = str(LibraryRefreshToken.for_user(create_member_user))
+
+    response = api_client.post("/auth/logout/", {"refresh": refresh}, format="json")
+    assert response.status_code == status.HTTP_205_RESET_CONTENT
+
+    with django_assert_num_queries(0):
+        assert _refresh(api_client, refresh).status_code == 401
+        response = _refresh(api_client, other)
+    assert response.status_code == status.HTTP_200_OK
+    assert AccessToken(response.json()["access"])["role"] == "member"
+
+    response = api_client.post("/auth/logout/", {"refresh": refresh}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_revocation_set_reloads_after_cache_loss(
+    api_client, create_member_user, revocation_cache
+):
+    """Test blacklisted tokens stay refused when the cache is emptied"""
+    token = LibraryRefreshToken.for_user(create_member_user)
+    token.blacklist()
+
+    revocation_cache.clear()
+
+    assert _refresh(api_client, str(token)).status_code == 401
+
+
+@pytest.mark.django_db
+def test_revocation_without_cache_reads_blacklist(api_client, create_member_user):
+    """Test without a revocation cache, evictions never let a revoked token back in"""
+    refresh = str(LibraryRefreshToken.for_user(create_member_user))
+    api_client.post("/auth/logout/", {"refresh": refresh}, format="json")
+
+    for i in range(400):
+        cache.set(f"unrelated:{i}", i)
+    cache.clear()
+
+    assert _refresh(api_client, refresh).status_code == 401
+
+
+def test_process_local_revocation_cache_is_refused(settings):
+    """Test the system check rejects a per-process revocation cache"""
+    settings.CACHES = {
+        **settings.CACHES,
+        "revocation": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    settings.TOKEN_REVOCATION_CACHE_ALIAS = "revocation"
+
+    assert [error.id for error in check_revocation_cache(None)] == ["auth_api.E001"]
+
+
+def test_process_hash_pool_is_spawned(settings):
+    """Test process-mode hashing never forks the (threaded) server process"""
+    settings.LOGIN_HASH_POOL = "process"
+    settings.LOGIN_HASH_WORKERS = 1
+
+    assert hash_executor()._mp_context.get_start_method() == "spawn"
+
+
+def test_argon2_without_its_package_is_refused(settings, monkeypatch):
+    """Test the system check rejects PASSWORD_HASHER=argon2 without argon2-cffi"""
+    settings.PASSWORD_HASHERS = [
+        "auth_api.hashers.TunedArgon2PasswordHasher",
+        "auth_api.hashers.TunedPBKDF2PasswordHasher",
+    ]
+    assert check_password_hasher(None) == []
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    assert [error.id for error in check_password_hasher(None)] == ["auth_api.E002"]
+
+
+@pytest.mark.django_db
+def test_prune_tokens_deletes_only_expired(create_member_user):
+    """Test prune_tokens removes expired outstanding and blacklisted tokens in batches"""
+    expired = []
+    for _ in range(5):
+        token = LibraryRefreshToken.for_user(create_member_user)
+        token.blacklist()
+        expired.append(token["jti"])
+    OutstandingToken.objects.filter(jti__in=expired).update(
+        expires_at=timezone.now() - timedelta(minutes=1)
+    )
+    live = LibraryRefreshToken.for_user(create_member_user)
+
+    call_command("prune_tokens", batch_size=2)
+
+    assert list(OutstandingToken.objects.values_list("jti", flat=True)) == [live["jti"]]
+    assert not BlacklistedToken.objects.exists()
+
+
+def _throttle_rates(settings, **rates):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            **rates,
+        },
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "store",
+    [
+        "library_api.throttling.LocalBucketStore",
+        "library_api.throttling.CacheBucketStore",
+    ],
+)
+def test_login_throttled_per_ip(api_client, settings, store):
+    """Test logins beyond the bucket get 429 with Retry-After, per client IP"""
+    settings.THROTTLE_STORE = store
+    _throttle_rates(settings, login="3/min")
+    User.objects.create_user(username="limited", password="SecurePass123!")
+
+    statuses = [
+        _login(api_client, "limited", "WrongPass123!").status_code for _ in range(3)
+    ]
+    throttled = _login(api_client, "limited", "SecurePass123!")
+
+    assert statuses == [400, 400, 400]
+    assert throttled.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    # One token refills every 20 seconds
+    assert 0 < int(throttled["Retry-After"]) <= 20
+    other_ip = api_client.post(
+        "/auth/login/",
+        data={"username": "limited", "password": "SecurePass123!"},
+        format="json",
+        REMOTE_ADDR="10.0.0.2",
+    )
+    assert other_ip.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_password_hashing_concurrency_cap(api_client, settings):
+    """Test signup and login shed load with 429 once every hashing slot is busy"""
+    User.objects.create_user(username="capped", password="SecurePass123!")
+    limit = concurrency_limit("password_hashing")
+    held = 0
+    while limit.acquire():
+        held += 1
+    assert held == settings.CONCURRENCY_LIMITS["password_hashing"]
+
+    try:
+        shed = _login(api_client, "capped", "SecurePass123!")
+        signup = api_client.post(
+            "/auth/signup/",
+            data={
+                "username": "newcomer",
+                "email": "newcomer@example.com",
+                "password": "SecurePass123!",
+            },
+            format="json",
+        )
+    finally:
+        for _ in range(held):
+            limit.release()
+
+    assert shed.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert shed["Retry-After"] == str(settings.CONCURRENCY_RETRY_AFTER)
+    assert signup.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    # Slots are handed back after every request, refused or not
+    for _ in range(held + 1):
+        assert _login(api_client, "capped", "SecurePass123!").status_code == 200
@@ -1,5 +1,42 @@
+import asyncio
+import gzip
+import io
+import json
+import secrets
+import threading
+import time
+from datetime import timedelta
+import brotli
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
 from rest_framework import status
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from auth_api.tokens import LibraryRefreshToken
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from library_api.async_views import AsyncUserBookList, AsyncUserBorrowHistory
+from library_api.authentication import user_cache
+from library_api.checks import check_catalog_cache
+from library_api.circulation import borrow_book
+from library_api.models import ArchivedBorrow, Book, Borrow, BorrowCounters
+from library_api.renderers import LibraryJSONRenderer
+from library_api.search import search_books
+from library_api.serializers import BorrowSerializer
+from library_api.metrics import Counter
+from library_api.stats import get_counters
+from library_api.throttling import BorrowRateThrottle
+
+User = get_user_model()
 
 
 # member tests
@@ -30,9 +67,42 @@ def test_browse_books(api_client, member_token, admin_token):
         response.status_code == status.HTTP_200_OK
     ), f"Browse failed: {response.json()}"
     assert isinstance(
-        response.json(), list
+        response.json()["results"], list
     ), f"Unexpected response format: {response.json()}"
-    assert len(response.json()) > 0, "No books found in the response"
+    assert len(response.json()["results"]) > 0, "No books found in the response"
+
+
+@pytest.mark.django_db
+def test_browse_books_cursor_pagination(
+    api_client, member_token, admin_token, read_views
+):
+    """Test walking the catalog page by page with the cursor links."""
+
+    books_data = [
+        {"title": f"Paged Book {i}", "author": "Author", "available": True}
+        for i in range(5)
+    ]
+    api_client.post(
+        "/api/admin/books/",
+        data=books_data,
+        format="json",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+
+    seen = []
+    url = "/api/books/?page_size=2"
+    while url:
+        response = api_client.get(
+            url, headers={"Authorization": f"Bearer {member_token['access']}"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["results"]) <= 2
+        seen.extend(book["id"] for book in page["results"])
+        url = page["next"]
+
+    assert len(seen) == 5
+    assert seen == sorted(seen), "Pages are not ordered by id"
 
 
 @pytest.mark.django_db
@@ -303,3 +373,1774 @@ def test_create_book_invalid(api_client, admin_token):
     assert (
         "author" in response.json()["details"][0]
     ), f"Missing field validation for 'author': {response.json()}"
+
+
+def _borrow_list_query_count(api_client, url, token, borrow_count):
+    """Create ``borrow_count`` active borrows and count the queries run by ``url``."""
+    member = User.objects.get(username="memberuser")
+    books = Book.objects.bulk_create(
+        Book(title=f"Query Book {i}", author="Author", available_copies=0)
+        for i in range(borrow_count)
+    )
+    Borrow.objects.bulk_create(Borrow(user=member, book=book) for book in books)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_200_OK
+    rows = response.json()
+    if isinstance(rows, dict):
+        rows = rows["results"]
+    assert len(rows) == Borrow.objects.count()
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url, token_fixture",
+    [
+        ("/api/admin/borrowed-books/", "admin_token"),
+        ("/api/books/history/", "member_token"),
+    ],
+)
+def test_borrow_list_query_count_is_flat(
+    request, api_client, member_token, url, token_fixture
+):
+    """Test borrow list endpoints don't run extra queries per row."""
+    token = request.getfixturevalue(token_fixture)["access"]
+
+    few = _borrow_list_query_count(api_client, url, token, 2)
+    many = _borrow_list_query_count(api_client, url, token, 10)
+
+    assert few == many, f"Query count grew with rows: {few} -> {many}"
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("copies", [1, 3])
+def test_concurrent_borrow_one_winner_per_copy(api_client, admin_token, copies):
+    """Test many members racing for a book produce exactly one borrow per copy."""
+
+    book = Book.objects.create(
+        title="Contended Book",
+        author="Author",
+        total_copies=copies,
+        available_copies=copies,
+    )
+    tokens = [
+        str(
+            LibraryRefreshToken.for_user(
+                User.objects.create_user(
+                    username=f"racer{i}", email=f"racer{i}@example.com", password="pw"
+                )
+            ).access_token
+        )
+        for i in range(8)
+    ]
+    barrier = threading.Barrier(len(tokens))
+    statuses = []
+
+    def borrow(token):
+        client = APIClient()
+        barrier.wait()
+        try:
+            response = client.post(
+                f"/api/books/{book.id}/borrow/",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=borrow, args=(token,)) for token in tokens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses.count(status.HTTP_201_CREATED) == copies, statuses
+    assert statuses.count(status.HTTP_400_BAD_REQUEST) == len(tokens) - copies
+    assert Borrow.objects.filter(book=book, returned_at=None).count() == copies
+    book.refresh_from_db()
+    assert book.available_copies == 0
+    assert book.available is False
+
+
+@pytest.mark.django_db
+def test_active_borrow_unique_per_member(create_member_user, create_admin_user):
+    """Test the database rejects a member holding two copies of the same book."""
+    book = Book.objects.create(
+        title="Constrained", author="Author", total_copies=2, available_copies=2
+    )
+    Borrow.objects.create(user=create_member_user, book=book)
+    Borrow.objects.create(user=create_admin_user, book=book)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Borrow.objects.create(user=create_member_user, book=book)
+
+    Borrow.objects.filter(user=create_member_user).update(returned_at=timezone.now())
+    Borrow.objects.create(user=create_member_user, book=book)
+
+
+@pytest.mark.django_db
+def test_available_copies_stay_in_range():
+    """Test the database rejects more copies available than owned, or fewer than none."""
+    book = Book.objects.create(title="Counted", author="Author")
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Book.objects.filter(pk=book.pk).update(available_copies=2)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Book.objects.filter(pk=book.pk).update(total_copies=0)
+
+
+@pytest.mark.django_db
+def test_search_books(api_client, member_token):
+    """Test full-text search matches title and author, best match first."""
+    Book.objects.create(title="The Hobbit", author="J. R. R. Tolkien")
+    Book.objects.create(title="Tolkien: A Biography", author="Humphrey Carpenter")
+    Book.objects.create(title="Dune", author="Frank Herbert")
+
+    response = api_client.get(
+        "/api/books/search/?q=tolkien",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.json()
+    titles = [book["title"] for book in response.json()["results"]]
+    assert sorted(titles) == ["The Hobbit", "Tolkien: A Biography"]
+
+    prefix = api_client.get(
+        "/api/books/search/?q=hobb",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+    assert [book["title"] for book in prefix.json()["results"]] == ["The Hobbit"]
+
+
+@pytest.mark.django_db
+def test_search_index_follows_updates_and_deletes(api_client, member_token):
+    """Test the search index tracks book edits and deletions."""
+    book = Book.objects.create(title="Old Name", author="Author")
+    Book.objects.filter(pk=book.pk).update(title="Fresh Name")
+    deleted = Book.objects.create(title="Fresh Leftover", author="Author")
+    deleted.delete()
+
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+    old = api_client.get("/api/books/search/?q=old", headers=headers)
+    fresh = api_client.get("/api/books/search/?q=fresh", headers=headers)
+
+    assert old.json()["results"] == []
+    assert [b["id"] for b in fresh.json()["results"]] == [book.id]
+
+
+@pytest.mark.django_db
+def test_search_books_pagination(api_client, member_token):
+    """Test search results are paged with offset links."""
+    Book.objects.bulk_create(
+        Book(title=f"Saga volume {i}", author="Author") for i in range(5)
+    )
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    seen = []
+    url = "/api/books/search/?q=saga&page_size=2"
+    while url:
+        page = api_client.get(url, headers=headers).json()
+        assert len(page["results"]) <= 2
+        seen.extend(book["id"] for book in page["results"])
+        url = page["next"]
+
+    assert len(seen) == len(set(seen)) == 5
+
+
+@pytest.mark.django_db
+def test_search_books_requires_query(api_client, member_token):
+    """Test searching without a query is rejected."""
+    response = api_client.get(
+        "/api/books/search/?q=",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_admin_import_books_csv_upload(api_client, admin_token, settings):
+    """Test importing books from an uploaded CSV file across several chunks."""
+    settings.BOOK_IMPORT_CHUNK_SIZE = 2
+    rows = "".join(f"Imported {i},Author {i},{i + 1}\n" for i in range(5))
+    upload = SimpleUploadedFile(
+        "books.csv", ("title,author,total_copies\n" + rows).encode(), "text/csv"
+    )
+
+    response = api_client.post(
+        "/api/admin/books/",
+        data={"file": upload},
+        format="multipart",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED, response.json()
+    assert response.json()["created"] == 5
+    assert response.json()["errors"] == []
+    assert Book.objects.filter(title__startswith="Imported").count() == 5
+    assert Book.objects.get(title="Imported 4").available_copies == 5
+
+
+@pytest.mark.django_db
+def test_admin_import_books_ndjson_reports_bad_rows(api_client, admin_token):
+    """Test a streamed NDJSON import keeps good rows and reports bad ones."""
+    body = "\n".join(
+        [
+            json.dumps({"title": "Good One", "author": "Author"}),
+            json.dumps({"title": "No Author"}),
+            "{not json",
+            json.dumps({"title": "Good Two", "author": "Author", "total_copies": 3}),
+        ]
+    )
+
+    response = api_client.generic(
+        "POST",
+        "/api/admin/books/",
+        body,
+        content_type="application/x-ndjson",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED, response.json()
+    report = response.json()
+    assert report["created"] == 2
+    assert report["failed"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+    assert "author" in report["errors"][0]["errors"]
+    assert Book.objects.get(title="Good Two").available_copies == 3
+
+
+@pytest.mark.django_db
+def test_admin_import_books_rejects_unknown_file(api_client, admin_token):
+    """Test uploading a file that is neither CSV nor NDJSON."""
+    upload = SimpleUploadedFile("books.xlsx", b"binary", "application/octet-stream")
+
+    response = api_client.post(
+        "/api/admin/books/",
+        data={"file": upload},
+        format="multipart",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_admin_export_books_csv(api_client, admin_token, settings):
+    """Test streaming the book table as CSV over several cursor chunks."""
+    settings.EXPORT_CHUNK_SIZE = 2
+    Book.objects.bulk_create(
+        Book(
+            title=f"Export {i}", author="Author", total_copies=2, available_copies=i % 3
+        )
+        for i in range(5)
+    )
+
+    response = api_client.get(
+        "/api/admin/export/books.csv",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/csv"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == "id,title,author,total_copies,available_copies"
+    assert len(lines) == 6
+    assert lines[1].endswith(",Export 0,Author,2,0")
+
+
+@pytest.mark.django_db
+def test_admin_export_borrows_ndjson(api_client, admin_token, member_token):
+    """Test streaming the borrow table as NDJSON with the serializer's field names."""
+    member = User.objects.get(username="memberuser")
+    book = Book.objects.create(title="Exported Borrow", author="Author")
+    borrow = Borrow.objects.create(user=member, book=book)
+    expected = BorrowSerializer(borrow).data
+
+    response = api_client.get(
+        "/api/admin/export/borrows.ndjson",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    rows = [
+        json.loads(line)
+        for line in b"".join(response.streaming_content).decode().splitlines()
+    ]
+    assert rows == [dict(expected)]
+
+
+@pytest.mark.django_db
+def test_admin_export_streams_async_under_asgi(api_client, admin_token, settings):
+    """Test ASGI requests get an async stream, with the same bytes as WSGI."""
+    settings.EXPORT_CHUNK_SIZE = 2
+    Book.objects.bulk_create(
+        Book(title=f"ASGI Export {i}", author="Author") for i in range(5)
+    )
+    headers = {"Authorization": f"Bearer {admin_token['access']}"}
+    url = "/api/admin/export/books.ndjson"
+
+    async def fetch():
+        response = await AsyncClient().get(url, headers=headers)
+        return response, [chunk async for chunk in response.streaming_content]
+
+    response, chunks = async_to_sync(fetch)()
+
+    assert response.is_async
+    assert len(chunks) == 3
+    wsgi = api_client.get(url, headers=headers)
+    assert not wsgi.is_async
+    assert b"".join(chunks) == b"".join(wsgi.streaming_content)
+
+
+@pytest.mark.django_db
+def test_member_cannot_export(api_client, member_token):
+    """Test exports are admin only."""
+    response = api_client.get(
+        "/api/admin/export/books.ndjson",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_export_library_command():
+    """Test the export management command writes the table to stdout."""
+    Book.objects.create(title="Command Export", author="Author")
+    out = io.StringIO()
+
+    call_command("export_library", "books", "--format", "ndjson", stdout=out)
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["title"] for row in rows] == ["Command Export"]
+
+
+@pytest.mark.django_db
+def test_book_list_is_cached_until_books_change(api_client, member_token, read_views):
+    """Test catalog pages come from the cache and are dropped when a book changes."""
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+    book = Book.objects.create(title="Cached Book", author="Author")
+
+    first = api_client.get("/api/books/", headers=headers)
+    with CaptureQueriesContext(connection) as ctx:
+        second = api_client.get("/api/books/", headers=headers)
+
+    assert second.json() == first.json()
+    assert not any('FROM "book"' in q["sql"] for q in ctx.captured_queries)
+
+    book.title = "Renamed Book"
+    book.save()
+    renamed = api_client.get("/api/books/", headers=headers)
+    assert renamed.json()["results"][0]["title"] == "Renamed Book"
+
+    api_client.post(f"/api/books/{book.id}/borrow/", headers=headers)
+    borrowed = api_client.get("/api/books/", headers=headers)
+    assert borrowed.json()["results"][0]["available"] is False
+
+
+@pytest.mark.django_db
+def test_book_list_etag_not_modified(api_client, member_token, read_views):
+    """Test a matching If-None-Match gets a 304 until the catalog changes."""
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+    Book.objects.create(title="Tagged Book", author="Author")
+
+    response = api_client.get("/api/books/", headers=headers)
+    etag = response["ETag"]
+
+    not_modified = api_client.get(
+        "/api/books/", headers={**headers, "If-None-Match": etag}
+    )
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified["ETag"] == etag
+
+    Book.objects.create(title="Another Book", author="Author")
+    modified = api_client.get("/api/books/", headers={**headers, "If-None-Match": etag})
+    assert modified.status_code == status.HTTP_200_OK
+    assert modified["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_borrow_history_conditional_get(api_client, member_token, read_views):
+    """Test history answers If-None-Match with 304 until a borrow changes."""
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+    book = Book.objects.create(title="Polled Book", author="Author")
+    api_client.post(f"/api/books/{book.id}/borrow/", headers=headers)
+
+    response = api_client.get("/api/books/history/", headers=headers)
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert "Last-Modified" in response
+
+    not_modified = api_client.get(
+        "/api/books/history/", headers={**headers, "If-None-Match": etag}
+    )
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    api_client.post(f"/api/books/{book.id}/return/", headers=headers)
+    modified = api_client.get(
+        "/api/books/history/", headers={**headers, "If-None-Match": etag}
+    )
+    assert modified.status_code == status.HTTP_200_OK
+    assert modified.json()["results"][0]["returned_at"] is not None
+
+
+@pytest.mark.django_db
+def test_admin_borrowed_books_conditional_get(
+    api_client, admin_token, member_token, read_views
+):
+    """Test the admin borrowed list revalidates by ETag, without Last-Modified.
+
+    A return drops the borrow out of the list along with its updated_at, so
+    If-Modified-Since could not see it; only the ETag's row count does.
+    """
+    member = User.objects.get(username="memberuser")
+    books = Book.objects.bulk_create(
+        Book(title=f"Watched Book {i}", author="Author", available_copies=0)
+        for i in range(2)
+    )
+    for book in books:
+        Borrow.objects.create(user=member, book=book)
+    headers = {"Authorization": f"Bearer {admin_token['access']}"}
+
+    response = api_client.get("/api/admin/borrowed-books/", headers=headers)
+    assert "Last-Modified" not in response
+    conditional = {**headers, "If-None-Match": response["ETag"]}
+    not_modified = api_client.get("/api/admin/borrowed-books/", headers=conditional)
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    api_client.post(
+        f"/api/books/{books[0].pk}/return/",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+    modified = api_client.get("/api/admin/borrowed-books/", headers=conditional)
+    assert modified.status_code == status.HTTP_200_OK
+    assert [row["book"] for row in modified.json()] == [books[1].pk]
+
+
+@pytest.mark.django_db
+def test_borrow_list_etags_follow_renames(
+    api_client, admin_token, member_token, read_views
+):
+    """Test renaming a book or member revalidates the lists that show the names."""
+    member = User.objects.get(username="memberuser")
+    book = Book.objects.create(title="First Title", author="Author")
+    api_client.post(
+        f"/api/books/{book.id}/borrow/",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+    lists = [
+        ("/api/books/history/", member_token),
+        ("/api/admin/borrowed-books/", admin_token),
+    ]
+
+    def etags():
+        return [
+            api_client.get(url, headers={"Authorization": f"Bearer {token['access']}"})[
+                "ETag"
+            ]
+            for url, token in lists
+        ]
+
+    before = etags()
+    # A login touches last_login only, which the lists don't show
+    member.save(update_fields=["last_login"])
+    assert etags() == before
+
+    book.title = "Second Title"
+    book.save()
+    renamed_book = etags()
+    assert all(new != old for new, old in zip(renamed_book, before))
+
+    member.username = "renamedmember"
+    member.save()
+    renamed_member = etags()
+    assert all(new != old for new, old in zip(renamed_member, renamed_book))
+
+    history = api_client.get(
+        "/api/books/history/",
+        headers={
+            "Authorization": f"Bearer {member_token['access']}",
+            "If-None-Match": before[0],
+        },
+    )
+    assert history.status_code == status.HTTP_200_OK
+    assert history.json()["results"][0]["book_title"] == "Second Title"
+    assert history.json()["results"][0]["username"] == "renamedmember"
+
+
+# Queries per request: conditional-GET version + the list itself, for each
+# table read (stateless JWT authentication doesn't query the user row)
+QUERY_BUDGETS = [
+    ("/api/books/", "member_token", 1),
+    ("/api/books/search/?q=budget", "member_token", 1),
+    ("/api/books/history/", "member_token", 4),
+    ("/api/admin/borrowed-books/", "admin_token", 2),
+    ("/api/admin/books/", "admin_token", 1),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url, token_fixture, budget", QUERY_BUDGETS)
+def test_list_endpoint_query_budget(
+    request,
+    api_client,
+    create_member_user,
+    django_assert_max_num_queries,
+    read_views,
+    url,
+    token_fixture,
+    budget,
+):
+    """Test each list endpoint stays within its query budget."""
+    token = request.getfixturevalue(token_fixture)["access"]
+    member = create_member_user
+    books = Book.objects.bulk_create(
+        Book(title=f"Budget Book {i}", author="Author") for i in range(3)
+    )
+    Borrow.objects.bulk_create(Borrow(user=member, book=book) for book in books)
+
+    with django_assert_max_num_queries(budget):
+        response = api_client.get(url, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url, token_fixture, message",
+    [
+        ("/api/books/", "member_token", "No books available in the library"),
+        ("/api/books/history/", "member_token", "No borrowing history found"),
+        (
+            "/api/admin/borrowed-books/",
+            "admin_token",
+            "No books are currently borrowed",
+        ),
+    ],
+)
+def test_empty_list_message(
+    request, api_client, read_views, url, token_fixture, message
+):
+    """Test empty lists answer with a message in a single list query."""
+    token = request.getfixturevalue(token_fixture)["access"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"message": message}
+    assert not any(
+        q["sql"].endswith("LIMIT 1") for q in ctx.captured_queries
+    ), ctx.captured_queries
+
+
+def _user_queries(ctx):
+    return [q for q in ctx.captured_queries if 'FROM "custom_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_stateless_auth_skips_user_query(api_client, member_token, admin_token):
+    """Test requests authenticate from token claims without loading the user."""
+    with CaptureQueriesContext(connection) as ctx:
+        member = api_client.get(
+            "/api/books/",
+            headers={"Authorization": f"Bearer {member_token['access']}"},
+        )
+        admin = api_client.get(
+            "/api/admin/books/",
+            headers={"Authorization": f"Bearer {admin_token['access']}"},
+        )
+
+    assert member.status_code == admin.status_code == status.HTTP_200_OK
+    assert _user_queries(ctx) == []
+
+
+@pytest.mark.django_db
+def test_member_token_cannot_claim_admin(api_client, member_token, read_views):
+    """Test the role claim of a member token is not enough for admin views."""
+    response = api_client.get(
+        "/api/admin/borrowed-books/",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_cached_auth_loads_user_once(api_client, member_token, settings, read_views):
+    """Test the cached mode reuses the user row until it changes."""
+    settings.JWT_AUTH_MODE = "cached"
+    user_cache.clear()
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        api_client.get("/api/books/", headers=headers)
+        api_client.get("/api/books/", headers=headers)
+    assert len(_user_queries(ctx)) == 1
+
+    member = User.objects.get(username="memberuser")
+    member.is_active = False
+    member.save()
+
+    response = api_client.get("/api/books/", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url", ["/api/books/", "/api/books/history/", "/api/admin/borrowed-books/"]
+)
+def test_list_requires_token(api_client, read_views, url):
+    """Test the routed list views (sync or async) refuse anonymous requests."""
+    view_class = resolve(url).func.view_class
+    assert view_class.__name__.startswith("Async") == (read_views == "async")
+
+    response = api_client.get(url)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response["WWW-Authenticate"].startswith("Bearer")
+
+
+@pytest.mark.django_db
+def test_async_book_list_long_poll(member_token, settings):
+    """Test ?wait= holds a 304 open until the catalog changes or the wait ends."""
+    settings.LONG_POLL_INTERVAL = 0.01
+    Book.objects.create(title="Long Polled", author="Author")
+    view = AsyncUserBookList.as_view()
+    auth = {"Authorization": f"Bearer {member_token['access']}"}
+
+    async def get(**headers):
+        request = AsyncRequestFactory().get(
+            "/api/books/?wait=5", headers={**auth, **headers}
+        )
+        return (await view(request)).render()
+
+    async def poll_across_change(etag):
+        async def change():
+            await asyncio.sleep(0.05)
+            await sync_to_async(Book.objects.create)(title="New", author="Author")
+
+        polled, _ = await asyncio.gather(get(**{"If-None-Match": etag}), change())
+        return polled
+
+    etag = async_to_sync(get)()["ETag"]
+    polled = async_to_sync(poll_across_change)(etag)
+    assert polled.status_code == status.HTTP_200_OK
+    assert polled["ETag"] != etag
+    assert len(polled.data["results"]) == 2
+
+    settings.LONG_POLL_MAX_WAIT = 0.05
+    start = time.monotonic()
+    timed_out = async_to_sync(get)(**{"If-None-Match": polled["ETag"]})
+    assert timed_out.status_code == status.HTTP_304_NOT_MODIFIED
+    assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.django_db
+def test_async_history_long_poll_queries_only_on_change(
+    member_token, create_member_user, settings
+):
+    """Test a held history poll reads the cached borrows version, not the tables,
+    until a borrow moves it."""
+    settings.LONG_POLL_INTERVAL = 0.01
+    book = Book.objects.create(title="Polled History", author="Author")
+    view = AsyncUserBorrowHistory.as_view()
+    auth = {"Authorization": f"Bearer {member_token['access']}"}
+
+    async def get(**headers):
+        request = AsyncRequestFactory().get(
+            "/api/books/history/?wait=0.2", headers={**auth, **headers}
+        )
+        return (await view(request)).render()
+
+    etag = async_to_sync(get)()["ETag"]
+    settings.LONG_POLL_MAX_WAIT = 0
+    with CaptureQueriesContext(connection) as once:
+        async_to_sync(get)(**{"If-None-Match": etag})
+    settings.LONG_POLL_MAX_WAIT = 30
+    with CaptureQueriesContext(connection) as held:
+        timed_out = async_to_sync(get)(**{"If-None-Match": etag})
+    assert timed_out.status_code == status.HTTP_304_NOT_MODIFIED
+    # About 20 intervals went by without a query
+    assert len(held.captured_queries) == len(once.captured_queries)
+
+    async def poll_across_borrow():
+        async def borrow():
+            await asyncio.sleep(0.05)
+            await sync_to_async(borrow_book)(create_member_user, book)
+
+        polled, _ = await asyncio.gather(get(**{"If-None-Match": etag}), borrow())
+        return polled
+
+    polled = async_to_sync(poll_across_borrow)()
+    assert polled.status_code == status.HTTP_200_OK
+    assert [row["book"] for row in polled.data["results"]] == [book.pk]
+
+
+def _bulk(api_client, action, token, book_ids):
+    return api_client.post(
+        f"/api/books/{action}/",
+        {"book_ids": book_ids},
+        format="json",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_borrow_reports_each_book(api_client, member_token, create_admin_user):
+    """Test a bulk borrow handles what it can and explains the rest, in order."""
+    member = User.objects.get(username="memberuser")
+    free, also_free, mine, withdrawn = Book.objects.bulk_create(
+        Book(title=f"Stack Book {i}", author="Author") for i in range(4)
+    )
+    Borrow.objects.create(user=member, book=mine)
+    Book.objects.filter(pk__in=[mine.pk, withdrawn.pk]).update(available_copies=0)
+
+    book_ids = [free.pk, mine.pk, 999, withdrawn.pk, also_free.pk, free.pk]
+    response = _bulk(api_client, "borrow", member_token["access"], book_ids)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    body = response.json()
+    assert (body["borrowed"], body["failed"]) == (2, 3)
+    assert [result["book"] for result in body["results"]] == book_ids[:-1]
+    assert body["results"][0]["details"]["book_title"] == "Stack Book 0"
+    assert [result.get("error") for result in body["results"][1:4]] == [
+        "You have already borrowed this book",
+        "Book not found",
+        "Book is not available for borrowing",
+    ]
+    assert body["results"][4]["details"]["username"] == "memberuser"
+    assert set(
+        Borrow.objects.filter(user=member, returned_at=None).values_list(
+            "book_id", flat=True
+        )
+    ) == {free.pk, also_free.pk, mine.pk}
+    assert not Book.objects.filter(
+        pk__in=[free.pk, also_free.pk], available_copies__gt=0
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_borrow_nothing_borrowed(api_client, member_token):
+    """Test a bulk borrow with no borrowable books is a 400."""
+    response = _bulk(api_client, "borrow", member_token["access"], [998, 999])
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["borrowed"] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("book_ids", [[], [0], "1,2", list(range(1, 102))])
+def test_bulk_borrow_invalid_ids(api_client, member_token, book_ids):
+    """Test malformed or oversized ID lists are rejected."""
+    response = _bulk(api_client, "borrow", member_token["access"], book_ids)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "book_ids" in response.json()["details"]
+
+
+@pytest.mark.django_db
+def test_bulk_borrow_retries_contended_books(api_client, member_token):
+    """Test a book taken mid-request fails alone instead of failing the batch."""
+    first, taken, last = Book.objects.bulk_create(
+        Book(title=f"Raced Book {i}", author="Author") for i in range(3)
+    )
+    raced = []
+
+    def take_book(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        # Another member claims a book right after the batch has read it
+        if sql.startswith("SELECT") and 'FROM "book"' in sql and not raced:
+            raced.append(sql)
+            Book.objects.filter(pk=taken.pk).update(available_copies=0)
+        return result
+
+    with connection.execute_wrapper(take_book):
+        response = _bulk(
+            api_client, "borrow", member_token["access"], [first.pk, taken.pk, last.pk]
+        )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [result.get("error") for result in response.json()["results"]] == [
+        None,
+        "Book is not available for borrowing",
+        None,
+    ]
+    assert Borrow.objects.filter(returned_at=None).count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_return_reports_each_book(api_client, member_token):
+    """Test a bulk return closes the member's borrows and frees their books."""
+    books = Book.objects.bulk_create(
+        Book(title=f"Returned Book {i}", author="Author") for i in range(3)
+    )
+    _bulk(api_client, "borrow", member_token["access"], [book.pk for book in books])
+
+    book_ids = [books[0].pk, 999, books[2].pk]
+    response = _bulk(api_client, "return", member_token["access"], book_ids)
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert (body["returned"], body["failed"]) == (2, 1)
+    assert body["results"][0]["details"]["returned_at"] is not None
+    assert body["results"][1] == {
+        "book": 999,
+        "error": "No active borrow record found for this book",
+    }
+    assert list(
+        Book.objects.filter(available_copies__gt=0)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    ) == [books[0].pk, books[2].pk]
+
+    again = _bulk(api_client, "return", member_token["access"], book_ids)
+    assert again.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_return_reads_back_only_the_rows_it_closed(
+    api_client, create_member_user, member_token, monkeypatch
+):
+    """Test a return in the same instant as an older one reports only its own."""
+    book = Book.objects.create(title="Twice Read", author="Author", available_copies=1)
+    now = timezone.now()
+    Borrow.objects.create(user=create_member_user, book=book, returned_at=now)
+    _bulk(api_client, "borrow", member_token["access"], [book.pk])
+    monkeypatch.setattr("library_api.circulation.timezone.now", lambda: now)
+
+    response = _bulk(api_client, "return", member_token["access"], [book.pk])
+
+    assert response.json()["returned"] == 1
+    assert len(response.json()["results"]) == 1
+    book.refresh_from_db()
+    assert book.available_copies == 1
+
+
+def _bulk_query_count(api_client, action, token, count):
+    books = Book.objects.bulk_create(
+        Book(title=f"Batch Book {i}", author="Author") for i in range(count)
+    )
+    book_ids = [book.pk for book in books]
+    if action == "return":
+        _bulk(api_client, "borrow", token, book_ids)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = _bulk(api_client, action, token, book_ids)
+    assert response.json()[f"{action}ed"] == count
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("action", ["borrow", "return"])
+def test_bulk_circulation_query_count_is_flat(api_client, member_token, action):
+    """Test bulk borrow and return run the same queries for 1 or 20 books."""
+    token = member_token["access"]
+    # The stats counter rows are created on first use; keep that out of the count
+    get_counters()
+
+    one = _bulk_query_count(api_client, action, token, 1)
+    many = _bulk_query_count(api_client, action, token, 20)
+
+    assert one == many, f"Query count grew with the batch: {one} -> {many}"
+
+
+def _admin_bulk(api_client, method, token, payload):
+    return getattr(api_client, method)(
+        "/api/admin/books/",
+        payload,
+        format="json",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+@pytest.mark.django_db
+def test_admin_bulk_update_books(api_client, admin_token, settings):
+    """Test bulk PATCH updates books picked by filter and ids, chunk by chunk."""
+    settings.BOOK_BULK_CHUNK_SIZE = 2
+    old = Book.objects.bulk_create(
+        Book(title=f"Old Edition {i}", author="Old Author") for i in range(5)
+    )
+    other = Book.objects.create(title="Untouched", author="Someone Else")
+
+    response = _admin_bulk(
+        api_client,
+        "patch",
+        admin_token["access"],
+        {"filter": {"author": "Old Author"}, "changes": {"author": "New Author"}},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["updated"] == 5
+    assert Book.objects.filter(author="New Author").count() == 5
+
+    response = _admin_bulk(
+        api_client,
+        "patch",
+        admin_token["access"],
+        {
+            "ids": [old[0].pk, old[1].pk, other.pk],
+            "filter": {"author__icontains": "new"},
+            "changes": {"total_copies": 3},
+        },
+    )
+    assert response.json()["updated"] == 2
+    assert set(
+        Book.objects.filter(available_copies=3).values_list("pk", flat=True)
+    ) == {
+        old[0].pk,
+        old[1].pk,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"changes": {"author": "Everyone"}},
+        {"filter": {}, "changes": {"author": "Everyone"}},
+        {"ids": [1], "changes": {}},
+        {"ids": [1], "changes": {"title": ""}},
+        {"filter": {"publisher": "Nobody"}, "changes": {"author": "Everyone"}},
+        {
+            "filter": {"titel": "Safe Book", "available": True},
+            "changes": {"author": "Everyone"},
+        },
+    ],
+)
+def test_admin_bulk_update_rejects_bad_payloads(api_client, admin_token, payload):
+    """Test bulk PATCH needs a selection and valid changes."""
+    Book.objects.create(title="Safe Book", author="Author")
+
+    response = _admin_bulk(api_client, "patch", admin_token["access"], payload)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Book.objects.get().author == "Author"
+
+
+@pytest.mark.django_db
+def test_admin_bulk_delete_books(api_client, admin_token, member_token, settings):
+    """Test bulk DELETE removes books in chunks and detaches their borrows."""
+    settings.BOOK_BULK_CHUNK_SIZE = 2
+    weeded = Book.objects.bulk_create(
+        Book(title=f"Weeded {i}", author="Author") for i in range(5)
+    )
+    kept = Book.objects.create(title="Kept", author="Author")
+    member = User.objects.get(username="memberuser")
+    borrow = Borrow.objects.create(user=member, book=weeded[0])
+    member_auth = {"Authorization": f"Bearer {member_token['access']}"}
+    # Cached with every book
+    assert (
+        len(api_client.get("/api/books/", headers=member_auth).json()["results"]) == 6
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = _admin_bulk(
+            api_client,
+            "delete",
+            admin_token["access"],
+            {"filter": {"title__icontains": "weeded"}},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["deleted"] == 5
+    assert list(Book.objects.values_list("pk", flat=True)) == [kept.pk]
+    borrow.refresh_from_db()
+    assert borrow.book_id is None
+    # One DELETE per chunk of 2, not one per book
+    deletes = [q for q in ctx.captured_queries if q["sql"].startswith("DELETE")]
+    assert len(deletes) == 3
+    # post_delete ran (catalog invalidated) and the search triggers dropped them
+    catalog = api_client.get("/api/books/", headers=member_auth).json()["results"]
+    assert [book["title"] for book in catalog] == ["Kept"]
+    assert not search_books("weeded").exists()
+
+    response = _admin_bulk(api_client, "delete", member_token["access"], {"ids": [1]})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_admin_bulk_delete_rejects_unknown_filter(api_client, admin_token):
+    """Test a misspelt filter key is a 400, not a delete of everything else matched."""
+    Book.objects.create(title="Kept Book", author="Author")
+
+    response = _admin_bulk(
+        api_client,
+        "delete",
+        admin_token["access"],
+        {"filter": {"titel": "X", "available": True}},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "titel" in response.json()["details"]["filter"]
+    assert Book.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_admin_bulk_delete_requires_selection(api_client, admin_token):
+    """Test bulk DELETE refuses to run without ids or a filter."""
+    Book.objects.create(title="Safe Book", author="Author")
+
+    response = _admin_bulk(api_client, "delete", admin_token["access"], {})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert Book.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_catalog_counts_copies(api_client, admin_token, member_token):
+    """Test a title with several copies stays available until the last is out."""
+    created = api_client.post(
+        "/api/admin/books/",
+        {"title": "Shared Title", "author": "Author", "total_copies": 2},
+        format="json",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+    book = created.json()["books"][0]
+    assert (book["total_copies"], book["available_copies"]) == (2, 2)
+
+    member_auth = {"Authorization": f"Bearer {member_token['access']}"}
+    borrowed = api_client.post(f"/api/books/{book['id']}/borrow/", headers=member_auth)
+    assert borrowed.status_code == status.HTTP_201_CREATED
+    again = api_client.post(f"/api/books/{book['id']}/borrow/", headers=member_auth)
+    assert again.json()["error"] == "You have already borrowed this book"
+
+    listed = api_client.get("/api/books/", headers=member_auth).json()["results"][0]
+    assert (listed["available_copies"], listed["available"]) == (1, True)
+
+
+@pytest.mark.django_db
+def test_admin_update_total_copies(api_client, admin_token, member_token):
+    """Test changing total_copies shifts available_copies and respects loans."""
+    book = Book.objects.create(
+        title="Restocked", author="Author", total_copies=3, available_copies=3
+    )
+    api_client.post(
+        f"/api/books/{book.pk}/borrow/",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+
+    def patch(total_copies):
+        return api_client.patch(
+            f"/api/admin/books/{book.pk}/",
+            {"total_copies": total_copies},
+            format="json",
+            headers={"Authorization": f"Bearer {admin_token['access']}"},
+        )
+
+    response = patch(5)
+    assert response.status_code == status.HTTP_200_OK, response.json()
+    assert response.json()["book"]["available_copies"] == 4
+
+    response = patch(0)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "total_copies" in response.json()
+
+    response = patch(1)
+    assert response.json()["book"]["available_copies"] == 0
+    book.refresh_from_db()
+    assert (book.total_copies, book.available_copies) == (1, 0)
+
+
+@pytest.mark.django_db
+def test_admin_bulk_update_skips_books_on_loan(api_client, admin_token):
+    """Test a bulk total_copies change skips books with more copies out."""
+    lent, shelved = Book.objects.bulk_create(
+        Book(
+            title=f"Stocktake {i}", author="Author", total_copies=2, available_copies=2
+        )
+        for i in range(2)
+    )
+    Book.objects.filter(pk=lent.pk).update(available_copies=0)
+
+    response = _admin_bulk(
+        api_client,
+        "patch",
+        admin_token["access"],
+        {"filter": {"title__icontains": "stocktake"}, "changes": {"total_copies": 1}},
+    )
+
+    assert (response.json()["updated"], response.json()["skipped"]) == (1, 1)
+    lent.refresh_from_db()
+    shelved.refresh_from_db()
+    assert (lent.total_copies, lent.available_copies) == (2, 0)
+    assert (shelved.total_copies, shelved.available_copies) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_merge_duplicate_books(create_member_user, create_admin_user):
+    """Test duplicate title rows fold into one, keeping live and archived borrows."""
+    first, second, third, other = Book.objects.bulk_create(
+        [
+            Book(title="Dup", author="Author"),
+            Book(title="Dup", author="Author", total_copies=2, available_copies=2),
+            Book(title="Dup", author="Author"),
+            Book(title="Dup", author="Someone Else"),
+        ]
+    )
+    Book.objects.filter(pk=third.pk).update(available_copies=0)
+    borrow = Borrow.objects.create(user=create_member_user, book=third)
+    now = timezone.now()
+    archived = ArchivedBorrow.objects.create(
+        id=10_000,
+        user=create_member_user,
+        book=second,
+        borrowed_at=now - timedelta(days=100),
+        returned_at=now - timedelta(days=95),
+        updated_at=now - timedelta(days=95),
+    )
+    clash = Book.objects.bulk_create(
+        Book(title="Clash", author="Author", available_copies=0) for _ in range(2)
+    )
+    Borrow.objects.bulk_create(Borrow(user=create_admin_user, book=b) for b in clash)
+
+    out = io.StringIO()
+    call_command("merge_duplicate_books", stdout=out, stderr=io.StringIO())
+
+    assert "Merged 1 titles, removed 2 duplicate rows, skipped 1." in out.getvalue()
+    first.refresh_from_db()
+    assert (first.total_copies, first.available_copies) == (4, 3)
+    assert set(Book.objects.filter(title="Dup").values_list("pk", flat=True)) == {
+        first.pk,
+        other.pk,
+    }
+    borrow.refresh_from_db()
+    archived.refresh_from_db()
+    assert borrow.book_id == archived.book_id == first.pk
+    assert Book.objects.filter(title="Clash").count() == 2
+
+
+@pytest.mark.django_db
+def test_admin_stats_follow_borrows_and_returns(
+    api_client, admin_token, member_token, settings
+):
+    """Test the stats counters move with every borrow and return path."""
+    settings.STATS_TOP_N = 2
+    popular, steady, quiet = Book.objects.bulk_create(
+        Book(
+            title=f"Stats Book {i}", author="Author", total_copies=3, available_copies=3
+        )
+        for i in range(3)
+    )
+    member_auth = {"Authorization": f"Bearer {member_token['access']}"}
+    admin_auth = {"Authorization": f"Bearer {admin_token['access']}"}
+
+    api_client.post(f"/api/books/{popular.pk}/borrow/", headers=member_auth)
+    api_client.post(f"/api/books/{popular.pk}/return/", headers=member_auth)
+    _bulk(api_client, "borrow", member_token["access"], [popular.pk, steady.pk])
+    _bulk(api_client, "return", member_token["access"], [steady.pk])
+    api_client.post(f"/api/books/{quiet.pk}/borrow/", headers=admin_auth)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get("/api/admin/stats/", headers=admin_auth)
+
+    assert response.status_code == status.HTTP_200_OK
+    stats = response.json()
+    assert (stats["borrowed_now"], stats["total_borrows"]) == (2, 4)
+    assert (stats["titles"], stats["copies"], stats["members"]) == (3, 9, 1)
+    assert [(book["id"], book["borrow_count"]) for book in stats["top_books"]] == [
+        (popular.pk, 2),
+        (steady.pk, 1),
+    ]
+    assert [member["username"] for member in stats["top_members"]] == [
+        "memberuser",
+        "adminuser",
+    ]
+    assert stats["top_members"][0]["borrow_count"] == 3
+    # The summary row was built by this first request; later ones only read it
+    with CaptureQueriesContext(connection) as again:
+        api_client.get("/api/admin/stats/", headers=admin_auth)
+    assert len(again.captured_queries) < len(ctx.captured_queries)
+
+    response = api_client.get("/api/admin/stats/", headers=member_auth)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_borrow_counters_are_spread_over_member_slots(
+    api_client,
+    admin_token,
+    member_token,
+    create_admin_user,
+    create_member_user,
+    settings,
+):
+    """Test each member's borrows and returns move their own counter row only."""
+    settings.BORROW_COUNTER_SLOTS = 4
+    get_counters()
+    book = Book.objects.create(
+        title="Slotted Book", author="Author", total_copies=2, available_copies=2
+    )
+    for token in (member_token, admin_token):
+        api_client.post(
+            f"/api/books/{book.pk}/borrow/",
+            headers={"Authorization": f"Bearer {token['access']}"},
+        )
+    api_client.post(
+        f"/api/books/{book.pk}/return/",
+        headers={"Authorization": f"Bearer {member_token['access']}"},
+    )
+
+    rows = {
+        pk: (active, total)
+        for pk, active, total in BorrowCounters.objects.values_list(
+            "pk", "active_borrows", "total_borrows"
+        )
+    }
+    assert len(rows) == 4
+    assert rows[create_member_user.pk % 4 + 1] == (0, 1)
+    assert rows[create_admin_user.pk % 4 + 1] == (1, 1)
+    assert get_counters() == {"active_borrows": 1, "total_borrows": 2}
+
+
+@pytest.mark.django_db
+def test_refresh_library_stats(api_client, admin_token, create_member_user, settings):
+    """Test the refresh command counts overdue borrows and backfills counters."""
+    settings.LOAN_PERIOD_DAYS = 7
+    books = Book.objects.bulk_create(
+        Book(title=f"Overdue {i}", author="Author", available_copies=0)
+        for i in range(3)
+    )
+    now = timezone.now()
+    # Borrows written straight to the table, as from before the counters existed
+    Borrow.objects.bulk_create(
+        [
+            Borrow(user=create_member_user, book=books[0], borrowed_at=now),
+            Borrow(
+                user=create_member_user,
+                book=books[1],
+                borrowed_at=now - timedelta(days=8),
+            ),
+            Borrow(
+                user=create_member_user,
+                book=books[2],
+                borrowed_at=now - timedelta(days=30),
+                returned_at=now,
+            ),
+        ]
+    )
+
+    out = io.StringIO()
+    call_command("refresh_library_stats", "--rebuild-counters", stdout=out)
+
+    assert "1 overdue borrows" in out.getvalue()
+    stats = api_client.get(
+        "/api/admin/stats/",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    ).json()
+    assert (stats["borrowed_now"], stats["total_borrows"]) == (2, 3)
+    assert stats["overdue_borrows"] == 1
+    assert stats["top_members"] == [
+        {"id": create_member_user.pk, "username": "memberuser", "borrow_count": 3}
+    ]
+    assert len(stats["top_books"]) == 3
+
+
+def _history_borrows(member, count, now):
+    """``count`` borrows by ``member``, one a day, the newest still active."""
+    books = Book.objects.bulk_create(
+        Book(title=f"History Book {i}", author="Author") for i in range(count)
+    )
+    borrows = Borrow.objects.bulk_create(
+        Borrow(
+            user=member,
+            book=book,
+            borrowed_at=now - timedelta(days=count - i),
+            returned_at=None if i == count - 1 else now - timedelta(days=count - i - 1),
+        )
+        for i, book in enumerate(books)
+    )
+    Book.objects.filter(pk=books[-1].pk).update(available_copies=0)
+    return borrows
+
+
+@pytest.mark.django_db
+def test_archive_borrows_moves_old_returns(create_member_user, settings):
+    """Test the archive command moves only old returned borrows, in batches."""
+    settings.BORROW_ARCHIVE_AFTER_DAYS = 3
+    now = timezone.now()
+    borrows = _history_borrows(create_member_user, 6, now)
+
+    out = io.StringIO()
+    call_command("archive_borrows", "--batch-size", "1", stdout=out)
+
+    # Returned 5, 4 and 3 days ago; the later returns and the active borrow stay
+    assert out.getvalue().startswith("Archived 3 borrows")
+    assert list(ArchivedBorrow.objects.order_by("pk").values_list("pk", flat=True)) == [
+        borrow.pk for borrow in borrows[:3]
+    ]
+    assert list(Borrow.objects.order_by("pk").values_list("pk", flat=True)) == [
+        borrow.pk for borrow in borrows[3:]
+    ]
+    archived = ArchivedBorrow.objects.get(pk=borrows[0].pk)
+    assert archived.borrowed_at == borrows[0].borrowed_at
+    assert archived.book_id == borrows[0].book_id
+
+    call_command("archive_borrows", stdout=io.StringIO())
+    assert ArchivedBorrow.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_archive_batches_read_the_returned_index():
+    """Test the archive batch query is served by the partial returned_at index."""
+    plan = (
+        Borrow.objects.filter(returned_at__lt=timezone.now())
+        .order_by("returned_at", "pk")
+        .values("id")[:10]
+        .explain()
+    )
+
+    assert "borrow_returned_idx" in plan
+
+
+@pytest.mark.django_db
+def test_borrow_history_pages_across_tiers(
+    api_client, member_token, create_member_user, read_views
+):
+    """Test history merges live and archived borrows, newest first, page by page."""
+    now = timezone.now()
+    borrows = _history_borrows(create_member_user, 7, now)
+    call_command("archive_borrows", "--days", "3", stdout=io.StringIO())
+    assert ArchivedBorrow.objects.count() == 4
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    pages, url = [], "/api/books/history/?page_size=3"
+    while url:
+        page = api_client.get(url, headers=headers).json()
+        pages.append([row["id"] for row in page["results"]])
+        url = page["next"]
+
+    newest_first = [borrow.pk for borrow in reversed(borrows)]
+    assert pages == [newest_first[:3], newest_first[3:6], newest_first[6:]]
+
+    back = api_client.get(page["previous"], headers=headers).json()
+    assert [row["id"] for row in back["results"]] == newest_first[3:6]
+    first = api_client.get(back["previous"], headers=headers).json()
+    assert [row["id"] for row in first["results"]] == newest_first[:3]
+    assert first["previous"] is None
+    assert first["results"][-1]["book_title"] == "History Book 4"
+
+    bad = api_client.get("/api/books/history/?cursor=nonsense", headers=headers)
+    assert bad.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_bulk_delete_detaches_archived_borrows(
+    api_client, admin_token, create_member_user
+):
+    """Test deleting books clears them from archived borrows too."""
+    borrows = _history_borrows(create_member_user, 2, timezone.now())
+    call_command("archive_borrows", "--days", "0", stdout=io.StringIO())
+
+    response = _admin_bulk(
+        api_client, "delete", admin_token["access"], {"ids": [borrows[0].book_id]}
+    )
+
+    assert response.json()["deleted"] == 1
+    assert ArchivedBorrow.objects.get(pk=borrows[0].pk).book_id is None
+
+
+def test_process_local_catalog_cache_is_flagged(settings):
+    """Test the system check flags a per-process catalog cache outside DEBUG."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache"},
+    }
+    settings.DEBUG = False
+
+    assert [warning.id for warning in check_catalog_cache(None)] == ["library_api.W001"]
+    settings.CATALOG_CACHE_ALIAS = "shared"
+    assert check_catalog_cache(None) == []
+    settings.CATALOG_CACHE_ALIAS = "default"
+    settings.DEBUG = True
+    assert check_catalog_cache(None) == []
+
+
+def _metric(api_client, sample):
+    """Current value of one sample line from /metrics, 0 if not exported yet."""
+    text = api_client.get("/metrics").content.decode()
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.django_db
+def test_metrics_record_each_view(api_client, member_token, read_views, settings):
+    """Test /metrics counts requests, queries, serializer time and sizes per URL name."""
+    settings.METRICS_PUBLIC = True
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+    book = Book.objects.create(title="Measured Book", author="Author")
+    borrowed = (
+        'library_requests_total{view="user-book-borrow",method="POST",status="201"}'
+    )
+    history = '{view="user-borrow-history",method="GET"}'
+    before = {
+        name: _metric(api_client, name)
+        for name in (
+            borrowed,
+            f"library_request_db_queries_count{history}",
+            f"library_request_db_queries_sum{history}",
+            f"library_request_serializer_duration_seconds_sum{history}",
+            f"library_response_size_bytes_sum{history}",
+        )
+    }
+
+    api_client.post(f"/api/books/{book.pk}/borrow/", headers=headers)
+    response = api_client.get("/api/books/history/", headers=headers)
+
+    after = {name: _metric(api_client, name) for name in before}
+    change = {name: after[name] - before[name] for name in before}
+    assert change[borrowed] == 1
+    assert change[f"library_request_db_queries_count{history}"] == 1
+    # Conditional-GET version and list, for each tier
+    assert change[f"library_request_db_queries_sum{history}"] == 4
+    assert change[f"library_request_serializer_duration_seconds_sum{history}"] > 0
+    assert change[f"library_response_size_bytes_sum{history}"] == len(response.content)
+
+    metrics = api_client.get("/metrics")
+    assert metrics["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert (
+        "# TYPE library_request_duration_seconds histogram" in metrics.content.decode()
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_token(api_client, settings):
+    """Test /metrics is closed by default and requires the token once configured."""
+    assert api_client.get("/metrics").status_code == status.HTTP_403_FORBIDDEN
+    settings.METRICS_PUBLIC = True
+    assert api_client.get("/metrics").status_code == status.HTTP_200_OK
+
+    settings.METRICS_AUTH_TOKEN = "scrape-secret"
+
+    assert api_client.get("/metrics").status_code == status.HTTP_401_UNAUTHORIZED
+    response = api_client.get(
+        "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_metrics_count_unknown_methods_as_other(api_client, settings):
+    """Test request methods outside the standard set share one "other" label."""
+    settings.METRICS_PUBLIC = True
+    sample = 'library_requests_total{view="metrics",method="other",status="200"}'
+    before = _metric(api_client, sample)
+
+    for method in ("PROPFIND", "BREW"):
+        api_client.generic(method, "/metrics")
+
+    assert _metric(api_client, sample) - before == 2
+    assert "BREW" not in api_client.get("/metrics").content.decode()
+
+
+def test_metric_shards_fold_into_totals_when_threads_exit():
+    """Test exited threads' shards are retired into the totals, not kept."""
+    counter = Counter("test_thread_churn_total", "Test counter.", ("kind",))
+
+    def work():
+        counter.inc(("thread",))
+
+    for _ in range(50):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    counter.inc(("main",), 3)
+
+    assert len(counter._shards) == 1
+    assert counter.collect() == {("thread",): [50], ("main",): [3]}
+
+
+@pytest.mark.django_db
+def test_slow_request_log_captures_sql(api_client, member_token, settings, caplog):
+    """Test requests over SLOW_REQUEST_THRESHOLD are logged with their SQL."""
+    Book.objects.create(title="Slow Book", author="Author")
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    api_client.get("/api/books/search/?q=slow", headers=headers)
+    assert not caplog.records
+
+    settings.SLOW_REQUEST_THRESHOLD = 0
+    with caplog.at_level("WARNING", logger="library_api.slow_requests"):
+        api_client.get("/api/books/search/?q=slow", headers=headers)
+
+    (record,) = caplog.records
+    message = record.getMessage()
+    assert "GET /api/books/search/?q=slow (user-book-search)" in message
+    assert 'FROM "book"' in message
+
+
+@pytest.mark.django_db
+def test_borrow_throttled_per_user(api_client, member_token, admin_token, settings):
+    """Test single and bulk borrows share one token bucket per member."""
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            "borrow": "2/min",
+        },
+    }
+    books = Book.objects.bulk_create(
+        Book(title=f"Throttled {i}", author="Author") for i in range(4)
+    )
+    member = {"Authorization": f"Bearer {member_token['access']}"}
+
+    first = api_client.post(f"/api/books/{books[0].pk}/borrow/", headers=member)
+    second = _bulk(api_client, "borrow", member_token["access"], [books[1].pk])
+    third = api_client.post(f"/api/books/{books[2].pk}/borrow/", headers=member)
+
+    assert [first.status_code, second.status_code] == [201, 201]
+    assert third.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert "Retry-After" in third
+    other = api_client.post(
+        f"/api/books/{books[3].pk}/borrow/",
+        headers={"Authorization": f"Bearer {admin_token['access']}"},
+    )
+    assert other.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+def test_list_views_apply_throttles(
+    api_client, member_token, settings, monkeypatch, read_views
+):
+    """Test the routed list views (sync or async) refuse requests past the bucket."""
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            "borrow": "2/min",
+        },
+    }
+    view_class = resolve("/api/books/").func.view_class
+    monkeypatch.setattr(view_class, "throttle_classes", [BorrowRateThrottle])
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    responses = [api_client.get("/api/books/", headers=headers) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert "Retry-After" in responses[2]
+
+
+@pytest.mark.django_db
+def test_list_views_negotiate_renderer(api_client, member_token, read_views):
+    """Test the routed list views (sync or async) honour Accept like DRF views."""
+    Book.objects.create(title="Negotiated", author="Author")
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    html = api_client.get("/api/books/", headers={**headers, "Accept": "text/html"})
+    refused = api_client.get(
+        "/api/books/", headers={**headers, "Accept": "application/xml"}
+    )
+
+    assert html.status_code == status.HTTP_200_OK
+    assert html["Content-Type"].startswith("text/html")
+    assert b"Negotiated" in html.content
+    assert refused.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+
+@pytest.mark.django_db
+def test_book_list_sparse_fields(api_client, member_token, read_views):
+    """Test ?fields= trims each row and the columns the list query selects."""
+    Book.objects.bulk_create(
+        Book(title=f"Sparse {i}", author="Hidden Author") for i in range(3)
+    )
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get("/api/books/?fields=title,id", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert [list(row) for row in results] == [["id", "title"]] * 3
+    (select,) = [q["sql"] for q in ctx.captured_queries if 'FROM "book"' in q["sql"]]
+    assert '"book"."title"' in select
+    assert '"book"."author"' not in select
+
+    available = api_client.get("/api/books/?fields=available", headers=headers)
+    assert available.json()["results"][0] == {"available": True}
+
+    bad = api_client.get("/api/books/?fields=id,isbn", headers=headers)
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+    assert "isbn" in bad.json()["fields"][0]
+
+
+@pytest.mark.django_db
+def test_borrow_history_sparse_columns(
+    api_client, member_token, create_member_user, read_views
+):
+    """Test history pages in the columnar layout, joining only what is asked for."""
+    now = timezone.now()
+    borrows = _history_borrows(create_member_user, 3, now)
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        page = api_client.get(
+            "/api/books/history/?fields=id,book_title&layout=columns&page_size=2",
+            headers=headers,
+        ).json()
+
+    assert page["results"] == {
+        "columns": ["id", "book_title"],
+        "rows": [
+            [borrows[2].pk, "History Book 2"],
+            [borrows[1].pk, "History Book 1"],
+        ],
+    }
+    assert not any('JOIN "user"' in q["sql"] for q in ctx.captured_queries)
+    assert any('JOIN "book"' in q["sql"] for q in ctx.captured_queries)
+    rest = api_client.get(page["next"], headers=headers).json()
+    assert rest["results"]["rows"] == [[borrows[0].pk, "History Book 0"]]
+
+    full = api_client.get("/api/books/history/?layout=columns", headers=headers)
+    assert full.json()["results"]["columns"] == list(BorrowSerializer.Meta.fields)
+    assert full.json()["results"]["rows"][0][1:3] == [
+        create_member_user.pk,
+        borrows[2].book_id,
+    ]
+    bad = api_client.get("/api/books/history/?layout=table", headers=headers)
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/books/",
+        "/api/books/?fields=title,available&layout=columns",
+        "/api/books/search/?q=fast",
+        "/api/books/history/",
+        "/api/books/history/?page_size=2&fields=book_title,returned_at",
+        "/api/books/history/?layout=columns",
+        "/api/admin/books/",
+        "/api/admin/borrowed-books/",
+    ],
+)
+def test_fast_list_serialization_matches_serializers(
+    api_client, admin_token, member_token, create_member_user, settings, read_views, url
+):
+    """Test the values_list() row path answers byte for byte like the serializers."""
+    now = timezone.now()
+    _history_borrows(create_member_user, 5, now)
+    call_command("archive_borrows", "--days", "3", stdout=io.StringIO())
+    Book.objects.filter(title="History Book 3").delete()
+    Book.objects.create(title="Fast Path\u2028Book", author="Ünïcode")
+    token = (admin_token if "/admin/" in url else member_token)["access"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    bodies = []
+    for fast in (False, True):
+        settings.FAST_LIST_SERIALIZATION = fast
+        cache.clear()
+        response = api_client.get(url, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        bodies.append(response.content)
+
+    assert bodies[0] == bodies[1]
+    assert b"History Book" in bodies[0] or b"Fast Path" in bodies[0]
+
+
+def test_library_json_renderer_matches_drf():
+    """Test the orjson renderer writes the same bytes as DRF's JSONRenderer."""
+    data = {
+        "text": "Ünïcode\u2028line",
+        "when": timezone.now(),
+        "errors": {0: [ErrorDetail("Bad id.", code="invalid")]},
+        "lazy": gettext_lazy("Not found."),
+        "values": (1, 2.5, None, True),
+    }
+    assert LibraryJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+def test_large_responses_are_compressed(api_client, member_token, settings, read_views):
+    """Test big lists are brotli/gzip-compressed as negotiated, small ones sent as is."""
+    settings.COMPRESSION_MIN_SIZE = 1024
+    Book.objects.bulk_create(
+        Book(title=f"Compressed Book {i}", author="Author") for i in range(40)
+    )
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+    plain = api_client.get("/api/books/", headers=headers)
+    assert "Content-Encoding" not in plain
+    assert len(plain.content) >= settings.COMPRESSION_MIN_SIZE
+
+    decoders = {"gzip": gzip.decompress, "br": brotli.decompress}
+    for accept, coding in [("gzip", "gzip"), ("gzip;q=0.5, br", "br"), ("*", "br")]:
+        response = api_client.get(
+            "/api/books/", headers={**headers, "Accept-Encoding": accept}
+        )
+        assert response["Content-Encoding"] == coding
+        assert "Accept-Encoding" in response["Vary"]
+        assert len(response.content) < len(plain.content) / 3
+        assert decoders[coding](response.content) == plain.content
+        assert response["ETag"] == f"W/{plain['ETag']}"
+
+    not_modified = api_client.get(
+        "/api/books/",
+        headers={**headers, "Accept-Encoding": "br", "If-None-Match": response["ETag"]},
+    )
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    small = api_client.get(
+        "/api/books/?page_size=1", headers={**headers, "Accept-Encoding": "gzip"}
+    )
+    assert "Content-Encoding" not in small
+    refused = api_client.get(
+        "/api/books/", headers={**headers, "Accept-Encoding": "br;q=0, gzip;q=0"}
+    )
+    assert refused.content == plain.content
+
+
+@pytest.mark.django_db
+def test_gzip_responses_are_padded_against_breach(
+    api_client, member_token, settings, monkeypatch
+):
+    """Test gzip bodies carry Django's random-length header padding."""
+    settings.COMPRESSION_MIN_SIZE = 1
+    monkeypatch.setattr(secrets, "randbelow", lambda limit: 37)
+    Book.objects.bulk_create(
+        Book(title=f"Padded Book {i}", author="Author") for i in range(20)
+    )
+    headers = {"Authorization": f"Bearer {member_token['access']}"}
+
+    response = api_client.get(
+        "/api/books/", headers={**headers, "Accept-Encoding": "gzip"}
+    )
+
+    assert response["Content-Encoding"] == "gzip"
+    # FNAME flag, then the padding as a NUL-terminated file name
+    assert response.content[3] & 0x08
+    assert response.content[10:48] == b"a" * 37 + b"\x00"
+    assert b"Padded Book" in gzip.decompress(response.content)
+
+
+@pytest.mark.django_db
+def test_token_responses_are_never_compressed(api_client, create_member_user, settings):
+    """Test the token-issuing auth endpoints are sent uncompressed."""
+    settings.COMPRESSION_MIN_SIZE = 1
+    Book.objects.bulk_create(
+        Book(title=f"Compressible Book {i}", author="Author") for i in range(20)
+    )
+    login = api_client.post(
+        "/auth/login/",
+        {"username": "memberuser", "password": "memberpassword"},
+        format="json",
+        headers={"Accept-Encoding": "br, gzip"},
+    )
+    assert login.status_code == status.HTTP_200_OK
+    assert "Content-Encoding" not in login
+    refreshed = api_client.post(
+        "/auth/token/refresh/",
+        {"refresh": login.json()["refresh"]},
+        format="json",
+        headers={"Accept-Encoding": "br, gzip"},
+    )
+    assert refreshed.status_code == status.HTTP_200_OK
+    assert "Content-Encoding" not in refreshed
+
+    books = api_client.get(
+        "/api/books/",
+        headers={
+            "Authorization": f"Bearer {login.json()['access']}",
+            "Accept-Encoding": "gzip",
+        },
+    )
+    assert books["Content-Encoding"] == "gzip"